@@ -1,9 +1,103 @@
+"""Client MongoDB du processus, créé à la première utilisation et fermé par le lifespan."""
+
+import threading
+from typing import Optional
+
 from pymongo import MongoClient
 from app.config import settings
+from app.db.monitoring import event_listeners
+from app.db.tenancy import collection_name, current_tenant, database_name, tenant_uri
+
+
+# Options du client (pool, délais, préférence de lecture, write concern, compression),
+# partagées avec le client asynchrone
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS or None,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS or None,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+    }
+    if settings.MONGO_WRITE_CONCERN:
+        w = settings.MONGO_WRITE_CONCERN
+        options["w"] = int(w) if w.isdigit() else w
+    if settings.MONGO_COMPRESSORS:
+        options["compressors"] = settings.MONGO_COMPRESSORS
+    if settings.MONGO_METRICS:
+        options["event_listeners"] = event_listeners()
+    return options
+
+
+class LazyCollection:
+    """Collection résolue à chaque utilisation : importer l'app n'ouvre aucune connexion.
+
+    ``tenant_scoped`` : collection de la partition du tenant courant (app.db.tenancy).
+    """
+
+    def __init__(self, name: str, get_database, tenant_scoped: bool = False):
+        self.name = name
+        self.tenant_scoped = tenant_scoped
+        self._get_database = get_database
+
+    def resolve(self):
+        tenant = current_tenant() if self.tenant_scoped else None
+        return self._get_database(tenant)[collection_name(self.name, tenant)]
+
+    def __getattr__(self, attribute):
+        return getattr(self.resolve(), attribute)
+
+    def __repr__(self):
+        return f"LazyCollection({self.name!r})"
+
+
+_client = None
+# Clients des tenants placés sur un autre cluster (TENANT_MONGO_URIS), par URI
+_tenant_clients = {}
+_client_lock = threading.Lock()
+
+
+def get_client(tenant: Optional[str] = None) -> MongoClient:
+    global _client  # pylint: disable=global-statement
+    uri = tenant_uri(tenant)
+    if uri != settings.MONGO_URI:
+        if uri not in _tenant_clients:
+            with _client_lock:
+                if uri not in _tenant_clients:
+                    _tenant_clients[uri] = MongoClient(uri, **client_options())
+        return _tenant_clients[uri]
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(settings.MONGO_URI, **client_options())
+    return _client
+
+
+def get_db(tenant: Optional[str] = None):
+    return get_client(tenant)[database_name(tenant)]
+
+
+def close_client():
+    """Ferme les clients créés (arrêt de l'app)."""
+    global _client  # pylint: disable=global-statement
+    with _client_lock:
+        for client in (_client, *_tenant_clients.values()):
+            if client is not None:
+                client.close()
+        _client = None
+        _tenant_clients.clear()
+
+
+# Exemple d'accès à une collection "clients" (partitionnée par tenant si TENANT_CLAIM)
+clients_collection = LazyCollection("clients", get_db, tenant_scoped=True)
+
+# Événements en attente de publication (mode EVENTS_MODE=outbox)
+outbox_collection = LazyCollection("outbox", get_db)
 
-client = MongoClient(settings.MONGO_URI)
-db = client[settings.DATABASE_NAME]
+# Jetons de reprise du change stream (mode EVENTS_MODE=changestream)
+change_tokens_collection = LazyCollection("change_stream_tokens", get_db)
 
-# Exemple d'accès à une collection "clients"
-clients_collection = db["clients"]
- 
\ No newline at end of file
+# Réponses des écritures rejouables (en-tête Idempotency-Key)
+idempotency_collection = LazyCollection("idempotency_keys", get_db)
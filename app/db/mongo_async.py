@@ -0,0 +1,34 @@
+"""Client MongoDB asynchrone (ASYNC_MODE), créé à la première utilisation."""
+
+from typing import Optional
+
+from pymongo import AsyncMongoClient
+from app.config import settings
+from app.db.mongo import LazyCollection, client_options
+from app.db.tenancy import database_name, tenant_uri
+
+# Clients par URI : MONGO_URI, puis celles des tenants placés sur un autre cluster
+_clients = {}
+
+
+def get_client(tenant: Optional[str] = None) -> AsyncMongoClient:
+    # Appelé depuis la boucle d'événements : pas de concurrence entre threads à gérer
+    uri = tenant_uri(tenant)
+    if uri not in _clients:
+        _clients[uri] = AsyncMongoClient(uri, **client_options())
+    return _clients[uri]
+
+
+def get_db(tenant: Optional[str] = None):
+    return get_client(tenant)[database_name(tenant)]
+
+
+async def close_client():
+    for client in list(_clients.values()):
+        await client.close()
+    _clients.clear()
+
+
+clients_collection = LazyCollection("clients", get_db, tenant_scoped=True)
+outbox_collection = LazyCollection("outbox", get_db)
+idempotency_collection = LazyCollection("idempotency_keys", get_db)
@@ -0,0 +1,81 @@
+"""Métriques Prometheus du pool de connexions et des commandes MongoDB."""
+
+from pymongo import monitoring
+from prometheus_client import Counter, Gauge, Histogram
+
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds", "Durée des commandes MongoDB", ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "Commandes MongoDB en échec", ["command"]
+)
+MONGO_POOL_CONNECTIONS = Gauge("mongo_pool_connections", "Connexions ouvertes dans le pool MongoDB",
+                               multiprocess_mode="livesum")
+MONGO_POOL_CHECKED_OUT = Gauge("mongo_pool_checked_out", "Connexions MongoDB en cours d'utilisation",
+                               multiprocess_mode="livesum")
+MONGO_POOL_WAIT = Histogram(
+    "mongo_pool_checkout_wait_seconds", "Attente d'une connexion libre dans le pool MongoDB",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongo_pool_checkout_failures_total", "Échecs d'obtention d'une connexion MongoDB", ["reason"]
+)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Durée et échecs de chaque commande, par nom de commande."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.labels(event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_COMMAND_FAILURES.labels(event.command_name).inc()
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Taille du pool, connexions empruntées et temps d'attente d'une connexion."""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.labels(str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_CHECKED_OUT.inc()
+        duration = getattr(event, "duration", None)  # pymongo >= 4.9
+        if duration is not None:
+            MONGO_POOL_WAIT.observe(duration)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.dec()
+
+
+def event_listeners() -> list:
+    return [CommandMetrics(), PoolMetrics()]
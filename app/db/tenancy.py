@@ -0,0 +1,93 @@
+"""Partitionnement des clients par tenant (claim ``TENANT_CLAIM`` du JWT).
+
+Le tenant de la requête en cours est gardé dans une variable de contexte,
+positionnée par la dépendance ``tenant_scope`` : les collections déclarées
+``tenant_scoped`` (``clients``) sont alors résolues dans la partition du tenant,
+sans requête sur les autres partitions.
+
+* ``TENANT_STORAGE=database`` : une base ``<DATABASE_NAME>_<tenant>`` par tenant ;
+* ``TENANT_STORAGE=collection`` : une collection ``clients_<tenant>`` dans ``DATABASE_NAME`` ;
+* ``TENANT_MONGO_URIS`` : tenants placés sur un autre cluster (autre primaire).
+
+Hors requête (workers, scripts), le tenant est fixé avec ``tenant_context``. Le
+change stream (``EVENTS_MODE=changestream``) suit toutes les partitions de
+``MONGO_URI`` et retrouve le tenant d'un changement d'après son espace de noms.
+"""
+
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from app.config import settings
+
+# Utilisé tel quel dans les noms de bases et de collections
+TENANT_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,48}$")
+
+_current_tenant: ContextVar[Optional[str]] = ContextVar("current_tenant", default=None)
+
+
+def current_tenant() -> Optional[str]:
+    return _current_tenant.get()
+
+
+def set_current_tenant(tenant: Optional[str]):
+    return _current_tenant.set(tenant)
+
+
+@contextmanager
+def tenant_context(tenant: Optional[str]):
+    """Exécute le bloc dans la partition de ``tenant`` (None : partition par défaut)."""
+    token = _current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def check_tenant(value) -> str:
+    if not isinstance(value, str) or not TENANT_PATTERN.match(value):
+        raise ValueError("Tenant absent ou invalide dans le jeton")
+    return value
+
+
+def database_name(tenant: Optional[str] = None) -> str:
+    if tenant is None or settings.TENANT_STORAGE != "database":
+        return settings.DATABASE_NAME
+    return f"{settings.DATABASE_NAME}_{tenant}"
+
+
+def collection_name(name: str, tenant: Optional[str] = None) -> str:
+    if tenant is None or settings.TENANT_STORAGE != "collection":
+        return name
+    return f"{name}_{tenant}"
+
+
+def tenant_uri(tenant: Optional[str] = None) -> str:
+    if tenant is None:
+        return settings.MONGO_URI
+    return settings.TENANT_MONGO_URIS.get(tenant, settings.MONGO_URI)
+
+
+# Filtre de change stream ($match) sur les partitions d'une collection : ses bases
+# <DATABASE_NAME>_<tenant> (flux du cluster) ou ses collections <name>_<tenant> (flux de la base)
+def partitions_match(name: str) -> dict:
+    suffix = f"(_{TENANT_PATTERN.pattern[1:-1]})?$"
+    if settings.TENANT_STORAGE == "database":
+        return {"ns.db": {"$regex": f"^{re.escape(settings.DATABASE_NAME)}{suffix}"}, "ns.coll": name}
+    return {"ns.db": settings.DATABASE_NAME, "ns.coll": {"$regex": f"^{re.escape(name)}{suffix}"}}
+
+
+# Tenant d'un changement d'après son espace de noms ({"db": …, "coll": …}) ; None : partition par défaut
+def tenant_of_namespace(namespace: dict, name: str) -> Optional[str]:
+    if settings.TENANT_STORAGE == "database":
+        base, value = settings.DATABASE_NAME, namespace.get("db", "")
+    else:
+        base, value = name, namespace.get("coll", "")
+    if not value.startswith(f"{base}_"):
+        return None
+    return value[len(base) + 1:]
+
+
+# Tenants dont les index ont été créés dans ce processus (première requête du tenant)
+prepared_tenants = set()
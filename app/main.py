@@ -1,23 +1,171 @@
-"""Point d'entrée principal de l'API Clients avec monitoring Prometheus."""
+"""Point d'entrée principal de l'API Clients avec monitoring Prometheus.
 
-from fastapi import FastAPI
-from prometheus_fastapi_instrumentator import Instrumentator
-from app.routes import clients, token  # 🔹 Ajout du router 'token'
+``create_app()`` construit l'application ; ``app`` est créée au premier accès
+(``uvicorn app.main:app`` ou ``uvicorn --factory app.main:create_app``).
+"""
 
-app = FastAPI(
-    title="Clients API",
-    version="1.0.0",
-    description="API de gestion des clients pour PayeTonKawa"
-)
+import logging
+import os
+from contextlib import asynccontextmanager
 
-# Monitoring Prometheus
-Instrumentator().instrument(app).expose(app)
+from anyio import to_thread
+from fastapi import Depends, FastAPI
+from pymongo.errors import PyMongoError
+from app.config import settings
+from app.db.mongo import close_client as close_mongo_client
+from app.server import mark_worker_dead
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Crée les index et ouvre RabbitMQ (ou le dispatcher outbox) au démarrage ; ferme
+    RabbitMQ et MongoDB à l'arrêt. Les modules de messagerie ne sont importés que
+    pour le mode d'événements choisi."""
+    # pylint: disable=import-outside-toplevel
+    # Threads disponibles pour les handlers synchrones de ce worker
+    to_thread.current_default_thread_limiter().total_tokens = settings.SERVER_THREADPOOL_SIZE
+    await _ensure_indexes()
+    dispatcher = None
+    if settings.EVENTS_MODE == "outbox":
+        if settings.OUTBOX_DISPATCHER_IN_PROCESS:
+            from app.messaging.outbox import start_dispatcher_thread
+            dispatcher = start_dispatcher_thread()
+    elif settings.EVENTS_MODE == "changestream":
+        if settings.CHANGE_STREAM_IN_PROCESS:
+            dispatcher = _start_change_stream()
+    elif settings.ASYNC_MODE:
+        await _start_async_publisher()
+    else:
+        from app.messaging.publisher import CONNECTION_ERRORS, get_publisher
+        try:
+            get_publisher().start()
+        except CONNECTION_ERRORS as exc:
+            # L'API démarre quand même : la connexion sera retentée à la première publication
+            logger.warning("[RabbitMQ] Broker indisponible au démarrage : %s", exc)
+    listener = None
+    # Le cache mémoire est propre au réplica : il suit les écritures des autres via RabbitMQ
+    if (settings.CLIENT_CACHE_BACKEND == "memory" and settings.CLIENT_CACHE_INVALIDATION_LISTENER
+            and settings.RABBITMQ_EXCHANGE):
+        from app.messaging.cache_invalidation import start_listener_thread
+        listener = start_listener_thread()
+    yield
+    for thread, stop_event in filter(None, (dispatcher, listener)):
+        stop_event.set()
+        thread.join(timeout=settings.OUTBOX_POLL_INTERVAL + 5)
+    if settings.CHANGE_FEED_ENABLED:
+        from app.messaging.change_stream import change_feed
+        change_feed.stop()
+    if settings.ASYNC_MODE:
+        await _stop_async_clients()
+    else:
+        from app.messaging.publisher import shutdown_publisher
+        shutdown_publisher()
+    close_mongo_client()
+    mark_worker_dead(os.getpid())
+
+# Index et clés de recherche ; des emails en double (DuplicateEmailsError) arrêtent le démarrage
+async def _ensure_indexes():
+    # pylint: disable=import-outside-toplevel
+    try:
+        if settings.ASYNC_MODE:
+            from app.services.async_client_service import ensure_indexes
+            await ensure_indexes()
+        else:
+            from app.services.client_service import ensure_indexes
+            ensure_indexes()
+    except PyMongoError as exc:
+        logger.warning("[MongoDB] Création des index impossible : %s", exc)
+
+def _start_change_stream():
+    # pylint: disable=import-outside-toplevel
+    from app.messaging.change_stream import ChangeStreamTailer, change_feed, publish_to_broker, start_tailer_thread
+    sinks = [publish_to_broker]
+    # Le flux SSE réutilise le change stream du tailer au lieu d'en ouvrir un second
+    if settings.CHANGE_FEED_ENABLED:
+        change_feed.attach()
+        sinks.append(change_feed.publish)
+    return start_tailer_thread(ChangeStreamTailer(sinks=sinks))
+
+async def _start_async_publisher():
+    from app.messaging.async_publisher import async_publisher  # pylint: disable=import-outside-toplevel
+    try:
+        await async_publisher.start()
+    except (ConnectionError, OSError) as exc:
+        logger.warning("[RabbitMQ] Broker indisponible au démarrage : %s", exc)
+
+async def _stop_async_clients():
+    # pylint: disable=import-outside-toplevel
+    from app.messaging.async_publisher import async_publisher
+    from app.db.mongo_async import close_client
+    await async_publisher.close()
+    await close_client()
+
+# Combinaisons de paramètres refusées au démarrage plutôt que de perdre des événements
+def check_settings():
+    if settings.EVENTS_MODE == "outbox" and not settings.MONGO_TRANSACTIONS:
+        # Sans transaction, un arrêt entre l'écriture du client et celle de son événement perd l'événement
+        raise RuntimeError("EVENTS_MODE=outbox exige MONGO_TRANSACTIONS=true (replica set requis)")
+    if settings.TENANT_CLAIM and settings.TENANT_MONGO_URIS:
+        # Le change stream ne suit que MONGO_URI ; l'outbox, sur MONGO_URI, ne peut pas partager
+        # la transaction d'un client écrit sur un autre cluster
+        if settings.EVENTS_MODE in ("changestream", "outbox"):
+            raise RuntimeError(f"EVENTS_MODE={settings.EVENTS_MODE} incompatible avec TENANT_MONGO_URIS "
+                               "(tenants sur un autre cluster) : utiliser EVENTS_MODE=inline")
 
-@app.get("/")
 def root():
     """Affiche un message de bienvenue."""
     return {"msg": "Bienvenue sur l'API Clients"}
 
-# Inclusions des routes
-app.include_router(token.router)  # 🔹 Ajout du router /token
-app.include_router(clients.router, prefix="/clients", tags=["clients"])
+def create_app() -> FastAPI:
+    """Construit l'application : routes du mode choisi (sync ou ASYNC_MODE), monitoring
+    Prometheus si METRICS_ENABLED, Server-Timing si SERVER_TIMING, compression si
+    COMPRESSION_ENABLED, partition par tenant si TENANT_CLAIM."""
+    # pylint: disable=import-outside-toplevel
+    # Handler racine des logs de l'application (sans effet si un handler est déjà installé) ;
+    # uvicorn ne configure que ses propres loggers
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    check_settings()
+    application = FastAPI(
+        title="Clients API",
+        version="1.0.0",
+        description="API de gestion des clients pour PayeTonKawa",
+        lifespan=lifespan,
+    )
+
+    # Monitoring Prometheus
+    if settings.METRICS_ENABLED:
+        from prometheus_fastapi_instrumentator import Instrumentator
+        Instrumentator().instrument(application).expose(application)
+
+    # Détail des étapes de chaque requête dans l'en-tête Server-Timing (débogage uniquement)
+    if settings.SERVER_TIMING:
+        from app.utils.timing import ServerTimingMiddleware
+        application.add_middleware(ServerTimingMiddleware)
+
+    # Compression négociée (Accept-Encoding) des réponses au-delà du seuil de leur route
+    if settings.COMPRESSION_ENABLED:
+        from app.utils.compression import CompressionMiddleware
+        application.add_middleware(CompressionMiddleware)
+
+    application.add_api_route("/", root, methods=["GET"])
+
+    # Inclusions des routes ; /clients est routé vers la partition du tenant du jeton
+    from app.routes import token
+    from app.security.dependencies import tenant_scope
+    application.include_router(token.router)  # 🔹 Ajout du router /token
+    if settings.ASYNC_MODE:
+        from app.routes import clients_async as clients
+    else:
+        from app.routes import clients
+    application.include_router(clients.router, prefix="/clients", tags=["clients"],
+                               dependencies=[Depends(tenant_scope)])
+    return application
+
+# ``app.main:app`` reste utilisable (uvicorn, tests) : l'application n'est construite
+# qu'au premier accès, importer le module ne charge ni les routes ni la messagerie
+def __getattr__(name):
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
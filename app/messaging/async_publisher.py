@@ -0,0 +1,115 @@
+"""Publisher RabbitMQ asynchrone (aio-pika) utilisé par les routes en ASYNC_MODE."""
+
+import asyncio
+import logging
+
+import aio_pika
+from aio_pika.pool import Pool
+
+from app.config import settings
+from app.messaging.codec import EncodedMessage, encode_event
+from app.db.tenancy import current_tenant
+from app.messaging.publisher import TENANT_HEADER, partition_queues, routing_key as partition_key
+from app.messaging.schemas import (
+    ClientCreatedMessage, ClientUpdatedMessage, ClientDeletedMessage, EVENT_SCHEMAS,
+)
+from app.utils.timing import timed_stage
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRabbitMQPublisher:
+    """Connexion robuste (reconnexion automatique) et pool borné de canaux aio-pika."""
+
+    def __init__(self, url=None, pool_size=None):
+        self.url = url or settings.RABBITMQ_URL
+        self.pool_size = pool_size or settings.RABBITMQ_CHANNEL_POOL_SIZE
+        self._connection = None
+        self._channels = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._lock:
+            if self._connection is None or self._connection.is_closed:
+                await self._connect()
+
+    async def _connect(self):
+        self._connection = await aio_pika.connect_robust(self.url)
+        self._channels = Pool(self._connection.channel, max_size=self.pool_size)
+        async with self._channels.acquire() as channel:
+            exchange = None
+            if settings.RABBITMQ_EXCHANGE:
+                exchange = await channel.declare_exchange(
+                    settings.RABBITMQ_EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True
+                )
+            for name in partition_queues():
+                queue = await channel.declare_queue(name, durable=True)
+                if exchange is not None:
+                    await queue.bind(exchange, routing_key=name)
+        logger.info("[RabbitMQ] Connexion async établie, queues déclarées : %s", ", ".join(partition_queues()))
+
+    async def publish(self, queue: str, message: EncodedMessage):
+        await self.publish_many([(queue, message)])
+
+    async def publish_many(self, messages):
+        """Publie une suite de (queue, message encodé) à la chaîne sur un seul canal, dans la
+        partition du tenant courant."""
+        if self._connection is None:
+            await self.start()
+        tenant = current_tenant()
+        headers = {TENANT_HEADER: tenant} if tenant is not None else None
+        async with self._channels.acquire() as channel:
+            exchange = (
+                await channel.get_exchange(settings.RABBITMQ_EXCHANGE, ensure=False)
+                if settings.RABBITMQ_EXCHANGE else channel.default_exchange
+            )
+            for queue, message in messages:
+                await exchange.publish(
+                    aio_pika.Message(
+                        body=message.body,
+                        content_type=message.content_type,
+                        content_encoding=message.content_encoding,
+                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                        headers=headers,
+                    ),
+                    routing_key=partition_key(queue, tenant),
+                )
+
+    async def close(self):
+        if self._channels is not None:
+            await self._channels.close()
+        if self._connection is not None:
+            await self._connection.close()
+        self._channels = None
+        self._connection = None
+        logger.info("[RabbitMQ] Publisher async fermé")
+
+
+async_publisher = AsyncRabbitMQPublisher()
+
+
+# Publier un client créé
+@timed_stage("broker")
+async def publish_client_created(client_data: dict):
+    validated = ClientCreatedMessage(**client_data)
+    await async_publisher.publish('client_created', encode_event(validated))
+
+# Publier un client mis à jour
+@timed_stage("broker")
+async def publish_client_updated(client_data: dict):
+    validated = ClientUpdatedMessage(**client_data)
+    await async_publisher.publish('client_updated', encode_event(validated))
+
+# Publier un client supprimé
+@timed_stage("broker")
+async def publish_client_deleted(client_id: str):
+    validated = ClientDeletedMessage(_id=client_id)
+    await async_publisher.publish('client_deleted', encode_event(validated))
+
+# Publier une suite d'événements (queue, données) à la chaîne sur un seul canal
+@timed_stage("broker")
+async def publish_events(events):
+    await async_publisher.publish_many([
+        (queue, encode_event(EVENT_SCHEMAS[queue](**payload)))
+        for queue, payload in events
+    ])
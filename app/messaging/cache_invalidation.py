@@ -0,0 +1,104 @@
+"""Invalidation du cache des clients à partir des événements RabbitMQ.
+
+Chaque réplica lie une queue exclusive (supprimée à la déconnexion) à l'exchange
+topic des événements : il reçoit une copie de chaque client_updated /
+client_deleted (de toutes les partitions) sans les retirer des queues des
+consommateurs. L'entrée invalidée est celle du tenant du message.
+"""
+
+import logging
+import threading
+
+import pika
+
+from app.config import settings
+from app.messaging.codec import decode_event
+from app.db.tenancy import tenant_context
+from app.messaging.publisher import CONNECTION_ERRORS, TENANT_HEADER
+from app.services.cache import get_client_cache, invalidate_client
+
+logger = logging.getLogger(__name__)
+
+ROUTING_KEYS = ("client_updated", "client_deleted")
+
+
+# Invalide le client désigné par un message ; les messages illisibles sont ignorés
+def handle_message(body, properties=None) -> bool:
+    try:
+        client_id = decode_event(
+            body, getattr(properties, "content_type", None), getattr(properties, "content_encoding", None)
+        )["_id"]
+    except (ValueError, KeyError, TypeError):
+        logger.warning("[Cache] Message d'invalidation ignoré : %r", body)
+        return False
+    headers = getattr(properties, "headers", None) or {}
+    with tenant_context(headers.get(TENANT_HEADER)):
+        invalidate_client(client_id)
+    return True
+
+
+class CacheInvalidationListener:
+    """Consomme les événements de modification et invalide le cache local."""
+
+    def __init__(self, url=None, poll_interval=1.0, connection_factory=None):
+        self.url = url or settings.RABBITMQ_URL
+        self.poll_interval = poll_interval
+        self._connection_factory = connection_factory or (
+            lambda: pika.BlockingConnection(pika.URLParameters(self.url))
+        )
+
+    def _subscribe(self, channel) -> str:
+        channel.exchange_declare(exchange=settings.RABBITMQ_EXCHANGE, exchange_type="topic", durable=True)
+        result = channel.queue_declare(queue="", exclusive=True, auto_delete=True)
+        queue_name = result.method.queue
+        for routing_key in ROUTING_KEYS:
+            # client_updated.3 avec RABBITMQ_PARTITIONS
+            if settings.RABBITMQ_PARTITIONS:
+                routing_key += ".*"
+            channel.queue_bind(queue=queue_name, exchange=settings.RABBITMQ_EXCHANGE, routing_key=routing_key)
+        return queue_name
+
+    def consume(self, connection, stop_event: threading.Event):
+        """Traite les messages jusqu'à l'arrêt ; le délai d'inactivité permet de voir stop_event."""
+        channel = connection.channel()
+        queue_name = self._subscribe(channel)
+        # Des événements ont pu être manqués pendant la déconnexion
+        get_client_cache().clear()
+        for method, properties, body in channel.consume(
+            queue_name, auto_ack=True, inactivity_timeout=self.poll_interval
+        ):
+            if stop_event.is_set():
+                break
+            if method is not None:
+                handle_message(body, properties)
+        channel.cancel()
+
+    def run_forever(self, stop_event: threading.Event):
+        delay = settings.RABBITMQ_RECONNECT_BACKOFF
+        while not stop_event.is_set():
+            connection = None
+            try:
+                connection = self._connection_factory()
+                delay = settings.RABBITMQ_RECONNECT_BACKOFF
+                self.consume(connection, stop_event)
+            except CONNECTION_ERRORS as exc:
+                logger.warning("[Cache] Écoute des invalidations interrompue : %s", exc)
+                stop_event.wait(delay)
+                delay = min(delay * 2, settings.RABBITMQ_RECONNECT_BACKOFF_MAX)
+            finally:
+                if connection is not None and connection.is_open:
+                    try:
+                        connection.close()
+                    except CONNECTION_ERRORS:
+                        pass
+
+
+def start_listener_thread(listener=None):
+    """Lance l'écoute dans un thread daemon ; retourne (thread, stop_event)."""
+    stop_event = threading.Event()
+    listener = listener or CacheInvalidationListener()
+    thread = threading.Thread(
+        target=listener.run_forever, args=(stop_event,), name="cache-invalidation", daemon=True
+    )
+    thread.start()
+    return thread, stop_event
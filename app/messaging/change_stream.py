@@ -0,0 +1,355 @@
+"""Événements clients tirés du change stream MongoDB, publiés par lots et diffusés en SSE.
+
+Avec ``EVENTS_MODE=changestream``, les routes ne publient plus : le tailer suit
+``clients_collection`` — écritures de l'API comme celles des scripts — et convertit
+chaque changement en message ``client_*`` (mêmes schémas que la publication
+directe). Le jeton de reprise est enregistré après chaque lot publié : après un
+arrêt, le flux reprend au dernier lot confirmé (livraison at-least-once).
+
+En mode tenant (``TENANT_CLAIM``), le tailer suit toutes les partitions de
+``MONGO_URI`` (flux du cluster ou de la base selon ``TENANT_STORAGE``) et publie
+chaque événement dans le contexte de son tenant (partition RabbitMQ, en-tête
+``x-tenant``). Les tenants placés sur un autre cluster (``TENANT_MONGO_URIS``) ne
+sont pas suivis : cette combinaison est refusée au démarrage.
+
+Le même flux alimente ``GET /clients/changes`` (server-sent events) pour les
+consommateurs internes. Les change streams nécessitent un replica set.
+
+Worker séparé : ``python -m app.messaging.change_stream``.
+"""
+
+import asyncio
+import json
+import logging
+import signal
+import threading
+from collections import deque
+from itertools import groupby
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from prometheus_client import Counter, Gauge
+from pydantic import ValidationError
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.db.mongo import change_tokens_collection, clients_collection, get_client, get_db
+from app.db.tenancy import partitions_match, tenant_context, tenant_of_namespace
+from app.messaging.publisher import CONNECTION_ERRORS
+from app.messaging.schemas import EVENT_SCHEMAS
+from app.models.client import client_document
+from app.utils.helpers import json_default
+
+logger = logging.getLogger(__name__)
+
+CHANGE_EVENTS = Counter(
+    "change_stream_events_total", "Changements lus sur le change stream des clients", ["operation", "result"]
+)
+CHANGE_LAG = Gauge("change_stream_lag_seconds", "Retard du dernier changement traité sur l'écriture en base",
+                   multiprocess_mode="livemax")
+
+# Type d'opération du change stream → queue de l'événement
+QUEUES = {
+    "insert": "client_created",
+    "update": "client_updated",
+    "replace": "client_updated",
+    "delete": "client_deleted",
+}
+
+# Jeton de reprise inutilisable (historique de l'oplog dépassé, flux invalidé)
+_LOST_HISTORY_CODES = {260, 280, 286}
+
+
+class ChangeEvent(NamedTuple):
+    """Événement issu d'un changement ; ``id`` est son jeton de reprise (identifiant SSE)."""
+
+    id: str
+    queue: str
+    payload: dict
+    tenant: Optional[str] = None
+
+
+# Convertit un changement en (queue, données) ; None s'il ne donne pas d'événement
+def to_event(change: dict) -> Optional[tuple]:
+    queue = QUEUES.get(change.get("operationType"))
+    if queue is None:
+        return None
+    if queue == "client_deleted":
+        return queue, {"_id": str(change["documentKey"]["_id"])}
+    document = change.get("fullDocument")
+    if document is None:  # supprimé avant que le document complet ne soit relu
+        return None
+    return queue, client_document(document)
+
+
+# Publication des événements d'un lot sur RabbitMQ (publisher partagé du processus), par
+# suite d'événements d'un même tenant pour garder leur ordre
+def publish_to_broker(events: List[ChangeEvent]):
+    from app.messaging.rabbitmq import publish_events  # pylint: disable=import-outside-toplevel
+    for tenant, group in groupby(events, key=lambda event: event.tenant):
+        with tenant_context(tenant):
+            publish_events([(event.queue, event.payload) for event in group])
+
+
+class ResumeTokenStore:
+    """Jeton de reprise du tailer, enregistré dans MongoDB."""
+
+    def __init__(self, collection=None, name: str = "clients"):
+        self.collection = collection if collection is not None else change_tokens_collection
+        self.name = name
+
+    def load(self) -> Optional[dict]:
+        document = self.collection.find_one({"_id": self.name})
+        return document["token"] if document else None
+
+    def save(self, token: dict):
+        self.collection.update_one(
+            {"_id": self.name}, {"$set": {"token": token, "updated_at": datetime.utcnow()}}, upsert=True
+        )
+
+    def clear(self):
+        self.collection.delete_one({"_id": self.name})
+
+
+class MemoryTokenStore:
+    """Jeton gardé en mémoire : reprise après une coupure, pas après un redémarrage."""
+
+    def __init__(self):
+        self.token = None
+
+    def load(self) -> Optional[dict]:
+        return self.token
+
+    def save(self, token: dict):
+        self.token = token
+
+    def clear(self):
+        self.token = None
+
+
+class ChangeStreamTailer:
+    """Suit le change stream de la collection et transmet les événements par lots aux ``sinks``.
+
+    Un lot regroupe les changements disponibles (au plus ``batch_size``), la
+    lecture attendant au plus ``max_await_ms`` qu'il en arrive. Le jeton de
+    reprise n'est enregistré qu'une fois le lot transmis : une erreur de
+    publication fait relire le lot depuis le dernier jeton.
+    """
+
+    def __init__(self, collection=None, token_store=None, sinks: Optional[List[Callable]] = None,
+                 batch_size=None, max_await_ms=None, retry_backoff=None):
+        self.collection = collection if collection is not None else clients_collection
+        # Clients partitionnés par tenant : le flux suit toutes les partitions
+        self.partitioned = collection is None and bool(settings.TENANT_CLAIM)
+        if token_store is None:
+            token_store = ResumeTokenStore(name="clients:partitions" if self.partitioned else "clients")
+        self.token_store = token_store
+        self.sinks = list(sinks) if sinks is not None else [publish_to_broker]
+        self.batch_size = batch_size or settings.CHANGE_STREAM_BATCH_SIZE
+        self.max_await_ms = max_await_ms or settings.CHANGE_STREAM_MAX_AWAIT_MS
+        self.retry_backoff = settings.CHANGE_STREAM_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+
+    def watch(self):
+        options = {
+            "full_document": "updateLookup",
+            "resume_after": self.token_store.load(),
+            "max_await_time_ms": self.max_await_ms,
+        }
+        if self.partitioned:
+            # Une base par tenant : flux du cluster ; une collection par tenant : flux de la base
+            source = get_client() if settings.TENANT_STORAGE == "database" else get_db()
+            return source.watch([{"$match": partitions_match("clients")}], **options)
+        return self.collection.watch(**options)
+
+    def read_batch(self, stream) -> list:
+        changes = []
+        while len(changes) < self.batch_size:
+            change = stream.try_next()
+            if change is None:
+                break
+            changes.append(change)
+        return changes
+
+    def build_events(self, changes: list) -> List[ChangeEvent]:
+        events = []
+        for change in changes:
+            operation = change.get("operationType", "unknown")
+            event = to_event(change)
+            if event is None:
+                CHANGE_EVENTS.labels(operation, "skipped").inc()
+                continue
+            queue, payload = event
+            try:
+                EVENT_SCHEMAS[queue](**payload)
+            except ValidationError as exc:
+                # Document écrit hors de l'API et non conforme : il ne bloque pas le flux
+                logger.warning("[ChangeStream] Changement %s ignoré : %s", payload.get("_id"), exc)
+                CHANGE_EVENTS.labels(operation, "invalid").inc()
+                continue
+            tenant = tenant_of_namespace(change.get("ns", {}), "clients") if self.partitioned else None
+            events.append(ChangeEvent(change["_id"]["_data"], queue, payload, tenant))
+            CHANGE_EVENTS.labels(operation, "published").inc()
+        return events
+
+    def process(self, changes: list, resume_token: dict) -> int:
+        """Transmet les événements d'un lot puis enregistre le jeton de reprise."""
+        events = self.build_events(changes)
+        if events:
+            for sink in self.sinks:
+                sink(events)
+        self.token_store.save(resume_token)
+        cluster_time = changes[-1].get("clusterTime")
+        if cluster_time is not None:
+            CHANGE_LAG.set(max((datetime.now(timezone.utc) - cluster_time.as_datetime()).total_seconds(), 0))
+        if any(change.get("operationType") == "invalidate" for change in changes):
+            # Collection supprimée ou renommée : le flux repart de l'instant présent
+            logger.warning("[ChangeStream] Flux invalidé, reprise depuis maintenant")
+            self.token_store.clear()
+        return len(events)
+
+    def run_once(self, stream) -> int:
+        changes = self.read_batch(stream)
+        if not changes:
+            return 0
+        return self.process(changes, stream.resume_token)
+
+    def run_forever(self, stop_event: threading.Event):
+        """Suit le flux jusqu'à ce que ``stop_event`` soit levé, en le rouvrant après une erreur."""
+        logger.info("[ChangeStream] Tailer démarré (lots de %s)", self.batch_size)
+        while not stop_event.is_set():
+            try:
+                with self.watch() as stream:
+                    while not stop_event.is_set() and stream.alive:
+                        self.run_once(stream)
+            except OperationFailure as exc:
+                if exc.code in _LOST_HISTORY_CODES:
+                    logger.error("[ChangeStream] Jeton de reprise inutilisable, reprise depuis maintenant : %s", exc)
+                    self.token_store.clear()
+                else:
+                    logger.warning("[ChangeStream] Flux interrompu : %s", exc)
+                    stop_event.wait(self.retry_backoff)
+            except (PyMongoError, *CONNECTION_ERRORS) as exc:
+                logger.warning("[ChangeStream] Flux interrompu, reprise depuis le dernier lot : %s", exc)
+                stop_event.wait(self.retry_backoff)
+        logger.info("[ChangeStream] Tailer arrêté")
+
+
+class ChangeFeed:
+    """Diffuse les événements aux abonnés SSE : une file asyncio bornée par connexion.
+
+    Les derniers événements sont gardés pour qu'un abonné qui se reconnecte avec
+    ``Last-Event-ID`` reçoive ceux qu'il a manqués. Un abonné trop lent (file
+    pleine) est déconnecté plutôt que de retenir le flux.
+    """
+
+    def __init__(self, history=None, queue_size=None):
+        self.queue_size = queue_size or settings.CHANGE_FEED_QUEUE_SIZE
+        self._history = deque(maxlen=history or settings.CHANGE_FEED_HISTORY)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._source = None
+
+    def attach(self):
+        """Le flux est alimenté par un tailer existant (pas de change stream dédié)."""
+        self._source = (None, None)
+
+    def _ensure_source(self):
+        if self._source is None:
+            tailer = ChangeStreamTailer(token_store=MemoryTokenStore(), sinks=[self.publish])
+            stop_event = threading.Event()
+            thread = threading.Thread(target=tailer.run_forever, args=(stop_event,), name="change-feed", daemon=True)
+            thread.start()
+            self._source = (thread, stop_event)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._ensure_source()
+            ids = [event.id for event in self._history]
+            if last_event_id in ids:
+                for event in list(self._history)[ids.index(last_event_id) + 1:][-self.queue_size:]:
+                    queue.put_nowait(event)
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, events: List[ChangeEvent]):
+        """Appelé depuis le thread du tailer : remet les événements à chaque boucle abonnée."""
+        with self._lock:
+            self._history.extend(events)
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, events)
+            except RuntimeError:  # boucle fermée
+                self.unsubscribe(queue)
+
+    def _offer(self, queue: asyncio.Queue, events: List[ChangeEvent]):
+        for event in events:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)  # fin du flux : le client se reconnecte avec Last-Event-ID
+                return
+
+    def stop(self):
+        if self._source is not None and self._source[0] is not None:
+            thread, stop_event = self._source
+            stop_event.set()
+            thread.join(timeout=settings.CHANGE_STREAM_MAX_AWAIT_MS / 1000 + 5)
+        self._source = None
+
+
+change_feed = ChangeFeed()
+
+
+# Message SSE d'un événement
+def format_sse(event: ChangeEvent) -> str:
+    data = json.dumps(event.payload, ensure_ascii=False, default=json_default, separators=(",", ":"))
+    return f"id: {event.id}\nevent: {event.queue}\ndata: {data}\n\n"
+
+
+async def stream_changes(feed: ChangeFeed, last_event_id: Optional[str] = None, heartbeat=None):
+    """Flux SSE d'un abonné ; un commentaire est envoyé sans événement pendant ``heartbeat`` secondes."""
+    heartbeat = heartbeat or settings.CHANGE_FEED_HEARTBEAT
+    queue = feed.subscribe(last_event_id)
+    try:
+        yield ": flux des changements clients\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield format_sse(event)
+    finally:
+        feed.unsubscribe(queue)
+
+
+def start_tailer_thread(tailer=None):
+    """Lance le tailer dans un thread daemon ; retourne (thread, stop_event)."""
+    stop_event = threading.Event()
+    tailer = tailer or ChangeStreamTailer()
+    thread = threading.Thread(target=tailer.run_forever, args=(stop_event,), name="change-stream", daemon=True)
+    thread.start()
+    return thread, stop_event
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    ChangeStreamTailer().run_forever(stop_event)
+
+
+if __name__ == "__main__":
+    main()
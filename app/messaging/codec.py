@@ -0,0 +1,99 @@
+"""Encodage des messages d'événements : JSON (défaut) ou msgpack, compressés au-delà d'un seuil.
+
+Le codec est annoncé par la propriété AMQP ``content_type`` et la compression par
+``content_encoding`` : les consommateurs décodent chaque message d'après ces
+propriétés, quel que soit le codec choisi par le producteur (``EVENT_CODEC``).
+Un message sans ``content_type`` est lu comme du JSON (messages antérieurs).
+"""
+
+import json
+import zlib
+from typing import NamedTuple, Optional
+
+from pydantic import BaseModel
+
+from app.config import settings
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+DEFLATE = "deflate"
+
+
+class EncodedMessage(NamedTuple):
+    body: bytes
+    content_type: str
+    content_encoding: Optional[str] = None
+
+
+class JsonCodec:
+    content_type = JSON
+
+    def encode(self, message: BaseModel) -> bytes:
+        return message.model_dump_json(by_alias=True).encode()
+
+    def decode(self, body: bytes):
+        return json.loads(body)
+
+
+class MsgpackCodec:
+    content_type = MSGPACK
+
+    def __init__(self):
+        try:
+            import msgpack  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("EVENT_CODEC=msgpack nécessite le paquet 'msgpack'") from exc
+        self._msgpack = msgpack
+
+    def encode(self, message: BaseModel) -> bytes:
+        return self._msgpack.packb(message.model_dump(mode="json", by_alias=True))
+
+    def decode(self, body: bytes):
+        try:
+            return self._msgpack.unpackb(body)
+        except (self._msgpack.ExtraData, self._msgpack.FormatError, self._msgpack.StackError) as exc:
+            raise ValueError(str(exc)) from exc
+
+
+CODECS = {"json": JsonCodec, "msgpack": MsgpackCodec}
+_BY_CONTENT_TYPE = {JSON: "json", MSGPACK: "msgpack"}
+_instances = {}
+
+
+def get_codec(name: Optional[str] = None):
+    name = name or settings.EVENT_CODEC
+    if name not in _instances:
+        if name not in CODECS:
+            raise ValueError(f"Codec inconnu : {name}")
+        _instances[name] = CODECS[name]()
+    return _instances[name]
+
+
+def encode_event(message: BaseModel, codec: Optional[str] = None, compress_min_size: Optional[int] = None,
+                 ) -> EncodedMessage:
+    """Encode un message validé ; compressé (zlib) si son corps atteint ``compress_min_size`` octets."""
+    encoder = get_codec(codec)
+    body = encoder.encode(message)
+    threshold = settings.EVENT_COMPRESSION_MIN_SIZE if compress_min_size is None else compress_min_size
+    if threshold and len(body) >= threshold:
+        return EncodedMessage(zlib.compress(body, settings.EVENT_COMPRESSION_LEVEL), encoder.content_type, DEFLATE)
+    return EncodedMessage(body, encoder.content_type)
+
+
+def decode_event(body: bytes, content_type: Optional[str] = None, content_encoding: Optional[str] = None):
+    """Décode un message d'après ses propriétés AMQP ; ValueError s'il est illisible."""
+    if content_encoding == DEFLATE:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as exc:
+            raise ValueError(f"Compression invalide : {exc}") from exc
+    elif content_encoding:
+        raise ValueError(f"Encodage non supporté : {content_encoding}")
+    name = _BY_CONTENT_TYPE.get((content_type or JSON).split(";")[0].strip())
+    if name is None:
+        raise ValueError(f"Codec non supporté : {content_type}")
+    try:
+        codec = get_codec(name)
+    except RuntimeError as exc:  # codec optionnel absent de ce consommateur
+        raise ValueError(str(exc)) from exc
+    return codec.decode(body)
@@ -0,0 +1,331 @@
+"""Consommateur RabbitMQ par lots pour les queues client_*.
+
+Chaque queue a son canal (prefetch ``CONSUMER_PREFETCH``). Les messages sont
+remis au handler par lots de ``CONSUMER_BATCH_SIZE`` ou après
+``CONSUMER_BATCH_TIMEOUT_MS``, exécutés dans un pool de threads, puis acquittés
+en une fois (ack multiple). Un lot en échec est rejoué message par message pour
+isoler les messages empoisonnés : ceux-ci sont republiés avec un compteur de
+tentatives, puis déplacés dans ``<queue>.dead`` au-delà de ``CONSUMER_MAX_RETRIES``.
+
+Avec ``RABBITMQ_PARTITIONS``, chaque worker ne consomme que ses partitions
+(``CONSUMER_PARTITIONS``) : les workers se répartissent les tenants. Le handler
+est appelé dans le contexte du tenant des messages (en-tête ``x-tenant``), par
+groupes de messages consécutifs d'un même tenant.
+
+Livraison at-least-once : les handlers doivent être idempotents. Worker séparé :
+``python -m app.messaging.consumer``.
+"""
+
+import logging
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import groupby
+from typing import Callable, Dict, List, Optional
+
+import pika
+from prometheus_client import Counter, Histogram
+
+from app.config import settings
+from app.db.tenancy import tenant_context
+from app.messaging.codec import decode_event
+from app.messaging.publisher import CONNECTION_ERRORS, TENANT_HEADER, declare_topology, partition_queues
+
+logger = logging.getLogger(__name__)
+
+RETRY_HEADER = "x-retry-count"
+ERROR_HEADER = "x-last-error"
+
+CONSUMER_MESSAGES = Counter(
+    "consumer_messages_total", "Messages traités par le consommateur", ["queue", "result"]
+)
+CONSUMER_BATCH_DURATION = Histogram(
+    "consumer_batch_duration_seconds", "Durée de traitement d'un lot par le handler", ["queue"]
+)
+
+
+# Queue des messages abandonnés après trop de tentatives
+def dead_letter_queue(queue: str) -> str:
+    return f"{queue}.dead"
+
+
+# Queues consommées par ce worker : ses partitions (CONSUMER_PARTITIONS) ou toutes
+def consumed_queues() -> List[str]:
+    partitions = [int(item) for item in settings.CONSUMER_PARTITIONS.split(",") if item.strip()]
+    return partition_queues(partitions or None)
+
+
+class AckTracker:
+    """Tags de livraison d'un canal en attente d'acquittement.
+
+    Les lots se terminent dans le désordre (pool de threads) : l'ack multiple ne
+    couvre que les tags dont tous les précédents sont réglés.
+    """
+
+    def __init__(self):
+        self._pending = deque()
+        self._settled = set()
+
+    def delivered(self, tag: int):
+        self._pending.append(tag)
+
+    def settle(self, tags) -> Optional[int]:
+        """Marque des tags comme réglés ; retourne le tag à acquitter (multiple=True) ou None."""
+        self._settled.update(tags)
+        last = None
+        while self._pending and self._pending[0] in self._settled:
+            last = self._pending.popleft()
+            self._settled.discard(last)
+        return last
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class Delivery:
+    __slots__ = ("tag", "properties", "body", "error", "fatal")
+
+    def __init__(self, tag, properties, body):
+        self.tag = tag
+        self.properties = properties
+        self.body = body
+        self.error = None
+        self.fatal = False
+
+    @property
+    def retries(self) -> int:
+        headers = getattr(self.properties, "headers", None) or {}
+        return int(headers.get(RETRY_HEADER, 0))
+
+    @property
+    def tenant(self) -> Optional[str]:
+        headers = getattr(self.properties, "headers", None) or {}
+        return headers.get(TENANT_HEADER)
+
+
+class _QueueState:
+    def __init__(self, queue: str, channel):
+        self.queue = queue
+        self.channel = channel
+        self.tracker = AckTracker()
+        self.buffer: List[Delivery] = []
+        self.deadline = None
+        self.consumer_tag = None
+
+
+def _describe(queue: str, exc: Exception) -> str:
+    logger.warning("[Consumer] Échec du handler de '%s' : %r", queue, exc)
+    return f"{type(exc).__name__}: {exc}"
+
+
+# Handler par défaut : journalise la taille du lot
+def log_batch(queue: str):
+    def handler(messages: List[dict]):
+        logger.info("[Consumer] %s message(s) reçu(s) de '%s'", len(messages), queue)
+    return handler
+
+
+class BatchConsumer:
+    """Consomme plusieurs queues sur une connexion, handlers appelés par lots.
+
+    ``handlers`` associe chaque queue à une fonction ``handler(messages: List[dict])`` ;
+    une exception fait échouer le lot. La connexion pika n'est manipulée que par
+    le thread qui exécute ``run`` : les workers lui renvoient leurs résultats via
+    ``add_callback_threadsafe``.
+    """
+
+    def __init__(self, handlers: Optional[Dict[str, Callable]] = None, prefetch=None, batch_size=None,
+                 batch_timeout_ms=None, workers=None, max_retries=None, drain_timeout=None,
+                 connection_factory=None):
+        self.handlers = handlers or {queue: log_batch(queue) for queue in consumed_queues()}
+        self.prefetch = prefetch or settings.CONSUMER_PREFETCH
+        self.batch_size = batch_size or settings.CONSUMER_BATCH_SIZE
+        timeout_ms = settings.CONSUMER_BATCH_TIMEOUT_MS if batch_timeout_ms is None else batch_timeout_ms
+        self.batch_timeout = timeout_ms / 1000
+        self.workers = workers or settings.CONSUMER_WORKERS
+        self.max_retries = settings.CONSUMER_MAX_RETRIES if max_retries is None else max_retries
+        self.drain_timeout = settings.CONSUMER_DRAIN_TIMEOUT if drain_timeout is None else drain_timeout
+        self._connection_factory = connection_factory or (
+            lambda: pika.BlockingConnection(pika.URLParameters(settings.RABBITMQ_URL))
+        )
+        self._connection = None
+        self._executor = None
+        self._states: Dict[str, _QueueState] = {}
+        self._in_flight = 0
+
+    # -- Connexion (thread de run) ------------------------------------------------
+
+    def _setup(self):
+        self._connection = self._connection_factory()
+        channel = self._connection.channel()
+        declare_topology(channel)
+        for queue in self.handlers:
+            channel.queue_declare(queue=dead_letter_queue(queue), durable=True)
+        channel.close()
+        self._states = {}
+        self._in_flight = 0
+        for queue in self.handlers:
+            channel = self._connection.channel()
+            channel.basic_qos(prefetch_count=self.prefetch)
+            state = _QueueState(queue, channel)
+            state.consumer_tag = channel.basic_consume(
+                queue=queue, on_message_callback=partial(self._on_message, state)
+            )
+            self._states[queue] = state
+        logger.info("[Consumer] En écoute sur %s", ", ".join(self.handlers))
+
+    def _on_message(self, state: _QueueState, _channel, method, properties, body):
+        state.tracker.delivered(method.delivery_tag)
+        state.buffer.append(Delivery(method.delivery_tag, properties, body))
+        if state.deadline is None:
+            state.deadline = time.monotonic() + self.batch_timeout
+        if len(state.buffer) >= self.batch_size:
+            self._flush(state)
+
+    def _flush(self, state: _QueueState):
+        batch, state.buffer, state.deadline = state.buffer, [], None
+        self._in_flight += 1
+        self._executor.submit(self._run_batch, state, batch, self._connection)
+
+    def _flush_due(self, force=False):
+        now = time.monotonic()
+        for state in self._states.values():
+            if state.buffer and (force or state.deadline <= now):
+                self._flush(state)
+
+    def _settle(self, state: _QueueState, batch: List[Delivery]):
+        """Republie ou écarte les messages en échec puis acquitte le lot (thread de run)."""
+        self._in_flight -= 1
+        if not state.channel.is_open:
+            return  # canal perdu : le broker relivrera les messages non acquittés
+        for delivery in batch:
+            if delivery.error is None:
+                CONSUMER_MESSAGES.labels(state.queue, "ok").inc()
+                continue
+            retries = delivery.retries + 1
+            dead = delivery.fatal or retries > self.max_retries
+            # Exchange par défaut : seule cette queue reçoit la copie (pas les abonnés du topic)
+            state.channel.basic_publish(
+                exchange="",
+                routing_key=dead_letter_queue(state.queue) if dead else state.queue,
+                body=delivery.body,
+                properties=pika.BasicProperties(
+                    delivery_mode=2,
+                    message_id=getattr(delivery.properties, "message_id", None),
+                    content_type=getattr(delivery.properties, "content_type", None),
+                    content_encoding=getattr(delivery.properties, "content_encoding", None),
+                    headers={
+                        RETRY_HEADER: retries, ERROR_HEADER: delivery.error[:500],
+                        **({TENANT_HEADER: delivery.tenant} if delivery.tenant else {}),
+                    },
+                ),
+            )
+            CONSUMER_MESSAGES.labels(state.queue, "dead" if dead else "retried").inc()
+        last = state.tracker.settle(delivery.tag for delivery in batch)
+        if last is not None:
+            state.channel.basic_ack(delivery_tag=last, multiple=True)
+
+    # -- Workers --------------------------------------------------------------------
+
+    def _run_batch(self, state: _QueueState, batch: List[Delivery], connection):
+        try:
+            self.process(state.queue, batch)
+        finally:
+            try:
+                connection.add_callback_threadsafe(partial(self._settle, state, batch))
+            except CONNECTION_ERRORS:
+                pass
+
+    def process(self, queue: str, batch: List[Delivery]):
+        """Appelle le handler sur le lot, par tenant ; en cas d'échec, message par message."""
+        decoded = []
+        for delivery in batch:
+            try:
+                decoded.append((delivery, decode_event(
+                    delivery.body,
+                    getattr(delivery.properties, "content_type", None),
+                    getattr(delivery.properties, "content_encoding", None),
+                )))
+            except ValueError as exc:
+                delivery.error, delivery.fatal = f"Message illisible : {exc}", True
+        if not decoded:
+            return
+        start = time.perf_counter()
+        for tenant, group in groupby(decoded, key=lambda item: item[0].tenant):
+            with tenant_context(tenant):
+                self._handle(queue, list(group))
+        CONSUMER_BATCH_DURATION.labels(queue).observe(time.perf_counter() - start)
+
+    def _handle(self, queue: str, decoded: list):
+        handler = self.handlers[queue]
+        try:
+            handler([message for _, message in decoded])
+        except Exception as exc:  # pylint: disable=broad-except
+            if len(decoded) == 1:
+                decoded[0][0].error = _describe(queue, exc)
+            else:
+                for delivery, message in decoded:
+                    try:
+                        handler([message])
+                    except Exception as single_exc:  # pylint: disable=broad-except
+                        delivery.error = _describe(queue, single_exc)
+
+    # -- Boucle principale ------------------------------------------------------------
+
+    def _drain(self):
+        """Arrêt propre : plus de nouvelles livraisons, lots en cours terminés et acquittés."""
+        for state in self._states.values():
+            state.channel.basic_cancel(state.consumer_tag)
+        self._flush_due(force=True)
+        deadline = time.monotonic() + self.drain_timeout
+        while self._in_flight and time.monotonic() < deadline:
+            self._connection.process_data_events(time_limit=0.05)
+        if self._in_flight:
+            logger.warning("[Consumer] %s lot(s) non terminé(s) à l'arrêt : ils seront relivrés", self._in_flight)
+
+    def _close(self):
+        if self._connection is not None and self._connection.is_open:
+            try:
+                self._connection.close()
+            except CONNECTION_ERRORS:
+                pass
+        self._connection = None
+
+    def run(self, stop_event: threading.Event):
+        """Consomme jusqu'à ``stop_event`` en se reconnectant si le broker tombe."""
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="consumer")
+        delay = settings.RABBITMQ_RECONNECT_BACKOFF
+        try:
+            while not stop_event.is_set():
+                try:
+                    self._setup()
+                    delay = settings.RABBITMQ_RECONNECT_BACKOFF
+                    while not stop_event.is_set():
+                        # Délai borné : stop_event et les échéances de lots sont vérifiés souvent
+                        self._connection.process_data_events(time_limit=min(self.batch_timeout, 0.1))
+                        self._flush_due()
+                    self._drain()
+                except CONNECTION_ERRORS as exc:
+                    logger.warning("[Consumer] Connexion perdue : %s", exc)
+                    stop_event.wait(delay)
+                    delay = min(delay * 2, settings.RABBITMQ_RECONNECT_BACKOFF_MAX)
+                finally:
+                    self._close()
+        finally:
+            self._executor.shutdown(wait=True)
+        logger.info("[Consumer] Arrêté")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    BatchConsumer().run(stop_event)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Transactional outbox : les événements clients sont écrits en base puis relayés vers RabbitMQ.
+
+Le dispatcher peut tourner dans le processus de l'API (thread lancé par le
+lifespan) ou comme worker séparé : ``python -m app.messaging.outbox``.
+"""
+
+import logging
+import signal
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pika
+from pika.exceptions import NackError, UnroutableError
+from prometheus_client import Counter, Gauge
+from pymongo import ASCENDING
+
+from app.config import settings
+from app.db.mongo import outbox_collection
+from app.messaging.codec import JSON, encode_event
+from app.db.tenancy import current_tenant
+from app.messaging.publisher import CONNECTION_ERRORS, TENANT_HEADER, declare_topology, routing_key
+from app.messaging.schemas import EVENT_SCHEMAS
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+SENT = "sent"
+DEAD = "dead"
+
+OUTBOX_BACKLOG = Gauge("outbox_backlog", "Événements en attente de publication dans l'outbox",
+                       multiprocess_mode="livemax")
+OUTBOX_LAG = Gauge("outbox_lag_seconds", "Âge du plus ancien événement non publié",
+                   multiprocess_mode="livemax")
+OUTBOX_EVENTS = Counter("outbox_events_total", "Événements traités par le dispatcher", ["queue", "result"])
+
+
+# Construit le document outbox d'un événement (message validé par son schéma, encodé
+# avec le codec configuré au moment de l'écriture, routé vers la partition du tenant courant)
+def build_event(queue: str, payload: dict) -> dict:
+    now = datetime.utcnow()
+    message = encode_event(EVENT_SCHEMAS[queue](**payload))
+    tenant = current_tenant()
+    return {
+        "queue": queue,
+        "routing_key": routing_key(queue, tenant),
+        "tenant": tenant,
+        "body": message.body,
+        "content_type": message.content_type,
+        "content_encoding": message.content_encoding,
+        "status": PENDING,
+        "attempts": 0,
+        "created_at": now,
+        "available_at": now,
+    }
+
+# Enregistre un événement dans l'outbox (dans la même session que l'écriture client)
+def enqueue_event(queue: str, payload: dict, session=None, collection=None):
+    document = build_event(queue, payload)
+    (collection if collection is not None else outbox_collection).insert_one(document, session=session)
+    return document
+
+# Enregistre plusieurs événements en une écriture (opérations groupées)
+def enqueue_events(events, session=None, collection=None):
+    documents = [build_event(queue, payload) for queue, payload in events]
+    if documents:
+        (collection if collection is not None else outbox_collection).insert_many(documents, session=session)
+    return documents
+
+
+class OutboxDispatcher:
+    """Relaie les événements de l'outbox vers RabbitMQ par lots, avec confirmations.
+
+    Livraison at-least-once : un événement n'est marqué envoyé qu'après la
+    confirmation du broker, et un lot réservé par un dispatcher arrêté en cours
+    de route redevient disponible à l'expiration de son bail. Le ``message_id``
+    AMQP reprend l'identifiant de l'événement pour la déduplication côté consommateur.
+    """
+
+    def __init__(self, collection=None, connection_factory=None, batch_size=None,
+                 max_attempts=None, retry_backoff=None, lease_seconds=None):
+        self.collection = collection if collection is not None else outbox_collection
+        self._connection_factory = connection_factory or self._default_connection_factory
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        self.retry_backoff = settings.OUTBOX_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.lease_seconds = lease_seconds or settings.OUTBOX_LEASE_SECONDS
+        self._connection = None
+        self._channel = None
+
+    @staticmethod
+    def _default_connection_factory():
+        return pika.BlockingConnection(pika.URLParameters(settings.RABBITMQ_URL))
+
+    def ensure_indexes(self):
+        self.collection.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+        self.collection.create_index("claim_id")
+        self.collection.create_index("sent_at", expireAfterSeconds=settings.OUTBOX_RETENTION_SECONDS)
+
+    def _get_channel(self):
+        if self._channel is not None and self._channel.is_open:
+            return self._channel
+        self.close()
+        self._connection = self._connection_factory()
+        channel = self._connection.channel()
+        declare_topology(channel)
+        channel.confirm_delivery()
+        self._channel = channel
+        return channel
+
+    def close(self):
+        for resource in (self._channel, self._connection):
+            try:
+                if resource is not None and resource.is_open:
+                    resource.close()
+            except CONNECTION_ERRORS:
+                pass
+        self._channel = None
+        self._connection = None
+
+    def claim_batch(self) -> list:
+        """Réserve un lot d'événements disponibles (ou dont le bail a expiré)."""
+        now = datetime.utcnow()
+        claimable = {"$or": [
+            {"status": PENDING, "available_at": {"$lte": now}},
+            {"status": IN_FLIGHT, "lease_until": {"$lte": now}},
+        ]}
+        ids = [doc["_id"] for doc in self.collection.find(
+            claimable, {"_id": 1}, sort=[("_id", ASCENDING)], limit=self.batch_size
+        )]
+        if not ids:
+            return []
+        claim_id = uuid.uuid4().hex
+        self.collection.update_many(
+            {"$and": [{"_id": {"$in": ids}}, claimable]},
+            {"$set": {
+                "status": IN_FLIGHT,
+                "claim_id": claim_id,
+                "lease_until": now + timedelta(seconds=self.lease_seconds),
+            }},
+        )
+        return list(self.collection.find({"claim_id": claim_id}, sort=[("_id", ASCENDING)]))
+
+    def _publish(self, channel, event):
+        channel.basic_publish(
+            exchange=settings.RABBITMQ_EXCHANGE,
+            routing_key=event.get("routing_key", event["queue"]),
+            body=event["body"],
+            properties=pika.BasicProperties(
+                delivery_mode=2,
+                content_type=event.get("content_type", JSON),
+                content_encoding=event.get("content_encoding"),
+                message_id=str(event["_id"]),
+                headers={TENANT_HEADER: event["tenant"]} if event.get("tenant") else None,
+            ),
+            mandatory=True,
+        )
+
+    def _retry(self, event, error):
+        attempts = event.get("attempts", 0) + 1
+        if attempts >= self.max_attempts:
+            update = {"status": DEAD}
+            OUTBOX_EVENTS.labels(event["queue"], "dead").inc()
+            logger.error("[Outbox] Événement %s abandonné après %s tentatives : %s", event["_id"], attempts, error)
+        else:
+            delay = self.retry_backoff * (2 ** (attempts - 1))
+            update = {"status": PENDING, "available_at": datetime.utcnow() + timedelta(seconds=delay)}
+            OUTBOX_EVENTS.labels(event["queue"], "retried").inc()
+        update.update({"attempts": attempts, "last_error": str(error), "claim_id": None})
+        self.collection.update_one({"_id": event["_id"]}, {"$set": update})
+
+    def dispatch_once(self) -> int:
+        """Publie un lot ; retourne le nombre d'événements confirmés par le broker."""
+        batch = self.claim_batch()
+        if not batch:
+            return 0
+        sent = []
+        remaining = list(batch)
+        try:
+            channel = self._get_channel()
+            while remaining:
+                event = remaining[0]
+                try:
+                    self._publish(channel, event)
+                except (NackError, UnroutableError) as exc:
+                    self._retry(event, exc)
+                else:
+                    sent.append(event["_id"])
+                    OUTBOX_EVENTS.labels(event["queue"], "published").inc()
+                remaining.pop(0)
+        except CONNECTION_ERRORS as exc:
+            logger.warning("[Outbox] Connexion RabbitMQ perdue : %s", exc)
+            self.close()
+            for event in remaining:
+                self._retry(event, exc)
+        finally:
+            if sent:
+                self.collection.update_many(
+                    {"_id": {"$in": sent}},
+                    {"$set": {"status": SENT, "sent_at": datetime.utcnow(), "claim_id": None}},
+                )
+        return len(sent)
+
+    def refresh_metrics(self):
+        backlog = self.collection.count_documents({"status": {"$in": [PENDING, IN_FLIGHT]}})
+        OUTBOX_BACKLOG.set(backlog)
+        oldest = self.collection.find_one(
+            {"status": {"$in": [PENDING, IN_FLIGHT]}}, sort=[("_id", ASCENDING)]
+        )
+        lag = (datetime.utcnow() - oldest["created_at"]).total_seconds() if oldest else 0
+        OUTBOX_LAG.set(max(lag, 0))
+        return backlog, lag
+
+    def run_forever(self, stop_event: threading.Event, poll_interval=None):
+        """Vide l'outbox en continu jusqu'à ce que ``stop_event`` soit levé."""
+        poll_interval = settings.OUTBOX_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.ensure_indexes()
+        logger.info("[Outbox] Dispatcher démarré (lots de %s)", self.batch_size)
+        while not stop_event.is_set():
+            try:
+                dispatched = self.dispatch_once()
+                self.refresh_metrics()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("[Outbox] Erreur du dispatcher")
+                dispatched = 0
+            if dispatched < self.batch_size:
+                stop_event.wait(poll_interval)
+        self.close()
+        logger.info("[Outbox] Dispatcher arrêté")
+
+
+def start_dispatcher_thread(dispatcher=None):
+    """Lance le dispatcher dans un thread daemon ; retourne (thread, stop_event)."""
+    stop_event = threading.Event()
+    dispatcher = dispatcher or OutboxDispatcher()
+    thread = threading.Thread(
+        target=dispatcher.run_forever, args=(stop_event,), name="outbox-dispatcher", daemon=True
+    )
+    thread.start()
+    return thread, stop_event
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+    OutboxDispatcher().run_forever(stop_event)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Publisher RabbitMQ persistant : une connexion et un canal par processus."""
+
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+import pika
+from pika.exceptions import AMQPChannelError, AMQPConnectionError
+
+from app.config import settings
+from app.utils.timing import timed
+
+logger = logging.getLogger(__name__)
+
+QUEUES = ("client_created", "client_updated", "client_deleted")
+
+# En-tête AMQP portant le tenant de l'événement (partitionnement, app.db.tenancy)
+TENANT_HEADER = "x-tenant"
+
+# Erreurs après lesquelles la connexion est considérée comme perdue
+CONNECTION_ERRORS = (AMQPConnectionError, AMQPChannelError, ConnectionError, OSError)
+
+
+# Partition d'un tenant : stable d'un processus à l'autre, les événements d'un même
+# tenant restent ordonnés dans une seule queue
+def partition_of(tenant: Optional[str]) -> int:
+    return zlib.crc32((tenant or "").encode()) % settings.RABBITMQ_PARTITIONS
+
+
+# Clé de routage d'un événement : la queue, suffixée de la partition du tenant si
+# RABBITMQ_PARTITIONS (client_created.3)
+def routing_key(queue: str, tenant: Optional[str] = None) -> str:
+    if not settings.RABBITMQ_PARTITIONS:
+        return queue
+    return f"{queue}.{partition_of(tenant)}"
+
+
+# Queues client_* effectives : une par partition (toutes, ou celles indiquées)
+def partition_queues(partitions: Optional[Iterable[int]] = None) -> List[str]:
+    if not settings.RABBITMQ_PARTITIONS:
+        return list(QUEUES)
+    partitions = range(settings.RABBITMQ_PARTITIONS) if partitions is None else list(partitions)
+    return [f"{queue}.{partition}" for queue in QUEUES for partition in partitions]
+
+
+# Déclare les queues client_* et l'exchange topic qui les alimente : chaque queue est liée
+# avec son propre nom comme clé, et d'autres abonnés (invalidation de cache des autres
+# réplicas, par exemple) peuvent s'y lier sans prendre les messages des consommateurs.
+def declare_topology(channel):
+    if settings.RABBITMQ_EXCHANGE:
+        channel.exchange_declare(exchange=settings.RABBITMQ_EXCHANGE, exchange_type="topic", durable=True)
+    for name in partition_queues():
+        channel.queue_declare(queue=name, durable=True)
+        if settings.RABBITMQ_EXCHANGE:
+            channel.queue_bind(queue=name, exchange=settings.RABBITMQ_EXCHANGE, routing_key=name)
+
+
+class RabbitMQPublisher:
+    """Connexion RabbitMQ longue durée partagée entre les threads du processus.
+
+    Les queues sont déclarées une seule fois à la connexion, dont l'unique canal
+    sert à toutes les publications, et la connexion est rétablie avec un backoff
+    exponentiel lorsqu'elle tombe. ``BlockingConnection`` n'étant pas
+    thread-safe, connexion et canal ne sont utilisés que sous un verrou : les
+    publications des différents threads sont sérialisées.
+    """
+
+    def __init__(self, url=None, reconnect_attempts=None, reconnect_backoff=None, connection_factory=None):
+        self.url = url or settings.RABBITMQ_URL
+        self.reconnect_attempts = reconnect_attempts or settings.RABBITMQ_RECONNECT_ATTEMPTS
+        self.reconnect_backoff = (
+            settings.RABBITMQ_RECONNECT_BACKOFF if reconnect_backoff is None else reconnect_backoff
+        )
+        self._connection_factory = connection_factory or self._default_connection_factory
+        self._connection = None
+        self._channel = None
+        self._lock = threading.RLock()
+        self._closed = False
+
+    def _default_connection_factory(self):
+        return pika.BlockingConnection(pika.URLParameters(self.url))
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connection is not None and self._connection.is_open
+
+    def start(self):
+        """Ouvre la connexion et déclare les queues (appelé au démarrage de l'app)."""
+        with self._lock:
+            self._closed = False
+            self._ensure_channel()
+
+    def _connect_once(self):
+        with timed("broker", "connect"):
+            connection = self._connection_factory()
+            channel = connection.channel()
+            declare_topology(channel)
+        return connection, channel
+
+    def _ensure_channel(self):
+        if self.is_connected and self._channel.is_open:
+            return self._channel
+        self._reset()
+        delay = self.reconnect_backoff
+        for attempt in range(1, self.reconnect_attempts + 1):
+            try:
+                connection, channel = self._connect_once()
+            except CONNECTION_ERRORS as exc:
+                logger.warning(
+                    "[RabbitMQ] Connexion impossible (tentative %s/%s) : %s",
+                    attempt, self.reconnect_attempts, exc,
+                )
+                if attempt == self.reconnect_attempts:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, settings.RABBITMQ_RECONNECT_BACKOFF_MAX)
+                continue
+            self._connection, self._channel = connection, channel
+            logger.info("[RabbitMQ] Connexion établie, queues déclarées : %s", ", ".join(partition_queues()))
+            return channel
+        return None  # pragma: no cover
+
+    def _reset(self):
+        for resource in (self._channel, self._connection):
+            try:
+                if resource is not None and resource.is_open:
+                    resource.close()
+            except CONNECTION_ERRORS:
+                pass
+        self._connection = None
+        self._channel = None
+
+    @contextmanager
+    def channel(self):
+        """Prête le canal partagé ; les autres threads attendent la sortie du bloc."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Publisher RabbitMQ fermé")
+            channel = self._ensure_channel()
+            try:
+                yield channel
+            except CONNECTION_ERRORS:
+                self._reset()
+                raise
+
+    def publish(self, routing_key: str, body, properties=None):
+        """Publie un message persistant ; une reconnexion est tentée si le lien est perdu."""
+        self.publish_many([(routing_key, body)], properties)
+
+    def publish_many(self, messages, properties=None):
+        """Publie une suite de (routing_key, body[, propriétés propres au message]) à la chaîne
+        sur un seul canal."""
+        properties = properties or pika.BasicProperties(delivery_mode=2)
+        remaining = deque(messages)
+        try:
+            self._publish_all(remaining, properties)
+        except CONNECTION_ERRORS as exc:
+            logger.warning("[RabbitMQ] Publication échouée, reconnexion : %s", exc)
+            self._publish_all(remaining, properties)
+
+    def _publish_all(self, remaining, properties):
+        with self.channel() as channel:
+            while remaining:
+                routing_key, body, *message_properties = remaining[0]
+                channel.basic_publish(
+                    exchange=settings.RABBITMQ_EXCHANGE,
+                    routing_key=routing_key,
+                    body=body,
+                    properties=message_properties[0] if message_properties else properties,
+                )
+                remaining.popleft()
+
+    def close(self):
+        """Ferme le canal et la connexion (appelé à l'arrêt de l'app)."""
+        with self._lock:
+            self._closed = True
+            self._reset()
+        logger.info("[RabbitMQ] Publisher fermé")
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> RabbitMQPublisher:
+    """Retourne le publisher partagé du processus, créé à la première utilisation."""
+    global _publisher  # pylint: disable=global-statement
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = RabbitMQPublisher()
+    return _publisher
+
+
+def shutdown_publisher():
+    """Ferme le publisher partagé s'il a été créé."""
+    global _publisher  # pylint: disable=global-statement
+    with _publisher_lock:
+        if _publisher is not None:
+            _publisher.close()
+            _publisher = None
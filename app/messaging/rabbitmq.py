@@ -1,73 +1,102 @@
-import json
 import pika
 import logging
 from app.config import settings
+from app.messaging.codec import EncodedMessage, decode_event, encode_event
+from app.messaging.publisher import (
+    TENANT_HEADER, get_publisher, partition_queues, routing_key as partition_key
+)
+from app.db.tenancy import current_tenant
+from app.utils.timing import timed_stage
 from app.messaging.schemas import (
-    ClientCreatedMessage, ClientUpdatedMessage, ClientDeletedMessage,
+    ClientCreatedMessage, ClientUpdatedMessage, ClientDeletedMessage, EVENT_SCHEMAS,
 )
 
-# Configuration du logger
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def get_channel():
     connection_params = pika.URLParameters(settings.RABBITMQ_URL)
     connection = pika.BlockingConnection(connection_params)
     channel = connection.channel()
-    # Déclaration des différentes queues
-    channel.queue_declare(queue='client_created', durable=True)
-    channel.queue_declare(queue='client_updated', durable=True)
-    channel.queue_declare(queue='client_deleted', durable=True)
+    # Déclaration des différentes queues (une par partition si RABBITMQ_PARTITIONS)
+    for queue in partition_queues():
+        channel.queue_declare(queue=queue, durable=True)
     return channel
 
-# Publier un client créé
-def publish_client_created(client_data: dict, channel=None):
-    validated = ClientCreatedMessage(**client_data)
+# Propriétés AMQP d'un message : persistant, codec et compression annoncés au consommateur,
+# tenant de la requête en cours en en-tête
+def message_properties(message: EncodedMessage, **extra) -> pika.BasicProperties:
+    tenant = current_tenant()
+    if tenant is not None:
+        extra["headers"] = {**extra.get("headers", {}), TENANT_HEADER: tenant}
+    return pika.BasicProperties(
+        delivery_mode=2, content_type=message.content_type, content_encoding=message.content_encoding, **extra
+    )
+
+# Publication sur une queue (sa partition pour le tenant courant) : via le publisher partagé,
+# ou sur le canal fourni (chemin historique, le canal est alors fermé après la publication)
+def _publish(queue: str, message: EncodedMessage, channel=None):
+    routing_key = partition_key(queue, current_tenant())
     if channel is None:
-        channel = get_channel()
-    logger.info(f"[RabbitMQ] Publication dans 'client_created' : {validated.dict()}")
+        get_publisher().publish(routing_key, message.body, message_properties(message))
+        return
     channel.basic_publish(
         exchange='',
-        routing_key='client_created',
-        body=validated.model_dump_json(),
-        properties=pika.BasicProperties(delivery_mode=2)
+        routing_key=routing_key,
+        body=message.body,
+        properties=message_properties(message)
     )
     channel.close()
 
+# Publier un client créé
+@timed_stage("broker")
+def publish_client_created(client_data: dict, channel=None):
+    validated = ClientCreatedMessage(**client_data)
+    logger.info(f"[RabbitMQ] Publication dans 'client_created' : {validated.dict()}")
+    _publish('client_created', encode_event(validated), channel)
+
 # Publier un client mis à jour
+@timed_stage("broker")
 def publish_client_updated(client_data: dict, channel=None):
     validated = ClientUpdatedMessage(**client_data)
-    if channel is None:
-        channel = get_channel()
     logger.info(f"[RabbitMQ] Publication dans 'client_updated' : {validated.dict()}")
-    channel.basic_publish(
-        exchange='',
-        routing_key='client_updated',
-        body=validated.model_dump_json(),
-        properties=pika.BasicProperties(delivery_mode=2)
-    )
-    channel.close()
+    _publish('client_updated', encode_event(validated), channel)
 
 # Publier un client supprimé
+@timed_stage("broker")
 def publish_client_deleted(client_id: str, channel=None):
     validated = ClientDeletedMessage(_id=client_id)
-    if channel is None:
-        channel = get_channel()
     logger.info(f"[RabbitMQ] Publication dans 'client_deleted' : {validated.dict()}")
-    channel.basic_publish(
-        exchange='',
-        routing_key='client_deleted',
-        body=validated.model_dump_json(),
-        properties=pika.BasicProperties(delivery_mode=2)
-    )
+    _publish('client_deleted', encode_event(validated), channel)
+
+# Publier une suite d'événements (queue, données) à la chaîne sur un seul canal
+@timed_stage("broker")
+def publish_events(events, channel=None):
+    tenant = current_tenant()
+    messages = [
+        (partition_key(queue, tenant), message.body, message_properties(message))
+        for queue, message in ((queue, encode_event(EVENT_SCHEMAS[queue](**payload))) for queue, payload in events)
+    ]
+    logger.info(f"[RabbitMQ] Publication groupée de {len(messages)} événements")
+    if channel is None:
+        get_publisher().publish_many(messages)
+        return
+    for routing_key, body, properties in messages:
+        channel.basic_publish(
+            exchange='',
+            routing_key=routing_key,
+            body=body,
+            properties=properties
+        )
     channel.close()
 
-# Consommateur pour 'client_created'
+# Consommateur pour 'client_created' (historique, un message à la fois) ;
+# app.messaging.consumer.BatchConsumer couvre toutes les queues client_* par lots
 def consume_client_created(callback):
     channel = get_channel()
 
     def wrapper(ch, method, properties, body):
-        data = json.loads(body)
+        data = decode_event(body, getattr(properties, "content_type", None),
+                            getattr(properties, "content_encoding", None))
         logger.info(f"[RabbitMQ] Message reçu de 'client_created' : {data}")
         callback(data)
         ch.basic_ack(delivery_tag=method.delivery_tag)
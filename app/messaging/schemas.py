@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional
 
 class ClientBaseMessage(BaseModel):
@@ -11,8 +11,26 @@ class ClientBaseMessage(BaseModel):
 class ClientCreatedMessage(ClientBaseMessage):
     pass
 
-class ClientUpdatedMessage(ClientBaseMessage):
-    _id: str
+# "_id" serait un attribut privé pour Pydantic : on passe par un alias
+class ClientIdMixin(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
 
-class ClientDeletedMessage(BaseModel):
-    _id: str
+    id: Optional[str] = Field(default=None, alias="_id")
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def id_to_str(cls, value):
+        return None if value is None else str(value)
+
+class ClientUpdatedMessage(ClientIdMixin, ClientBaseMessage):
+    pass
+
+class ClientDeletedMessage(ClientIdMixin):
+    id: str = Field(alias="_id")
+
+# Schéma du message publié sur chaque queue
+EVENT_SCHEMAS = {
+    "client_created": ClientCreatedMessage,
+    "client_updated": ClientUpdatedMessage,
+    "client_deleted": ClientDeletedMessage,
+}
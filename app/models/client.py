@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, EmailStr, Field
 from pydantic_core import core_schema
 from pydantic import GetCoreSchemaHandler
@@ -25,6 +26,9 @@ class ClientModel(BaseModel):
     company: Optional[str] = None
     phone: Optional[str] = None
     is_active: bool = True
+    # Tenus par le service (ignorés en entrée) : version incrémentée à chaque écriture
+    version: int = 0
+    updated_at: Optional[datetime] = None
 
     class Config:
         populate_by_name = True
@@ -38,3 +42,57 @@ class ClientModel(BaseModel):
                 "is_active": True
             }
         }
+
+
+# Champs renseignés par le service, jamais repris des données envoyées par l'appelant
+SERVER_FIELDS = {"version", "updated_at"}
+
+# Défauts du modèle ; None pour les champs requis absents du document (données anciennes, projection)
+_CLIENT_FIELDS = [
+    (name, None if field.is_required() else field.get_default())
+    for name, field in ClientModel.model_fields.items() if name != "id"
+]
+
+
+# Lecture rapide d'un document Mongo, déjà validé à l'écriture : aucun contrôle n'est refait,
+# seuls les champs du modèle sont gardés (valeurs par défaut comprises), _id en str
+def client_document(doc: dict) -> dict:
+    return {"_id": str(doc["_id"]), **{name: doc.get(name, default) for name, default in _CLIENT_FIELDS}}
+
+
+# ClientModel construit sans validation à partir d'un document de client_document
+def construct_client(document: dict) -> ClientModel:
+    return ClientModel.model_construct(**document)
+
+
+# Page de résultats de GET /clients ; next_cursor est absent sur la dernière page
+class ClientPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+# Opération d'un appel POST /clients/bulk ; "data" est validé élément par élément
+class BulkOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+class BulkRequest(BaseModel):
+    operations: List[BulkOperation]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    op: str
+    status: Literal["ok", "error"]
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    errors: int = 0
+    results: List[BulkItemResult]
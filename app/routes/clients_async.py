@@ -0,0 +1,207 @@
+from datetime import datetime
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.models.client import BulkRequest, BulkResult, ClientModel, ClientPage
+from app.services.async_client_service import (
+    create_client, get_client_document, list_clients_page, update_client, delete_client,
+    iter_client_batches, bulk_write_clients, search_clients
+)
+from app.services.client_service import PROJECTABLE_FIELDS, VersionConflictError, view_fields
+from app.services.export import MEDIA_TYPES, make_encoder, astream_export
+from app.services.idempotency import aidempotent
+from app.services.search import TextIndexMissingError
+from app.utils.compression import prefers_gzip
+from app.security.dependencies import get_current_user, role_required
+from app.security.throttling import throttle
+from app.utils.helpers import conditional_headers, etag_matches, export_headers, parse_fields, parse_if_match
+from app.utils.responses import FastJSONResponse, TimedJSONResponse, not_modified, with_body_etag
+from app.messaging.async_publisher import (
+    publish_client_created, publish_client_updated, publish_client_deleted, publish_events
+)
+
+# Mêmes routes que app.routes.clients, servies dans la boucle d'événements (ASYNC_MODE)
+router = APIRouter(default_response_class=TimedJSONResponse)
+
+EMAIL_TAKEN = "Email déjà utilisé par un autre client"
+VERSION_MISMATCH = "Le client a été modifié depuis (If-Match)"
+TEXT_INDEX_MISSING = "Recherche plein texte indisponible (index texte absent) : utiliser mode=prefix"
+
+@router.post("/", response_model=ClientModel, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(throttle("write"))])
+async def create(client: ClientModel, idempotency_key: Optional[str] = Header(None),
+                 user=Depends(role_required("admin"))):
+    async with aidempotent(idempotency_key, user, "POST /clients/", client) as call:
+        if call.replay is not None:
+            return call.replay
+        try:
+            new_client = await create_client(client)
+        except DuplicateKeyError as exc:
+            raise HTTPException(status_code=409, detail=EMAIL_TAKEN) from exc
+        if settings.EVENTS_MODE == "inline":
+            await publish_client_created(new_client.model_dump())
+        return call.save(status.HTTP_201_CREATED, new_client)
+
+# Opérations groupées : un seul bulk_write et une publication à la chaîne des événements
+@router.post("/bulk", response_model=BulkResult, dependencies=[Depends(throttle("bulk"))])
+async def bulk(request: BulkRequest, idempotency_key: Optional[str] = Header(None),
+               user=Depends(role_required("admin"))):
+    if len(request.operations) > settings.BULK_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=413, detail=f"Maximum {settings.BULK_MAX_OPERATIONS} opérations par requête"
+        )
+    async with aidempotent(idempotency_key, user, "POST /clients/bulk", request) as call:
+        if call.replay is not None:
+            return call.replay
+        result, events = await bulk_write_clients(request.operations)
+        if settings.EVENTS_MODE == "inline" and events:
+            await publish_events(events)
+        return call.save(status.HTTP_200_OK, result)
+
+@router.get("/", response_model=ClientPage, dependencies=[Depends(throttle("list"))])
+async def get_all(
+    limit: Optional[int] = Query(None, ge=1, description="Taille de page (bornée par LIST_MAX_LIMIT)"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente"),
+    is_active: Optional[bool] = None,
+    company: Optional[str] = None,
+    email_prefix: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary : nom, email, société, statut"),
+    updated_since: Optional[datetime] = Query(None, description=(
+        "Seulement les clients créés ou modifiés après cette date. Les suppressions ne laissent pas de trace "
+        "et n'apparaissent pas : les suivre via les événements client_deleted ou GET /clients/changes"
+    )),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(role_required("admin")),
+):
+    try:
+        page = await list_clients_page(
+            limit, cursor, is_active, company, email_prefix, view_fields(view, parse_fields(fields)), updated_since
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    # Page encodée ici pour calculer son ETag (304 si elle n'a pas changé)
+    if settings.READ_FAST_PATH:
+        response = FastJSONResponse(page.model_dump())
+    else:
+        response = TimedJSONResponse(jsonable_encoder(page))
+    return with_body_etag(response, if_none_match)
+
+# Export complet en flux (NDJSON ou CSV), compressé en gzip si la négociation le retient
+@router.get("/export", dependencies=[Depends(role_required("admin")), Depends(throttle("export"))])
+async def export(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    is_active: Optional[bool] = None,
+    company: Optional[str] = None,
+    email_prefix: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Champs à exporter, séparés par des virgules"),
+):
+    field_list = parse_fields(fields)
+    try:
+        batches = iter_client_batches(is_active, company, email_prefix, field_list)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    encoder = make_encoder(export_format, ["_id", *(field_list or PROJECTABLE_FIELDS)])
+    gzip = prefers_gzip(request.headers.get("accept-encoding", ""))
+    return StreamingResponse(
+        astream_export(batches, encoder, gzip),
+        media_type=MEDIA_TYPES[export_format],
+        headers=export_headers(export_format, gzip),
+    )
+
+# Recherche par préfixe (nom, société, email) ou plein texte, classée et paginée
+@router.get("/search", response_model=ClientPage, dependencies=[Depends(throttle("search"))])
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: str = Query("prefix", pattern="^(prefix|text)$"),
+    field: str = Query("all", pattern="^(all|name|company|email)$"),
+    limit: Optional[int] = Query(None, ge=1, description="Taille de page (bornée par LIST_MAX_LIMIT)"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente"),
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary : nom, email, société, statut"),
+    user=Depends(role_required("admin")),
+):
+    try:
+        page = await search_clients(q, mode, field, limit, cursor, view_fields(view, parse_fields(fields)))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except TextIndexMissingError as exc:
+        raise HTTPException(status_code=503, detail=TEXT_INDEX_MISSING) from exc
+    if settings.READ_FAST_PATH:
+        return FastJSONResponse(page.model_dump())
+    return page
+
+# Flux des changements en server-sent events ; Last-Event-ID reprend après une déconnexion
+@router.get("/changes", dependencies=[
+    Depends(role_required("admin")), Depends(throttle("changes", shed=False)),
+])
+async def changes(last_event_id: Optional[str] = Header(None)):
+    if not settings.CHANGE_FEED_ENABLED:
+        raise HTTPException(status_code=404, detail="Flux des changements désactivé")
+    # Le flux suit alors toutes les partitions : il mêlerait les clients des tenants
+    if settings.TENANT_CLAIM:
+        raise HTTPException(status_code=404, detail="Flux des changements indisponible par tenant")
+    # Importé seulement si le flux est activé (tailer, métriques du change stream)
+    from app.messaging.change_stream import change_feed, stream_changes  # pylint: disable=import-outside-toplevel
+    return StreamingResponse(
+        stream_changes(change_feed, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{client_id}", response_model=ClientModel, dependencies=[Depends(throttle("get"))])
+async def get_by_id(client_id: str, response: Response, if_none_match: Optional[str] = Header(None),
+                    user=Depends(get_current_user)):
+    document = await get_client_document(client_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Client non trouvé")
+    headers = conditional_headers(document)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    # Document déjà validé à l'écriture : renvoyé tel quel, sans passer par response_model
+    if settings.READ_FAST_PATH:
+        return FastJSONResponse(document, headers=headers)
+    response.headers.update(headers)
+    return ClientModel(**document)
+
+@router.put("/{client_id}", response_model=ClientModel, dependencies=[Depends(throttle("write"))])
+async def update(client_id: str, client: ClientModel, response: Response,
+                 if_match: Optional[str] = Header(None), idempotency_key: Optional[str] = Header(None),
+                 user=Depends(role_required("admin"))):
+    async with aidempotent(idempotency_key, user, f"PUT /clients/{client_id}",
+                           {"if_match": if_match, "client": client}) as call:
+        if call.replay is not None:
+            return call.replay
+        # If-Match : la mise à jour n'est appliquée que si la version n'a pas changé
+        try:
+            expected_versions = parse_if_match(if_match) if if_match else None
+            updated = await update_client(client_id, client, expected_versions)
+        except (ValueError, VersionConflictError) as exc:
+            raise HTTPException(status_code=412, detail=VERSION_MISMATCH) from exc
+        except DuplicateKeyError as exc:
+            raise HTTPException(status_code=409, detail=EMAIL_TAKEN) from exc
+        if not updated:
+            raise HTTPException(status_code=404, detail="Client non trouvé ou non modifié")
+        headers = conditional_headers(updated.model_dump())
+        response.headers.update(headers)
+        if settings.EVENTS_MODE == "inline":
+            await publish_client_updated(updated.model_dump())
+        return call.save(status.HTTP_200_OK, updated, headers)
+
+@router.delete("/{client_id}", status_code=status.HTTP_204_NO_CONTENT,
+               dependencies=[Depends(throttle("write"))])
+async def delete(client_id: str, idempotency_key: Optional[str] = Header(None),
+                 user=Depends(role_required("admin"))):
+    async with aidempotent(idempotency_key, user, f"DELETE /clients/{client_id}") as call:
+        if call.replay is not None:
+            return call.replay
+        success = await delete_client(client_id)
+        if not success:
+            raise HTTPException(status_code=404, detail="Client non trouvé")
+        if settings.EVENTS_MODE == "inline":
+            await publish_client_deleted(client_id)
+        return call.save(status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,12 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
 from app.config import settings
+from app.utils.timing import timed_stage
 
 SECRET_KEY = settings.JWT_SECRET
 ALGORITHM = settings.JWT_ALGORITHM
@@ -13,9 +18,70 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+# Décodeur JWT selon JWT_BACKEND ; retourne (décodage, erreurs levées sur un jeton invalide)
+def _make_decoder(backend: str):
+    if backend == "pyjwt":
+        try:
+            import jwt as pyjwt  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("JWT_BACKEND=pyjwt nécessite le paquet 'PyJWT'") from exc
+        return (lambda token: pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])), (pyjwt.PyJWTError,)
+    return (lambda token: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])), (JWTError,)
+
+_decode, _DECODE_ERRORS = _make_decoder(settings.JWT_BACKEND)
+
+class TokenCache:
+    """Jetons déjà vérifiés, indexés par leur empreinte SHA-256 et valables jusqu'à leur exp."""
+
+    def __init__(self, max_size: int = None, ttl: float = None, clock=time.time):
+        self.max_size = settings.AUTH_TOKEN_CACHE_SIZE if max_size is None else max_size
+        self.ttl = settings.AUTH_TOKEN_CACHE_TTL if ttl is None else ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        if self.max_size <= 0:
+            return None
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry[1])
+
+    def set(self, token: str, payload: dict):
+        if self.max_size <= 0:
+            return
+        # Le jeton n'est jamais servi depuis le cache au-delà de son exp
+        expires_at = self._clock() + self.ttl
+        if isinstance(payload.get("exp"), (int, float)):
+            expires_at = min(expires_at, payload["exp"])
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            self._entries[key] = (expires_at, dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache()
+
+@timed_stage("auth")
 def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    payload = token_cache.get(token)
+    if payload is not None:
         return payload
-    except JWTError:
+    try:
+        payload = _decode(token)
+    except _DECODE_ERRORS:
         return None
+    token_cache.set(token, payload)
+    return payload
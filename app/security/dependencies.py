@@ -1,7 +1,15 @@
+import logging
+from functools import lru_cache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from pymongo.errors import PyMongoError
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.db.tenancy import check_tenant, prepared_tenants, set_current_tenant
 from app.security.auth import verify_token
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
@@ -10,9 +18,46 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
     return payload
 
+# Une seule instance par rôle : FastAPI mémorise alors chaque dépendance une fois par
+# requête, et get_current_user n'est évalué qu'une fois même si une route combine les deux
+@lru_cache(maxsize=None)
 def role_required(required_role: str):
     def role_checker(user=Depends(get_current_user)):
         if user.get("role") != required_role:
             raise HTTPException(status_code=403, detail="Accès interdit")
         return user
     return role_checker
+
+# Tenant de la requête (claim TENANT_CLAIM du JWT) : MongoDB, cache et événements de la
+# requête sont routés vers sa partition. Asynchrone pour que la variable de contexte soit
+# positionnée dans la tâche de la requête, et vue par les handlers exécutés en thread.
+async def tenant_scope(user=Depends(get_current_user)):
+    if not settings.TENANT_CLAIM:
+        return None
+    try:
+        tenant = check_tenant(user.get(settings.TENANT_CLAIM) or settings.TENANT_DEFAULT)
+    except ValueError as exc:
+        raise HTTPException(status_code=403, detail=str(exc)) from exc
+    set_current_tenant(tenant)
+    if tenant not in prepared_tenants:
+        await _prepare_tenant(tenant)
+    return tenant
+
+# Index de la partition, créés à la première requête du tenant dans le processus
+async def _prepare_tenant(tenant: str):
+    # pylint: disable=import-outside-toplevel
+    from app.services.client_service import DuplicateEmailsError
+    try:
+        if settings.ASYNC_MODE:
+            from app.services.async_client_service import ensure_indexes
+            await ensure_indexes()
+        else:
+            from app.services.client_service import ensure_indexes
+            await run_in_threadpool(ensure_indexes)
+    except PyMongoError as exc:
+        logger.warning("[MongoDB] Création des index du tenant %s impossible : %s", tenant, exc)
+        return
+    except DuplicateEmailsError as exc:
+        # Les autres index sont créés : la partition reste servie, sans unicité de l'email
+        logger.error("[MongoDB] Tenant %s : %s", tenant, exc)
+    prepared_tenants.add(tenant)
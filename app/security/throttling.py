@@ -0,0 +1,184 @@
+"""Limitation de débit et délestage des routes /clients.
+
+* Débit : un seau à jetons par utilisateur (``sub`` et ``role`` du JWT), de
+  capacité ``RATE_LIMIT_CAPACITY`` et rechargé de ``RATE_LIMIT_REFILL_RATE``
+  jetons par seconde (multipliés par le facteur du rôle). Chaque route consomme
+  son coût (``RATE_LIMIT_COSTS``) : la liste complète ou l'export coûtent plus
+  qu'une lecture par ID. Seau vide : 429 avec ``Retry-After``.
+* Délestage : au-delà de ``SHED_MAX_IN_FLIGHT`` requêtes en cours d'accès à la
+  base dans le processus, la requête est refusée (503 avec ``Retry-After``)
+  au lieu d'attendre un pool MongoDB déjà saturé.
+
+Les seaux sont gardés en mémoire (par processus) ou dans Redis, partagé entre
+réplicas (``RATE_LIMIT_BACKEND=redis``, paquet ``redis`` optionnel).
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from fastapi import Depends, HTTPException, status
+from prometheus_client import Counter, Gauge
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.security.dependencies import get_current_user
+
+THROTTLED_REQUESTS = Counter(
+    "throttled_requests_total", "Requêtes refusées par la limitation de débit ou le délestage", ["route", "reason"]
+)
+IN_FLIGHT = Gauge("db_requests_in_flight", "Requêtes en cours d'accès à la base", multiprocess_mode="livesum")
+
+
+class MemoryBucketStore:
+    """Seaux à jetons du processus, bornés en nombre (les moins récents sont oubliés)."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = None, clock=time.monotonic):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        """Consomme ``cost`` jetons ; retourne 0 si accepté, sinon l'attente en secondes."""
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                tokens, wait = tokens - cost, 0.0
+            else:
+                wait = (cost - tokens) / rate if rate > 0 else math.inf
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Seau à jetons atomique côté Redis : KEYS[1] ; ARGV = coût, capacité, débit, maintenant
+_TAKE_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local cost, capacity, rate, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= cost then tokens = tokens - cost else wait = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Seaux partagés entre réplicas ; nécessite le paquet ``redis`` (optionnel)."""
+
+    blocking = True
+
+    def __init__(self, url: str = None, prefix: str = "ratelimit:"):
+        try:
+            import redis  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis nécessite le paquet 'redis'") from exc
+        self._redis = redis.Redis.from_url(url or settings.REDIS_URL)
+        self._take = self._redis.register_script(_TAKE_SCRIPT)
+        self.prefix = prefix
+
+    def take(self, key: str, cost: float, capacity: float, rate: float) -> float:
+        return float(self._take(keys=[self.prefix + key], args=[cost, capacity, rate, time.time()]))
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + "*"):
+            self._redis.delete(key)
+
+
+class LoadShedder:
+    """Compteur des requêtes en cours d'accès à la base ; refuse au-delà de la limite."""
+
+    def __init__(self, max_in_flight: int = None):
+        self.max_in_flight = settings.SHED_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                return False
+            self.in_flight += 1
+        IN_FLIGHT.inc()
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        IN_FLIGHT.dec()
+
+
+_BACKENDS = {"memory": MemoryBucketStore, "redis": RedisBucketStore}
+_store = None
+_store_lock = threading.Lock()
+shedder = LoadShedder()
+
+
+def get_bucket_store():
+    """Stockage des seaux du processus, créé selon RATE_LIMIT_BACKEND."""
+    global _store  # pylint: disable=global-statement
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _BACKENDS[settings.RATE_LIMIT_BACKEND]()
+    return _store
+
+
+def set_bucket_store(store):
+    """Remplace le stockage des seaux (tests, benchmarks)."""
+    global _store  # pylint: disable=global-statement
+    _store = store
+
+
+def _rejected(route: str, reason: str, status_code: int, detail: str, wait: float):
+    THROTTLED_REQUESTS.labels(route, reason).inc()
+    return HTTPException(status_code=status_code, detail=detail,
+                         headers={"Retry-After": str(max(1, math.ceil(wait)))})
+
+
+# Consomme le coût de la route dans le seau de l'utilisateur ; 429 si le seau est vide
+async def check_rate_limit(route: str, user: dict):
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    role = user.get("role", "")
+    factor = settings.RATE_LIMIT_ROLE_FACTORS.get(role, 1.0)
+    args = (f"{role}:{user.get('sub', '')}", settings.RATE_LIMIT_COSTS.get(route, 1),
+            settings.RATE_LIMIT_CAPACITY * factor, settings.RATE_LIMIT_REFILL_RATE * factor)
+    store = get_bucket_store()
+    wait = await run_in_threadpool(store.take, *args) if store.blocking else store.take(*args)
+    if wait > 0:
+        raise _rejected(route, "rate_limit", status.HTTP_429_TOO_MANY_REQUESTS, "Trop de requêtes", wait)
+
+
+# Une instance par route (mémorisée par FastAPI, comme role_required) ; ``shed`` : la
+# requête occupe une place du délestage pendant son traitement
+@lru_cache(maxsize=None)
+def throttle(route: str, shed: bool = True):
+    async def guard(user=Depends(get_current_user)):
+        await check_rate_limit(route, user)
+        if not shed:
+            yield
+            return
+        if not shedder.try_acquire():
+            raise _rejected(route, "overload", status.HTTP_503_SERVICE_UNAVAILABLE,
+                            "Service surchargé, réessayez plus tard", settings.SHED_RETRY_AFTER)
+        try:
+            yield
+        finally:
+            shedder.release()
+    return guard
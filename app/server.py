@@ -0,0 +1,134 @@
+"""Serveur de production : ``python -m app.server``.
+
+Lance uvicorn avec ``SERVER_WORKERS`` processus (0 : un par CPU disponible, quota du
+conteneur compris). Chaque worker
+importe l'application et ouvre ses propres clients MongoDB et RabbitMQ au
+lifespan : aucune connexion n'est partagée entre processus. Les métriques
+Prometheus passent en mode multiprocessus (``PROMETHEUS_MULTIPROC_DIR``) dès
+qu'il y a plusieurs workers : ``/metrics`` agrège alors celles de tous les workers.
+
+Avec gunicorn (``gunicorn -c gunicorn.conf.py app.main:app``), l'application est
+préchargée dans le maître puis les clients sont recréés dans chaque worker après
+le fork (voir ``post_fork``).
+"""
+
+import importlib.util
+import logging
+import math
+import os
+import shutil
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+# Quota CPU du cgroup (cgroup v2 puis v1) : None s'il n'y en a pas
+CGROUP_CPU_FILES = (
+    ("/sys/fs/cgroup/cpu.max", None),
+    ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),
+)
+
+
+def cgroup_cpu_quota() -> Optional[float]:
+    for quota_file, period_file in CGROUP_CPU_FILES:
+        try:
+            with open(quota_file, encoding="ascii") as handle:
+                values = handle.read().split()
+            if period_file is not None:
+                with open(period_file, encoding="ascii") as handle:
+                    values.append(handle.read().strip())
+        except OSError:
+            continue
+        if len(values) < 2 or values[0] in ("max", "-1"):
+            return None
+        return int(values[0]) / int(values[1])
+    return None
+
+
+# CPU réellement utilisables : cœurs autorisés au processus (affinité), bornés par le
+# quota du cgroup (limite CPU d'un conteneur), et non le nombre de cœurs de l'hôte
+def available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS, Windows
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def worker_count() -> int:
+    return settings.SERVER_WORKERS or available_cpus()
+
+
+# Boucle d'événements et parseur HTTP : "auto" prend uvloop / httptools s'ils sont installés
+def check_implementations():
+    for option, value, package in (("SERVER_LOOP", settings.SERVER_LOOP, "uvloop"),
+                                   ("SERVER_HTTP", settings.SERVER_HTTP, "httptools")):
+        if value == package and importlib.util.find_spec(package) is None:
+            raise RuntimeError(f"{option}={value} nécessite le paquet '{package}'")
+
+
+def prepare_metrics_dir(workers: int):
+    """Répertoire des métriques multiprocessus, vidé au démarrage ; à fixer avant l'import
+    de prometheus_client par les workers (variable d'environnement héritée)."""
+    if workers <= 1 and METRICS_DIR_ENV not in os.environ:
+        return None
+    path = os.environ.setdefault(METRICS_DIR_ENV, settings.PROMETHEUS_MULTIPROC_DIR)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def server_options(workers: int) -> dict:
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": workers,
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "limit_max_requests": settings.SERVER_MAX_REQUESTS or None,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+    }
+
+
+# Remet à zéro les clients d'un processus issu d'un fork (gunicorn --preload) : les
+# sockets héritées du maître ne doivent pas être partagées
+def reset_process_clients():
+    # pylint: disable=import-outside-toplevel
+    from app.db.mongo import close_client
+    from app.messaging.publisher import shutdown_publisher
+    close_client()
+    shutdown_publisher()
+
+
+# Retire les métriques d'un worker arrêté (jauges "live*") du répertoire multiprocessus
+def mark_worker_dead(pid: int):
+    if METRICS_DIR_ENV in os.environ:
+        from prometheus_client import multiprocess  # pylint: disable=import-outside-toplevel
+        multiprocess.mark_process_dead(pid)
+
+
+def main():
+    import uvicorn  # pylint: disable=import-outside-toplevel
+    check_implementations()
+    workers = worker_count()
+    if workers > 1 and settings.EVENTS_MODE == "changestream" and settings.CHANGE_STREAM_IN_PROCESS:
+        # Chaque worker suivrait le change stream : événements publiés N fois
+        logger.warning("[Server] %s workers avec CHANGE_STREAM_IN_PROCESS : lancer plutôt "
+                       "python -m app.messaging.change_stream à part", workers)
+    prepare_metrics_dir(workers)
+    uvicorn.run("app.main:app", **server_options(workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Versions asynchrones des fonctions de client_service (ASYNC_MODE)."""
+
+import logging
+from datetime import datetime
+from itertools import islice
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from app.config import settings
+from app.models.client import (
+    BulkOperation, ClientModel, ClientPage, SERVER_FIELDS, client_document, construct_client
+)
+from app.services.bulk import BulkPlan
+from app.services.cache import cache_key, get_client_cache, invalidate_client
+from app.services.idempotency import idempotency_indexes
+from app.utils.singleflight import AsyncSingleFlight
+from app.utils.timing import timed_stage
+from app.services.client_service import (
+    CLIENT_INDEXES, DUPLICATE_EMAILS_PIPELINE, DuplicateEmailsError, VersionConflictError, build_list_query,
+    build_page, build_update, check_fields, missing_unique_indexes, search_page, stale_indexes, to_client,
+    to_page_item,
+)
+from app.services.search import (
+    BACKFILL_FILTER, BACKFILL_UPDATE, INDEX_NOT_FOUND, SearchPlan, TextIndexMissingError, search_index, search_keys
+)
+from app.utils.helpers import utc_now
+from app.db.mongo_async import (
+    clients_collection, get_client as get_mongo_client, idempotency_collection, outbox_collection,
+)
+from app.messaging.outbox import build_event
+
+logger = logging.getLogger(__name__)
+
+# Lectures par ID en cours : les appels simultanés sur un même client partagent la requête
+client_lookups = AsyncSingleFlight("get_client")
+
+# Exécute une écriture ; en mode outbox, dans une transaction (MONGO_TRANSACTIONS exigé au démarrage)
+async def _write(operation):
+    if settings.EVENTS_MODE == "outbox" and settings.MONGO_TRANSACTIONS:
+        async with get_mongo_client().start_session() as session:
+            return await session.with_transaction(operation)
+    return await operation(None)
+
+# Enregistre l'événement dans l'outbox si ce mode est actif
+async def _emit(queue: str, payload: dict, session=None):
+    if settings.EVENTS_MODE == "outbox":
+        await outbox_collection.insert_one(build_event(queue, payload), session=session)
+
+# Créer un nouveau client
+@timed_stage("db")
+async def create_client(client: ClientModel) -> ClientModel:
+    client_dict = client.model_dump(by_alias=True, exclude_unset=True, exclude=SERVER_FIELDS)
+
+    async def operation(session):
+        document = {**client_dict, **search_keys(client_dict), "version": 1, "updated_at": utc_now()}
+        result = await clients_collection.insert_one(document, session=session)
+        document["_id"] = str(result.inserted_id)
+        created = ClientModel(**document)
+        await _emit("client_created", created.model_dump(), session)
+        return created
+
+    created = await _write(operation)
+    search_index.invalidate()
+    return created
+
+# Document d'un client, lu au travers du cache
+@timed_stage("db")
+async def get_client_document(client_id: str) -> Optional[dict]:
+    if not ObjectId.is_valid(client_id):
+        return None
+    key = cache_key(client_id)
+    cache = get_client_cache()
+    document = cache.get(key)
+    if document is None:
+        if settings.SINGLE_FLIGHT_ENABLED:
+            return await client_lookups.do(key, _load_client_document, client_id, key)
+        return await _load_client_document(client_id, key)
+    return document
+
+async def _load_client_document(client_id: str, key: str) -> Optional[dict]:
+    client_data = await clients_collection.find_one({"_id": ObjectId(client_id)})
+    if not client_data:
+        return None
+    document = client_document(client_data)
+    get_client_cache().set(key, document)
+    return document
+
+# Obtenir un client par ID
+async def get_client(client_id: str) -> Optional[ClientModel]:
+    document = await get_client_document(client_id)
+    if document is None:
+        return None
+    return construct_client(document) if settings.READ_FAST_PATH else ClientModel(**document)
+
+# Lister tous les clients
+@timed_stage("db")
+async def list_clients() -> List[ClientModel]:
+    clients = []
+    async for doc in clients_collection.find():
+        clients.append(to_client(doc))
+    return clients
+
+# Lister une page de clients (pagination par clé sur _id)
+@timed_stage("db")
+async def list_clients_page(limit: Optional[int] = None, cursor: Optional[str] = None,
+                            is_active: Optional[bool] = None, company: Optional[str] = None,
+                            email_prefix: Optional[str] = None, fields: Optional[List[str]] = None,
+                            updated_since: Optional[datetime] = None) -> ClientPage:
+    query, projection, limit = build_list_query(
+        limit, cursor, is_active, company, email_prefix, fields, updated_since
+    )
+    docs = await clients_collection.find(query, projection, sort=[("_id", 1)], limit=limit + 1).to_list(limit + 1)
+    return build_page(docs, limit, fields)
+
+# Parcourt les clients par lots de batch_size documents, lus depuis un curseur Mongo
+def iter_client_batches(is_active: Optional[bool] = None, company: Optional[str] = None,
+                        email_prefix: Optional[str] = None, fields: Optional[List[str]] = None,
+                        batch_size: Optional[int] = None):
+    query, projection, _ = build_list_query(None, None, is_active, company, email_prefix, fields)
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    cursor = clients_collection.find(query, projection, sort=[("_id", 1)], batch_size=batch_size)
+
+    async def batches():
+        batch = []
+        async for doc in cursor:
+            batch.append(to_page_item(doc, fields))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return batches()
+
+# Rechercher des clients par préfixe ou plein texte (voir app.services.search)
+@timed_stage("db")
+async def search_clients(q: str, mode: str = "prefix", field: str = "all", limit: Optional[int] = None,
+                         cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> ClientPage:
+    plan = SearchPlan(q, mode, field, limit, cursor)
+    check_fields(fields)
+    if settings.SEARCH_BACKEND == "memory":
+        if search_index.stale():
+            search_index.build(await clients_collection.find().to_list(None))
+        matches = islice(search_index.search(q, plan.fields), plan.offset, plan.offset + plan.limit + 1)
+        return search_page(plan, list(matches), fields)
+    projection = plan.projection(fields)
+    if mode == "text":
+        try:
+            docs = await clients_collection.find(
+                plan.text_query(), projection, sort=plan.text_sort(), skip=plan.offset, limit=plan.limit + 1
+            ).to_list(plan.limit + 1)
+        except OperationFailure as exc:
+            if exc.code == INDEX_NOT_FOUND:
+                raise TextIndexMissingError(str(exc)) from exc
+            raise
+        return search_page(plan, docs, fields)
+    ranked = []
+    for position, query, sort in plan.prefix_queries():
+        remaining = plan.limit + 1 - len(ranked)
+        docs = await clients_collection.find(query, projection, sort=sort, limit=remaining).to_list(remaining)
+        ranked.extend((position, doc) for doc in docs)
+        if len(ranked) > plan.limit:
+            break
+    return search_page(plan, [doc for _, doc in ranked], fields, plan.prefix_cursor(ranked))
+
+# Index déclarés, créés un par un au démarrage (voir client_service.ensure_indexes)
+@timed_stage("db")
+async def ensure_indexes():
+    await clients_collection.update_many(BACKFILL_FILTER, BACKFILL_UPDATE)
+    await idempotency_collection.create_indexes(idempotency_indexes())
+    existing = await clients_collection.index_information()
+    duplicates = []
+    if missing_unique_indexes(existing):
+        duplicates = [doc["_id"] async for doc in await clients_collection.aggregate(DUPLICATE_EMAILS_PIPELINE)]
+    stale = stale_indexes(existing)
+    for index in CLIENT_INDEXES:
+        name = index.document["name"]
+        if duplicates and index.document.get("unique"):
+            continue
+        try:
+            if name in stale:
+                await clients_collection.drop_index(name)
+            await clients_collection.create_indexes([index])
+        except DuplicateKeyError:
+            cursor = await clients_collection.aggregate(DUPLICATE_EMAILS_PIPELINE)
+            duplicates = [doc["_id"] async for doc in cursor]
+        except OperationFailure as exc:
+            logger.warning("[MongoDB] Index %s non créé : %s", name, exc)
+    if duplicates:
+        raise DuplicateEmailsError(duplicates)
+
+# Mettre à jour un client ; expected_versions : versions acceptées (If-Match)
+@timed_stage("db")
+async def update_client(client_id: str, client: ClientModel,
+                        expected_versions: Optional[List[int]] = None) -> Optional[ClientModel]:
+    if not ObjectId.is_valid(client_id):
+        return None
+    update_data = client.model_dump(by_alias=True, exclude_unset=True, exclude=SERVER_FIELDS)
+    query, changes = build_update(client_id, update_data, expected_versions)
+
+    async def operation(session):
+        updated = await clients_collection.find_one_and_update(
+            query,
+            changes,
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if not updated:
+            if expected_versions is not None and await clients_collection.count_documents(
+                    {"_id": query["_id"]}, limit=1, session=session):
+                raise VersionConflictError(client_id)
+            return None
+        updated["_id"] = str(updated["_id"])
+        result = ClientModel(**updated)
+        await _emit("client_updated", result.model_dump(), session)
+        return result
+
+    result = await _write(operation)
+    if result is not None:
+        invalidate_client(client_id)
+        search_index.invalidate()
+    return result
+
+# Supprimer un client
+@timed_stage("db")
+async def delete_client(client_id: str) -> bool:
+    if not ObjectId.is_valid(client_id):
+        return False
+
+    async def operation(session):
+        result = await clients_collection.delete_one({"_id": ObjectId(client_id)}, session=session)
+        if result.deleted_count != 1:
+            return False
+        await _emit("client_deleted", {"_id": client_id}, session)
+        return True
+
+    deleted = await _write(operation)
+    if deleted:
+        invalidate_client(client_id)
+        search_index.invalidate()
+    return deleted
+
+# Écritures groupées : validation en une passe puis un seul bulk_write non ordonné
+@timed_stage("db")
+async def bulk_write_clients(operations: List[BulkOperation]):
+    plan = BulkPlan(operations)
+
+    async def operation(session):
+        target_ids = plan.target_ids()
+        existing = {
+            doc["_id"] async for doc in clients_collection.find({"_id": {"$in": target_ids}}, {"_id": 1}, session=session)
+        } if target_ids else set()
+        requests = plan.build_requests(existing)
+        if requests:
+            try:
+                await clients_collection.bulk_write(requests, ordered=False, session=session)
+            except BulkWriteError as exc:
+                plan.apply_write_errors(exc.details.get("writeErrors", []))
+        updated_ids = plan.updated_ids()
+        updated_docs = [
+            doc async for doc in clients_collection.find({"_id": {"$in": updated_ids}}, session=session)
+        ] if updated_ids else []
+        result, events = plan.finish(updated_docs)
+        if settings.EVENTS_MODE == "outbox" and events:
+            await outbox_collection.insert_many([build_event(queue, payload) for queue, payload in events], session=session)
+        return result, events
+
+    result, events = await _write(operation)
+    for queue, payload in events:
+        if queue != "client_created":
+            invalidate_client(payload["_id"])
+    if events:
+        search_index.invalidate()
+    return result, events
@@ -0,0 +1,129 @@
+"""Préparation et résultats des écritures groupées (POST /clients/bulk).
+
+Toutes les opérations sont validées en une passe, puis envoyées dans un unique
+``bulk_write`` non ordonné ; chaque opération reçoit son propre résultat.
+"""
+
+from typing import Dict, List, Tuple
+
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+from app.models.client import BulkItemResult, BulkOperation, BulkResult, ClientModel, SERVER_FIELDS
+from app.services.search import search_keys
+from app.utils.helpers import utc_now
+
+NOT_FOUND = "Client non trouvé"
+
+
+# Données de l'événement d'un client écrit (valeurs par défaut du modèle comprises)
+def _event_payload(document: dict, client_id: ObjectId) -> dict:
+    fields = {key: value for key, value in document.items() if key != "_id"}
+    return {**ClientModel(**fields).model_dump(exclude={"id"}), "_id": str(client_id)}
+
+
+class BulkPlan:
+    """Opérations validées d'une requête bulk et leur résultat, élément par élément."""
+
+    def __init__(self, operations: List[BulkOperation]):
+        self.operations = operations
+        self._validation_errors: Dict[int, BulkItemResult] = {}
+        self.items = []
+        for index, operation in enumerate(operations):
+            try:
+                self.items.append(self._validate(index, operation))
+            except ValueError as exc:  # inclut les ValidationError de Pydantic
+                self._validation_errors[index] = self._error(index, operation.op, operation.id, exc)
+        self._errors = dict(self._validation_errors)
+        self._pending = []
+
+    @staticmethod
+    def _validate(index: int, operation: BulkOperation):
+        if operation.op == "create":
+            document = ClientModel(**(operation.data or {})).model_dump(
+                by_alias=True, exclude_unset=True, exclude=SERVER_FIELDS
+            )
+            if document.get("_id") is None:
+                document["_id"] = ObjectId()
+            return index, "create", document["_id"], document
+        if not operation.id or not ObjectId.is_valid(operation.id):
+            raise ValueError("Identifiant invalide")
+        if operation.op == "update":
+            update = ClientModel(**(operation.data or {})).model_dump(
+                by_alias=True, exclude_unset=True, exclude=SERVER_FIELDS
+            )
+            update.pop("_id", None)
+            return index, "update", ObjectId(operation.id), update
+        return index, "delete", ObjectId(operation.id), None
+
+    @staticmethod
+    def _error(index, op, client_id, error) -> BulkItemResult:
+        return BulkItemResult(
+            index=index, op=op, status="error",
+            id=str(client_id) if client_id else None, error=str(error),
+        )
+
+    def target_ids(self) -> List[ObjectId]:
+        """Identifiants dont l'existence doit être vérifiée (update / delete)."""
+        return [client_id for _, op, client_id, _ in self.items if op != "create"]
+
+    def build_requests(self, existing_ids) -> list:
+        """Requêtes bulk_write ; les update/delete sur un client absent sont rejetés."""
+        self._errors = dict(self._validation_errors)
+        self._pending = []
+        requests = []
+        now = utc_now()
+        for index, op, client_id, payload in self.items:
+            if op != "create" and client_id not in existing_ids:
+                self._errors[index] = self._error(index, op, client_id, NOT_FOUND)
+                continue
+            if op == "create":
+                payload.update(search_keys(payload), version=1, updated_at=now)
+                requests.append(InsertOne(dict(payload)))
+            elif op == "update":
+                requests.append(UpdateOne(
+                    {"_id": client_id},
+                    {"$set": {**payload, **search_keys(payload), "updated_at": now}, "$inc": {"version": 1}},
+                ))
+            else:
+                requests.append(DeleteOne({"_id": client_id}))
+            self._pending.append((index, op, client_id, payload))
+        return requests
+
+    def apply_write_errors(self, write_errors: List[dict]):
+        """Reporte les erreurs du bulk_write (indexées sur la liste des requêtes)."""
+        for write_error in write_errors:
+            index, op, client_id, _ = self._pending[write_error["index"]]
+            self._errors[index] = self._error(index, op, client_id, write_error.get("errmsg", "Erreur d'écriture"))
+
+    def updated_ids(self) -> List[ObjectId]:
+        return [client_id for index, op, client_id, _ in self._pending
+                if op == "update" and index not in self._errors]
+
+    def finish(self, updated_docs: List[dict]) -> Tuple[BulkResult, List[Tuple[str, dict]]]:
+        """Résultat par opération et événements à publier pour les écritures réussies."""
+        updated = {doc["_id"]: doc for doc in updated_docs}
+        results = dict(self._errors)
+        events = []
+        counts = {"create": 0, "update": 0, "delete": 0}
+        for index, op, client_id, payload in self._pending:
+            if index in results:
+                continue
+            if op == "create":
+                events.append(("client_created", _event_payload(payload, client_id)))
+            elif op == "update":
+                doc = updated.get(client_id)
+                if doc is None:  # supprimé entre-temps
+                    results[index] = self._error(index, op, client_id, NOT_FOUND)
+                    continue
+                events.append(("client_updated", _event_payload(doc, client_id)))
+            else:
+                events.append(("client_deleted", {"_id": str(client_id)}))
+            counts[op] += 1
+            results[index] = BulkItemResult(index=index, op=op, status="ok", id=str(client_id))
+        ordered = [results[index] for index in sorted(results)]
+        result = BulkResult(
+            created=counts["create"], updated=counts["update"], deleted=counts["delete"],
+            errors=sum(1 for item in ordered if item.status == "error"), results=ordered,
+        )
+        return result, events
@@ -0,0 +1,155 @@
+"""Cache de lecture des clients (GET /clients/{id}).
+
+Backend en mémoire (LRU borné avec TTL) par défaut, ou Redis partagé entre
+réplicas. Les entrées sont invalidées par les écritures locales et par les
+événements client_updated / client_deleted reçus de RabbitMQ.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from bson import ObjectId
+from prometheus_client import Counter
+
+from app.config import settings
+from app.db.tenancy import current_tenant
+from app.utils.helpers import json_default
+
+logger = logging.getLogger(__name__)
+
+CACHE_EVENTS = Counter(
+    "client_cache_events_total", "Accès au cache des clients", ["backend", "result"]
+)
+
+
+class LRUCache:
+    """Cache LRU thread-safe, borné en nombre d'entrées, avec expiration par TTL."""
+
+    backend = "memory"
+
+    def __init__(self, max_size: int = None, ttl: float = None, clock=time.monotonic):
+        self.max_size = max_size or settings.CLIENT_CACHE_MAX_SIZE
+        self.ttl = settings.CLIENT_CACHE_TTL if ttl is None else ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                CACHE_EVENTS.labels(self.backend, "hit").inc()
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+                CACHE_EVENTS.labels(self.backend, "expired").inc()
+        CACHE_EVENTS.labels(self.backend, "miss").inc()
+        return None
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                CACHE_EVENTS.labels(self.backend, "eviction").inc()
+
+    def delete(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                CACHE_EVENTS.labels(self.backend, "invalidation").inc()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisCache:
+    """Cache partagé entre réplicas ; nécessite le paquet ``redis`` (optionnel)."""
+
+    backend = "redis"
+
+    def __init__(self, url: str = None, ttl: float = None, prefix: str = "clients:"):
+        try:
+            import redis  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("CLIENT_CACHE_BACKEND=redis nécessite le paquet 'redis'") from exc
+        self._redis = redis.Redis.from_url(url or settings.REDIS_URL)
+        self.ttl = settings.CLIENT_CACHE_TTL if ttl is None else ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self._redis.get(self.prefix + key)
+        CACHE_EVENTS.labels(self.backend, "miss" if raw is None else "hit").inc()
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: dict):
+        self._redis.set(self.prefix + key, json.dumps(value, default=json_default), ex=max(int(self.ttl), 1))
+
+    def delete(self, key: str):
+        if self._redis.delete(self.prefix + key):
+            CACHE_EVENTS.labels(self.backend, "invalidation").inc()
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + "*"):
+            self._redis.delete(key)
+
+
+class NullCache:
+    """Cache désactivé (CLIENT_CACHE_BACKEND=none)."""
+
+    backend = "none"
+
+    def get(self, key: str):
+        return None
+
+    def set(self, key: str, value: dict):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def clear(self):
+        pass
+
+
+_BACKENDS = {"memory": LRUCache, "redis": RedisCache, "none": NullCache}
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_client_cache():
+    """Cache partagé du processus, créé selon CLIENT_CACHE_BACKEND."""
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _BACKENDS[settings.CLIENT_CACHE_BACKEND]()
+    return _cache
+
+
+def set_client_cache(cache):
+    """Remplace le cache du processus (tests, benchmarks)."""
+    global _cache  # pylint: disable=global-statement
+    _cache = cache
+
+
+# Clé de cache d'un client : forme canonique de son ObjectId, préfixée par le tenant courant
+def cache_key(client_id) -> str:
+    client_id = str(client_id)
+    key = str(ObjectId(client_id)) if ObjectId.is_valid(client_id) else client_id
+    tenant = current_tenant()
+    return key if tenant is None else f"{tenant}:{key}"
+
+
+# Invalide un client après une écriture ou à la réception d'un événement
+def invalidate_client(client_id):
+    get_client_cache().delete(cache_key(client_id))
@@ -1,51 +1,399 @@
+import logging
+import re
+from itertools import islice
+from datetime import datetime
 from typing import List, Optional
-from app.models.client import ClientModel, PyObjectId
-from app.db.mongo import clients_collection
+from pymongo import IndexModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from app.config import settings
+from app.models.client import (
+    BulkOperation, ClientModel, ClientPage, SERVER_FIELDS, client_document, construct_client, PyObjectId
+)
+from app.db.mongo import clients_collection, idempotency_collection, get_client as get_mongo_client
+from app.messaging.outbox import enqueue_event, enqueue_events
+from app.services.bulk import BulkPlan
+from app.services.cache import cache_key, get_client_cache, invalidate_client
+from app.services.search import (
+    BACKFILL_FILTER, BACKFILL_UPDATE, INDEX_NOT_FOUND, SEARCH_INDEXES, SearchPlan, TextIndexMissingError,
+    search_index, search_keys
+)
+from app.services.idempotency import idempotency_indexes
+from app.utils.helpers import decode_cursor, encode_cursor, to_naive_utc, utc_now
+from app.utils.singleflight import SingleFlight
+from app.utils.timing import timed_stage
 from bson import ObjectId
 
+# Champs qu'un appelant peut demander via "fields" (l'_id est toujours renvoyé)
+PROJECTABLE_FIELDS = tuple(name for name in ClientModel.model_fields if name != "id")
+# Jeux de champs prédéfinis du paramètre "view" (None : document complet)
+VIEWS = {"full": None, "summary": ["name", "email", "company", "is_active"]}
+
+logger = logging.getLogger(__name__)
+
+# Lectures par ID en cours : les appels simultanés sur un même client partagent la requête
+client_lookups = SingleFlight("get_client")
+
+class VersionConflictError(Exception):
+    """If-Match : le client existe mais sa version ne correspond plus."""
+
+class DuplicateEmailsError(RuntimeError):
+    """Emails portés par plusieurs clients : l'index unique sur l'email ne peut pas être créé."""
+
+    def __init__(self, emails: List[str]):
+        self.emails = emails
+        super().__init__(
+            "Emails en double en base, à fusionner ou corriger avant la création de l'index unique : "
+            + ", ".join(emails)
+        )
+
+# Exécute une écriture ; en mode outbox, dans une transaction (MONGO_TRANSACTIONS, exigé au
+# démarrage par create_app) pour que le client et son événement soient écrits ensemble
+def _write(operation):
+    if settings.EVENTS_MODE == "outbox" and settings.MONGO_TRANSACTIONS:
+        with get_mongo_client().start_session() as session:
+            return session.with_transaction(operation)
+    return operation(None)
+
+# Enregistre l'événement dans l'outbox si ce mode est actif
+def _emit(queue: str, payload: dict, session=None):
+    if settings.EVENTS_MODE == "outbox":
+        enqueue_event(queue, payload, session=session)
+
 # Créer un nouveau client
+@timed_stage("db")
 def create_client(client: ClientModel) -> ClientModel:
-    client_dict = client.model_dump(by_alias=True, exclude_unset=True)
-    result = clients_collection.insert_one(client_dict)
-    client_dict["_id"] = str(result.inserted_id)  # ✅ Corrigé : convertir ObjectId → str
-    return ClientModel(**client_dict)
+    client_dict = client.model_dump(by_alias=True, exclude_unset=True, exclude=SERVER_FIELDS)
 
-# Obtenir un client par ID
-def get_client(client_id: str) -> Optional[ClientModel]:
+    def operation(session):
+        document = {**client_dict, **search_keys(client_dict), "version": 1, "updated_at": utc_now()}
+        result = clients_collection.insert_one(document, session=session)
+        document["_id"] = str(result.inserted_id)  # ✅ Corrigé : convertir ObjectId → str
+        created = ClientModel(**document)
+        _emit("client_created", created.model_dump(), session)
+        return created
+
+    created = _write(operation)
+    search_index.invalidate()
+    return created
+
+# Document d'un client, lu au travers du cache
+@timed_stage("db")
+def get_client_document(client_id: str) -> Optional[dict]:
     if not ObjectId.is_valid(client_id):
         return None
+    key = cache_key(client_id)
+    cache = get_client_cache()
+    document = cache.get(key)
+    if document is None:
+        if settings.SINGLE_FLIGHT_ENABLED:
+            return client_lookups.do(key, _load_client_document, client_id, key)
+        return _load_client_document(client_id, key)
+    return document
+
+# Lecture en base d'un client absent du cache, mis en cache ensuite
+def _load_client_document(client_id: str, key: str) -> Optional[dict]:
     client_data = clients_collection.find_one({"_id": ObjectId(client_id)})
-    if client_data:
-        client_data["_id"] = str(client_data["_id"])  # ✅ Corrigé ici aussi
-        return ClientModel(**client_data)
-    return None
+    if not client_data:
+        return None
+    document = client_document(client_data)
+    get_client_cache().set(key, document)
+    return document
+
+# Obtenir un client par ID
+def get_client(client_id: str) -> Optional[ClientModel]:
+    document = get_client_document(client_id)
+    if document is None:
+        return None
+    return construct_client(document) if settings.READ_FAST_PATH else ClientModel(**document)
+
+# Document Mongo → ClientModel, sans revalidation si READ_FAST_PATH est actif
+def to_client(doc: dict) -> ClientModel:
+    document = client_document(doc)
+    return construct_client(document) if settings.READ_FAST_PATH else ClientModel(**document)
 
 # Lister tous les clients
+@timed_stage("db")
 def list_clients() -> List[ClientModel]:
     clients = []
     for doc in clients_collection.find():
-        doc["_id"] = str(doc["_id"])  # ✅ Corrigé pour chaque document
-        clients.append(ClientModel(**doc))
+        clients.append(to_client(doc))
     return clients
 
-# Mettre à jour un client
-def update_client(client_id: str, client: ClientModel) -> Optional[ClientModel]:
+# Construit filtre, projection et limite d'une page de clients (partagé avec la version async)
+def build_list_query(limit: Optional[int] = None, cursor: Optional[str] = None,
+                     is_active: Optional[bool] = None, company: Optional[str] = None,
+                     email_prefix: Optional[str] = None, fields: Optional[List[str]] = None,
+                     updated_since: Optional[datetime] = None):
+    query = {}
+    if cursor:
+        query["_id"] = {"$gt": decode_cursor(cursor)}
+    if is_active is not None:
+        # is_active absent en base vaut True (valeur par défaut du modèle)
+        query["is_active"] = {"$ne": False} if is_active else False
+    if company is not None:
+        query["company"] = company
+    if email_prefix:
+        query["email"] = {"$regex": "^" + re.escape(email_prefix)}
+    if updated_since is not None:
+        # Deltas pour les clients qui interrogent périodiquement la liste ; une suppression ne
+        # laisse pas de document : elle n'apparaît pas ici (événement client_deleted)
+        query["updated_at"] = {"$gt": to_naive_utc(updated_since)}
+    projection = {name: 1 for name in check_fields(fields)} if fields else None
+    limit = min(limit or settings.LIST_DEFAULT_LIMIT, settings.LIST_MAX_LIMIT)
+    return query, projection, limit
+
+# Vérifie les champs demandés via "fields"
+def check_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    unknown = set(fields or ()) - set(PROJECTABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Champs inconnus : {', '.join(sorted(unknown))}")
+    return fields
+
+# Champs à renvoyer : ceux demandés explicitement (fields), sinon ceux de la vue
+def view_fields(view: str = "full", fields: Optional[List[str]] = None) -> Optional[List[str]]:
+    if view not in VIEWS:
+        raise ValueError(f"Vue inconnue : {view}")
+    return fields or VIEWS[view]
+
+# Convertit un document Mongo en élément de page (valeurs par défaut du modèle comprises)
+def to_page_item(doc: dict, fields: Optional[List[str]] = None) -> dict:
+    client_id = str(doc["_id"])
+    if fields:
+        item = {name: doc.get(name, ClientModel.model_fields[name].default) for name in fields}
+    elif settings.READ_FAST_PATH:
+        return client_document(doc)
+    else:
+        doc["_id"] = client_id
+        item = ClientModel(**doc).model_dump(exclude={"id"})
+    return {"_id": client_id, **item}
+
+# Assemble la page : un document de plus que la limite indique qu'il reste une page
+def build_page(docs: list, limit: int, fields: Optional[List[str]] = None) -> ClientPage:
+    next_cursor = encode_cursor(docs[limit - 1]["_id"]) if len(docs) > limit else None
+    return ClientPage(items=[to_page_item(doc, fields) for doc in docs[:limit]], next_cursor=next_cursor)
+
+# Lister une page de clients (pagination par clé sur _id)
+@timed_stage("db")
+def list_clients_page(limit: Optional[int] = None, cursor: Optional[str] = None,
+                      is_active: Optional[bool] = None, company: Optional[str] = None,
+                      email_prefix: Optional[str] = None, fields: Optional[List[str]] = None,
+                      updated_since: Optional[datetime] = None) -> ClientPage:
+    query, projection, limit = build_list_query(
+        limit, cursor, is_active, company, email_prefix, fields, updated_since
+    )
+    docs = list(clients_collection.find(query, projection, sort=[("_id", 1)], limit=limit + 1))
+    return build_page(docs, limit, fields)
+
+# Parcourt les clients par lots de batch_size documents, lus depuis un curseur Mongo.
+# Le filtre est construit immédiatement pour que les paramètres invalides échouent avant le flux.
+def iter_client_batches(is_active: Optional[bool] = None, company: Optional[str] = None,
+                        email_prefix: Optional[str] = None, fields: Optional[List[str]] = None,
+                        batch_size: Optional[int] = None):
+    query, projection, _ = build_list_query(None, None, is_active, company, email_prefix, fields)
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    cursor = clients_collection.find(query, projection, sort=[("_id", 1)], batch_size=batch_size)
+
+    def batches():
+        batch = []
+        for doc in cursor:
+            batch.append(to_page_item(doc, fields))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return batches()
+
+# Page d'une recherche : documents classés, déjà lus avec un élément de plus que la limite
+def search_page(plan: SearchPlan, docs: list, fields: Optional[List[str]] = None,
+                next_cursor: Optional[str] = None) -> ClientPage:
+    items = [to_page_item(dict(doc), fields) for doc in docs[:plan.limit]]
+    return ClientPage(items=items, next_cursor=next_cursor or plan.offset_cursor(len(docs)))
+
+# Rechercher des clients par préfixe ou plein texte (voir app.services.search)
+@timed_stage("db")
+def search_clients(q: str, mode: str = "prefix", field: str = "all", limit: Optional[int] = None,
+                   cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> ClientPage:
+    plan = SearchPlan(q, mode, field, limit, cursor)
+    check_fields(fields)
+    if settings.SEARCH_BACKEND == "memory":
+        if search_index.stale():
+            search_index.build(clients_collection.find())
+        matches = islice(search_index.search(q, plan.fields), plan.offset, plan.offset + plan.limit + 1)
+        return search_page(plan, list(matches), fields)
+    projection = plan.projection(fields)
+    if mode == "text":
+        try:
+            docs = list(clients_collection.find(
+                plan.text_query(), projection, sort=plan.text_sort(), skip=plan.offset, limit=plan.limit + 1
+            ))
+        except OperationFailure as exc:
+            if exc.code == INDEX_NOT_FOUND:
+                raise TextIndexMissingError(str(exc)) from exc
+            raise
+        return search_page(plan, docs, fields)
+    ranked = []
+    for position, query, sort in plan.prefix_queries():
+        docs = clients_collection.find(query, projection, sort=sort, limit=plan.limit + 1 - len(ranked))
+        ranked.extend((position, doc) for doc in docs)
+        if len(ranked) > plan.limit:
+            break
+    return search_page(plan, [doc for _, doc in ranked], fields, plan.prefix_cursor(ranked))
+
+# Index déclarés, créés au démarrage : filtres de la pagination, deltas, unicité de l'email
+# et recherche
+CLIENT_INDEXES = [
+    IndexModel([("is_active", 1), ("_id", 1)]),
+    IndexModel([("company", 1), ("_id", 1)]),
+    IndexModel([("updated_at", 1)]),
+    IndexModel([("email", 1)], unique=True),
+    *SEARCH_INDEXES,
+]
+
+# Index existants dont l'unicité diffère de la déclaration (ancien index email non unique) :
+# MongoDB refuse de les recréer tant qu'ils ne sont pas supprimés
+def stale_indexes(existing: dict) -> List[str]:
+    stale = []
+    for index in CLIENT_INDEXES:
+        name = index.document["name"]
+        if name in existing and existing[name].get("unique", False) != index.document.get("unique", False):
+            stale.append(name)
+    return stale
+
+# Emails portés par plusieurs clients (les premiers, par ordre alphabétique)
+DUPLICATE_EMAILS_PIPELINE = [
+    {"$group": {"_id": "$email", "count": {"$sum": 1}}},
+    {"$match": {"count": {"$gt": 1}}},
+    {"$sort": {"_id": 1}},
+    {"$limit": 20},
+]
+
+# Index uniques à (re)créer : absents, ou présents sans l'unicité déclarée
+def missing_unique_indexes(existing: dict) -> List[str]:
+    return [index.document["name"] for index in CLIENT_INDEXES
+            if index.document.get("unique") and not existing.get(index.document["name"], {}).get("unique")]
+
+@timed_stage("db")
+def ensure_indexes():
+    """Calcule les clés de recherche manquantes puis crée chaque index séparément : un index
+    refusé n'empêche pas les autres. Lève DuplicateEmailsError si des emails en double
+    empêchent l'index unique (l'ancien index non unique est alors conservé)."""
+    clients_collection.update_many(BACKFILL_FILTER, BACKFILL_UPDATE)
+    idempotency_collection.create_indexes(idempotency_indexes())
+    existing = clients_collection.index_information()
+    duplicates = []
+    if missing_unique_indexes(existing):
+        duplicates = [doc["_id"] for doc in clients_collection.aggregate(DUPLICATE_EMAILS_PIPELINE)]
+    stale = stale_indexes(existing)
+    for index in CLIENT_INDEXES:
+        name = index.document["name"]
+        if duplicates and index.document.get("unique"):
+            continue
+        try:
+            if name in stale:
+                clients_collection.drop_index(name)
+            clients_collection.create_indexes([index])
+        except DuplicateKeyError:
+            # Doublon écrit entre la vérification et la création
+            duplicates = [doc["_id"] for doc in clients_collection.aggregate(DUPLICATE_EMAILS_PIPELINE)]
+        except OperationFailure as exc:
+            logger.warning("[MongoDB] Index %s non créé : %s", name, exc)
+    if duplicates:
+        raise DuplicateEmailsError(duplicates)
+
+# Filtre et modification d'une mise à jour : version incrémentée, et vérifiée si If-Match
+# a été fourni (un document sans version est en version 0)
+def build_update(client_id: str, update_data: dict, expected_versions: Optional[List[int]] = None):
+    query = {"_id": ObjectId(client_id)}
+    if expected_versions is not None:
+        query["version"] = {"$in": [*expected_versions, *([None] if 0 in expected_versions else [])]}
+    return query, {
+        "$set": {**update_data, **search_keys(update_data), "updated_at": utc_now()},
+        "$inc": {"version": 1},
+    }
+
+# Mettre à jour un client ; expected_versions : versions acceptées (If-Match)
+@timed_stage("db")
+def update_client(client_id: str, client: ClientModel,
+                  expected_versions: Optional[List[int]] = None) -> Optional[ClientModel]:
     if not ObjectId.is_valid(client_id):
         return None
-    update_data = client.model_dump(by_alias=True, exclude_unset=True)
-    updated = clients_collection.find_one_and_update(
-        {"_id": ObjectId(client_id)},
-        {"$set": update_data},
-        return_document=True
-    )
-    if updated:
+    update_data = client.model_dump(by_alias=True, exclude_unset=True, exclude=SERVER_FIELDS)
+    query, changes = build_update(client_id, update_data, expected_versions)
+
+    def operation(session):
+        updated = clients_collection.find_one_and_update(
+            query,
+            changes,
+            return_document=True,
+            session=session
+        )
+        if not updated:
+            if expected_versions is not None and clients_collection.count_documents(
+                    {"_id": query["_id"]}, limit=1, session=session):
+                raise VersionConflictError(client_id)
+            return None
         updated["_id"] = str(updated["_id"])  # ✅ Corrigé
-        return ClientModel(**updated)
-    return None
+        result = ClientModel(**updated)
+        _emit("client_updated", result.model_dump(), session)
+        return result
+
+    result = _write(operation)
+    if result is not None:
+        invalidate_client(client_id)
+        search_index.invalidate()
+    return result
 
 # Supprimer un client
+@timed_stage("db")
 def delete_client(client_id: str) -> bool:
     if not ObjectId.is_valid(client_id):
         return False
-    result = clients_collection.delete_one({"_id": ObjectId(client_id)})
-    return result.deleted_count == 1
+
+    def operation(session):
+        result = clients_collection.delete_one({"_id": ObjectId(client_id)}, session=session)
+        if result.deleted_count != 1:
+            return False
+        _emit("client_deleted", {"_id": client_id}, session)
+        return True
+
+    deleted = _write(operation)
+    if deleted:
+        invalidate_client(client_id)
+        search_index.invalidate()
+    return deleted
+
+# Écritures groupées : validation en une passe puis un seul bulk_write non ordonné.
+# Retourne le résultat par opération et les événements (queue, données) à publier.
+@timed_stage("db")
+def bulk_write_clients(operations: List[BulkOperation]):
+    plan = BulkPlan(operations)
+
+    def operation(session):
+        target_ids = plan.target_ids()
+        existing = {
+            doc["_id"] for doc in clients_collection.find({"_id": {"$in": target_ids}}, {"_id": 1}, session=session)
+        } if target_ids else set()
+        requests = plan.build_requests(existing)
+        if requests:
+            try:
+                clients_collection.bulk_write(requests, ordered=False, session=session)
+            except BulkWriteError as exc:
+                plan.apply_write_errors(exc.details.get("writeErrors", []))
+        updated_ids = plan.updated_ids()
+        updated_docs = list(
+            clients_collection.find({"_id": {"$in": updated_ids}}, session=session)
+        ) if updated_ids else []
+        result, events = plan.finish(updated_docs)
+        if settings.EVENTS_MODE == "outbox":
+            enqueue_events(events, session=session)
+        return result, events
+
+    result, events = _write(operation)
+    for queue, payload in events:
+        if queue != "client_created":
+            invalidate_client(payload["_id"])
+    if events:
+        search_index.invalidate()
+    return result, events
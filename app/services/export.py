@@ -0,0 +1,99 @@
+"""Encodage incrémental des exports clients (NDJSON / CSV, gzip optionnel).
+
+Les documents arrivent par lots depuis le curseur Mongo ; chaque lot est encodé
+(et compressé) puis envoyé avant que le suivant ne soit lu.
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+from app.config import settings
+from app.utils.helpers import json_default
+from app.utils.timing import timed
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class NdjsonEncoder:
+    """Une ligne JSON par client."""
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, batch: List[dict]) -> bytes:
+        return "".join(json.dumps(item, ensure_ascii=False, default=json_default) + "\n" for item in batch).encode()
+
+
+class CsvEncoder:
+    """Ligne d'en-tête puis une ligne par client, dans l'ordre des colonnes demandées."""
+
+    def __init__(self, columns: List[str]):
+        self._buffer = io.StringIO()
+        self._writer = csv.DictWriter(self._buffer, fieldnames=columns, extrasaction="ignore")
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writeheader()
+        return self._drain()
+
+    def encode(self, batch: List[dict]) -> bytes:
+        self._writer.writerows(batch)
+        return self._drain()
+
+
+def make_encoder(export_format: str, columns: List[str]):
+    return CsvEncoder(columns) if export_format == "csv" else NdjsonEncoder()
+
+
+class _Output:
+    """Applique la compression gzip (optionnelle) aux blocs encodés."""
+
+    def __init__(self, gzip: bool):
+        self._compressor = (
+            zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None
+        )
+
+    def write(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) if self._compressor else data
+
+    def close(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+
+# Flux d'octets à partir de lots de documents (chemin synchrone)
+def stream_export(batches: Iterable[List[dict]], encoder, gzip: bool = False) -> Iterator[bytes]:
+    output = _Output(gzip)
+    chunk = output.write(encoder.header())
+    if chunk:
+        yield chunk
+    for batch in batches:
+        with timed("serialization", "export"):
+            chunk = output.write(encoder.encode(batch))
+        if chunk:
+            yield chunk
+    yield output.close()
+
+
+# Flux d'octets à partir de lots de documents (ASYNC_MODE)
+async def astream_export(batches: AsyncIterable[List[dict]], encoder, gzip: bool = False) -> AsyncIterator[bytes]:
+    output = _Output(gzip)
+    chunk = output.write(encoder.header())
+    if chunk:
+        yield chunk
+    async for batch in batches:
+        with timed("serialization", "export"):
+            chunk = output.write(encoder.encode(batch))
+        if chunk:
+            yield chunk
+    yield output.close()
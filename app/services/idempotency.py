@@ -0,0 +1,185 @@
+"""Clés d'idempotence (en-tête ``Idempotency-Key``) des écritures sur /clients.
+
+La première requête portant une clé la réserve dans la collection
+``idempotency_keys`` (clé propre à l'utilisateur, ``sub`` du JWT), puis y
+enregistre sa réponse. Une nouvelle tentative avec la même clé rejoue cette
+réponse sans refaire l'écriture ni republier l'événement. Les réponses sont
+gardées ``IDEMPOTENCY_TTL_SECONDS`` secondes (index TTL).
+
+* même clé, requête différente : 422 ;
+* même clé, première requête encore en cours : 409 ;
+* échec de la première requête : la réservation est libérée, la tentative
+  suivante s'exécute normalement ;
+* processus arrêté pendant la requête : la réservation porte un bail
+  (``locked_until``, ``IDEMPOTENCY_LEASE_SECONDS``) ; une fois échu, la tentative
+  suivante la reprend.
+"""
+
+import hashlib
+import json
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+from typing import Optional
+
+from bson import ObjectId
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.db.tenancy import current_tenant
+from app.utils.helpers import json_default, utc_now
+from app.utils.responses import FastJSONResponse
+from app.utils.singleflight import DEDUPLICATED_REQUESTS
+
+PENDING = "pending"
+DONE = "done"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def idempotency_indexes():
+    return [IndexModel("created_at", expireAfterSeconds=settings.IDEMPOTENCY_TTL_SECONDS)]
+
+
+# Empreinte de la requête : une clé ne peut pas être réutilisée pour une autre écriture
+def request_fingerprint(operation: str, payload=None) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, default=json_default)
+    return hashlib.sha256(f"{operation}\n{body}".encode()).hexdigest()
+
+
+class IdempotentCall:
+    """Écriture protégée par une clé : ``replay`` (réponse déjà enregistrée) ou ``save``."""
+
+    def __init__(self, record_id: Optional[str], fingerprint: Optional[str]):
+        self.record_id = record_id
+        self.fingerprint = fingerprint
+        # Jeton de cette réservation : une requête dont la réservation a été reprise
+        # n'écrase ni ne libère celle de la tentative suivante
+        self.lease = str(ObjectId())
+        self.replay: Optional[Response] = None
+        self.stored: Optional[dict] = None
+
+    def pending_document(self) -> dict:
+        now = utc_now()
+        return {
+            "_id": self.record_id, "fingerprint": self.fingerprint, "status": PENDING, "created_at": now,
+            "lease": self.lease, "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+        }
+
+    def owned_filter(self) -> dict:
+        return {"_id": self.record_id, "lease": self.lease}
+
+    # Réservation reprenable : réponse expirée (l'index TTL ne purge qu'environ une fois
+    # par minute), ou requête en cours dont le bail est échu
+    def takeover_filter(self) -> dict:
+        now = utc_now()
+        cutoff = now - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+        return {"_id": self.record_id, "$or": [
+            {"created_at": {"$lt": cutoff}},
+            {"status": PENDING, "locked_until": {"$not": {"$gte": now}}},
+        ]}
+
+    # Document existant pour la clé : True si la réponse est à rejouer, False s'il peut être repris
+    def resolve(self, existing: Optional[dict]) -> bool:
+        now = utc_now()
+        if existing is None or existing["created_at"] < now - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS):
+            return False
+        if existing["fingerprint"] != self.fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key déjà utilisée pour une autre requête")
+        if existing["status"] != DONE:
+            if existing.get("locked_until") is None or existing["locked_until"] < now:
+                return False
+            raise HTTPException(status_code=409, detail="Requête déjà en cours pour cette Idempotency-Key")
+        DEDUPLICATED_REQUESTS.labels("idempotency").inc()
+        headers = {**existing.get("headers", {}), REPLAYED_HEADER: "true"}
+        if existing.get("body") is None:
+            self.replay = Response(status_code=existing["status_code"], headers=headers)
+        else:
+            self.replay = FastJSONResponse(existing["body"], status_code=existing["status_code"], headers=headers)
+        return True
+
+    def save(self, status_code: int, content=None, headers: Optional[dict] = None):
+        """Enregistre la réponse (écrite au retour du bloc) ; retourne ``content`` inchangé."""
+        if self.record_id is not None:
+            self.stored = {
+                "status": DONE, "status_code": status_code, "headers": dict(headers or {}),
+                "body": None if content is None else jsonable_encoder(content),
+            }
+        return content
+
+
+def _call(key: Optional[str], user: dict, operation: str, payload) -> IdempotentCall:
+    if not key or not settings.IDEMPOTENCY_ENABLED:
+        return IdempotentCall(None, None)
+    if len(key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key trop longue (255 caractères au plus)")
+    # Clé propre à l'utilisateur et à son tenant
+    owner = ":".join(filter(None, (current_tenant(), user.get("sub", ""))))
+    return IdempotentCall(f"{owner}:{key}", request_fingerprint(operation, payload))
+
+
+@contextmanager
+def idempotent(key: Optional[str], user: dict, operation: str, payload=None, collection=None):
+    """Sans clé, le bloc s'exécute simplement ; sinon réservation, rejeu ou enregistrement."""
+    call = _call(key, user, operation, payload)
+    if call.record_id is None:
+        yield call
+        return
+    if collection is None:
+        from app.db.mongo import idempotency_collection as collection  # pylint: disable=import-outside-toplevel
+    for _attempt in range(2):
+        try:
+            collection.insert_one(call.pending_document())
+            break
+        except DuplicateKeyError:
+            if call.resolve(collection.find_one({"_id": call.record_id})):
+                yield call
+                return
+            # Réservation expirée ou bail échu : reprise, par une seule des tentatives simultanées
+            if collection.replace_one(call.takeover_filter(), call.pending_document()).matched_count:
+                break
+    else:
+        raise HTTPException(status_code=409, detail="Requête déjà en cours pour cette Idempotency-Key")
+    try:
+        yield call
+    except BaseException:
+        collection.delete_one({**call.owned_filter(), "status": PENDING})
+        raise
+    if call.stored is None:
+        collection.delete_one({**call.owned_filter(), "status": PENDING})
+    else:
+        collection.update_one(call.owned_filter(), {"$set": call.stored})
+
+
+@asynccontextmanager
+async def aidempotent(key: Optional[str], user: dict, operation: str, payload=None, collection=None):
+    """Version asynchrone de ``idempotent`` (ASYNC_MODE)."""
+    call = _call(key, user, operation, payload)
+    if call.record_id is None:
+        yield call
+        return
+    if collection is None:
+        from app.db.mongo_async import idempotency_collection as collection  # pylint: disable=import-outside-toplevel
+    for _attempt in range(2):
+        try:
+            await collection.insert_one(call.pending_document())
+            break
+        except DuplicateKeyError:
+            if call.resolve(await collection.find_one({"_id": call.record_id})):
+                yield call
+                return
+            if (await collection.replace_one(call.takeover_filter(), call.pending_document())).matched_count:
+                break
+    else:
+        raise HTTPException(status_code=409, detail="Requête déjà en cours pour cette Idempotency-Key")
+    try:
+        yield call
+    except BaseException:
+        await collection.delete_one({**call.owned_filter(), "status": PENDING})
+        raise
+    if call.stored is None:
+        await collection.delete_one({**call.owned_filter(), "status": PENDING})
+    else:
+        await collection.update_one(call.owned_filter(), {"$set": call.stored})
@@ -0,0 +1,223 @@
+"""Recherche de clients (GET /clients/search) par préfixe ou plein texte.
+
+Backend "mongo" (par défaut) :
+  * préfixe : regex ancrée sur les copies en minuscules ``name_lc``, ``company_lc``
+    et ``email_lc`` (écrites avec le client, indexées avec ``_id``) : parcours
+    d'index borné. Classement par champ (nom, puis société, puis email), puis par
+    valeur ; pagination par clé ;
+  * texte : index texte pondéré (nom > société > email), classement par score,
+    pagination par décalage bornée par ``SEARCH_MAX_OFFSET``.
+Backend "memory" : index de préfixes trié, en mémoire, pour les petits volumes ;
+reconstruit depuis la collection après une écriture ou ``SEARCH_MEMORY_TTL`` secondes.
+"""
+
+import base64
+import json
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterator, List, Optional
+
+from bson import ObjectId
+from pymongo import TEXT, IndexModel
+
+from app.config import settings
+from app.db.tenancy import current_tenant
+
+SEARCH_FIELDS = ("name", "company", "email")
+# Poids des champs dans l'index texte
+WEIGHTS = {"name": 10, "company": 5, "email": 2}
+TEXT_INDEX = "clients_text"
+# Code d'erreur MongoDB d'une requête $text sans index texte
+INDEX_NOT_FOUND = 27
+
+_WORD = re.compile(r"[^\w]+")
+
+
+class TextIndexMissingError(Exception):
+    """Recherche plein texte alors que l'index texte n'existe pas (encore) dans la partition."""
+
+
+def lower_key(field: str) -> str:
+    return f"{field}_lc"
+
+
+# Copies en minuscules des champs recherchables présents dans des données à écrire
+def search_keys(data: dict) -> dict:
+    return {
+        lower_key(field): data[field].lower() if isinstance(data[field], str) else None
+        for field in SEARCH_FIELDS if field in data
+    }
+
+
+SEARCH_INDEXES = [
+    *(IndexModel([(lower_key(field), 1), ("_id", 1)]) for field in SEARCH_FIELDS),
+    IndexModel([(field, TEXT) for field in SEARCH_FIELDS], weights=WEIGHTS,
+               default_language="none", name=TEXT_INDEX),
+]
+
+# Documents écrits avant la recherche : copies en minuscules calculées en base
+BACKFILL_FILTER = {lower_key("name"): {"$exists": False}}
+BACKFILL_UPDATE = [{"$set": {lower_key(field): {"$toLower": f"${field}"} for field in SEARCH_FIELDS}}]
+
+
+def encode_search_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode((cursor + "=" * (-len(cursor) % 4)).encode()))
+        if not isinstance(state, dict):
+            raise ValueError(cursor)
+        return state
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Curseur invalide") from exc
+
+
+class SearchPlan:
+    """Requêtes Mongo d'une recherche et assemblage de la page de résultats."""
+
+    def __init__(self, q: str, mode: str = "prefix", field: str = "all", limit: int = None,
+                 cursor: Optional[str] = None):
+        self.prefix = q.strip().lower()
+        if not self.prefix:
+            raise ValueError("Recherche vide")
+        self.mode = mode
+        self.fields = SEARCH_FIELDS if field == "all" else (field,)
+        self.limit = min(limit or settings.LIST_DEFAULT_LIMIT, settings.LIST_MAX_LIMIT)
+        self.state = decode_search_cursor(cursor) if cursor else {}
+        self.offset = int(self.state.get("o", 0))
+        if self.offset > settings.SEARCH_MAX_OFFSET:
+            raise ValueError("Décalage maximal atteint : affinez la recherche")
+
+    def projection(self, fields: Optional[List[str]]) -> Optional[dict]:
+        projection = {name: 1 for name in fields} if fields else None
+        if self.mode == "text":
+            return {**(projection or {}), "score": {"$meta": "textScore"}}
+        if projection is not None:
+            projection.update({lower_key(field): 1 for field in self.fields})
+        return projection
+
+    # -- Préfixe --------------------------------------------------------------------
+
+    def prefix_queries(self):
+        """(position, filtre, tri) de chaque champ, à partir de celui du curseur."""
+        pattern = re.compile("^" + re.escape(self.prefix))
+        start = int(self.state.get("f", 0))
+        for position in range(start, len(self.fields)):
+            key = lower_key(self.fields[position])
+            conditions = [{key: pattern}]
+            # Un client trouvé par un champ mieux classé n'est pas renvoyé une seconde fois
+            conditions.extend({lower_key(earlier): {"$not": pattern}} for earlier in self.fields[:position])
+            if position == start and "k" in self.state:
+                last_key, last_id = self.state["k"], ObjectId(self.state["id"])
+                conditions.append({"$or": [
+                    {key: {"$gt": last_key}},
+                    {key: last_key, "_id": {"$gt": last_id}},
+                ]})
+            query = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+            yield position, query, [(key, 1), ("_id", 1)]
+
+    def prefix_cursor(self, ranked: list) -> Optional[str]:
+        """ranked : (position, document) dans l'ordre ; un élément de plus que la limite."""
+        if len(ranked) <= self.limit:
+            return None
+        position, last = ranked[self.limit - 1]
+        return encode_search_cursor({
+            "f": position, "k": last[lower_key(self.fields[position])], "id": str(last["_id"]),
+        })
+
+    # -- Texte ------------------------------------------------------------------------
+
+    def text_query(self) -> dict:
+        return {"$text": {"$search": self.prefix}}
+
+    @staticmethod
+    def text_sort() -> list:
+        return [("score", {"$meta": "textScore"}), ("_id", 1)]
+
+    def offset_cursor(self, count: int) -> Optional[str]:
+        if count <= self.limit:
+            return None
+        return encode_search_cursor({"o": self.offset + self.limit})
+
+
+class MemorySearchIndex:
+    """Index de préfixes : par champ, liste triée des (jeton, _id) de chaque mot et valeur complète.
+
+    Un préfixe se cherche par dichotomie puis lecture des jetons contigus. Les
+    résultats sont produits au fil de l'eau, par champ (nom, société, email) et,
+    pour chacun, jetons égaux au préfixe d'abord : une page ne lit que ce qu'elle
+    renvoie, même pour un préfixe d'un caractère.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, clock=time.monotonic):
+        self.ttl = settings.SEARCH_MEMORY_TTL if ttl is None else ttl
+        self._clock = clock
+        self._tokens = {field: [] for field in SEARCH_FIELDS}
+        self._documents = {}
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def stale(self) -> bool:
+        return self._built_at is None or self._clock() - self._built_at > self.ttl
+
+    def invalidate(self):
+        self._built_at = None
+
+    def build(self, documents):
+        tokens, by_id = {field: [] for field in SEARCH_FIELDS}, {}
+        for document in documents:
+            by_id[document["_id"]] = document
+            for field in SEARCH_FIELDS:
+                value = document.get(field)
+                if isinstance(value, str) and value:
+                    value = value.lower()
+                    tokens[field].extend((token, document["_id"]) for token in {value, *filter(None, _WORD.split(value))})
+        for entries in tokens.values():
+            entries.sort()
+        with self._lock:
+            self._tokens, self._documents, self._built_at = tokens, by_id, self._clock()
+
+    def search(self, q: str, fields=SEARCH_FIELDS) -> Iterator[dict]:
+        """Documents dont un jeton commence par ``q``, du plus pertinent au moins pertinent."""
+        prefix = q.strip().lower()
+        with self._lock:
+            tokens, documents = self._tokens, self._documents
+        seen = set()
+        for field in fields:
+            entries = tokens[field]
+            exact_end = bisect_left(entries, (prefix + "\0",))
+            for exact in (True, False):
+                position = bisect_left(entries, (prefix,)) if exact else exact_end
+                stop = exact_end if exact else len(entries)
+                while position < stop and entries[position][0].startswith(prefix):
+                    client_id = entries[position][1]
+                    position += 1
+                    if client_id not in seen:
+                        seen.add(client_id)
+                        yield documents[client_id]
+
+
+class TenantSearchIndexes:
+    """Un index mémoire par tenant, choisi d'après le tenant de la requête en cours."""
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def current(self) -> MemorySearchIndex:
+        tenant = current_tenant()
+        index = self._indexes.get(tenant)
+        if index is None:
+            with self._lock:
+                index = self._indexes.setdefault(tenant, MemorySearchIndex())
+        return index
+
+    def __getattr__(self, attribute):
+        return getattr(self.current(), attribute)
+
+
+search_index = TenantSearchIndexes()
@@ -0,0 +1,187 @@
+"""Compression négociée des réponses (middleware ASGI).
+
+L'encodage est choisi d'après ``Accept-Encoding`` parmi ``COMPRESSION_ENCODINGS``,
+dans l'ordre de préférence du serveur : ``zstd`` (paquet ``zstandard``) et ``br``
+(paquet ``brotli``) seulement s'ils sont installés, ``gzip`` toujours.
+
+* réponse complète : compressée si elle atteint le seuil de sa route
+  (``COMPRESSION_ROUTES``, préfixe de chemin → taille minimale, négatif pour
+  ne jamais compresser ; ``COMPRESSION_MIN_SIZE`` sinon) ;
+* réponse en flux : chaque morceau est compressé et vidé aussitôt, rien n'est
+  mis en mémoire jusqu'à la fin ;
+* jamais recompressées : réponses déjà encodées (export gzip), flux SSE,
+  204 / 304.
+"""
+
+import zlib
+from typing import List, Optional
+
+from app.config import settings
+
+SKIPPED_MEDIA_TYPES = ("text/event-stream",)
+
+
+class GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        import brotli  # pylint: disable=import-outside-toplevel
+        self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        import zstandard  # pylint: disable=import-outside-toplevel
+        self._zstandard = zstandard
+        self._compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(self._zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Encodage → (compresseur, paquet optionnel requis)
+COMPRESSORS = {
+    "zstd": (ZstdCompressor, "zstandard"),
+    "br": (BrotliCompressor, "brotli"),
+    "gzip": (GzipCompressor, None),
+}
+
+
+def available_encodings(configured: str) -> List[str]:
+    """Encodages configurés dont le paquet est installé, dans l'ordre de préférence."""
+    encodings = []
+    for name in (item.strip() for item in configured.split(",")):
+        if name not in COMPRESSORS:
+            continue
+        package = COMPRESSORS[name][1]
+        if package is not None:
+            try:
+                __import__(package)
+            except ImportError:
+                continue
+        encodings.append(name)
+    return encodings
+
+
+def negotiate(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """Premier encodage du serveur accepté par le client (q > 0), ou None."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for name in encodings:
+        if accepted.get(name, accepted.get("*", 0)) > 0:
+            return name
+    return None
+
+
+# Réponses qui se compressent elles-mêmes en gzip (export en flux) : seulement si la
+# négociation du middleware aurait retenu gzip, sinon celui-ci applique son propre choix
+def prefers_gzip(accept_encoding: str) -> bool:
+    encodings = available_encodings(settings.COMPRESSION_ENCODINGS) if settings.COMPRESSION_ENABLED else ["gzip"]
+    return negotiate(accept_encoding, encodings) == "gzip"
+
+
+def route_min_size(path: str) -> int:
+    matches = [prefix for prefix in settings.COMPRESSION_ROUTES if path.startswith(prefix)]
+    if matches:
+        return settings.COMPRESSION_ROUTES[max(matches, key=len)]
+    return settings.COMPRESSION_MIN_SIZE
+
+
+class CompressionMiddleware:
+    def __init__(self, app, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.encodings = available_encodings(settings.COMPRESSION_ENCODINGS) if encodings is None else encodings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"), self.encodings)
+        min_size = route_min_size(scope["path"])
+        if encoding is None or min_size < 0:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(encoding, min_size, send).run(self.app, scope, receive)
+
+
+class _CompressedResponder:
+    """Retient le début de réponse jusqu'au premier morceau de corps pour décider."""
+
+    def __init__(self, encoding: str, min_size: int, send):
+        self.encoding = encoding
+        self.min_size = min_size
+        self.send = send
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def run(self, app, scope, receive):
+        await app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            if not self._should_compress(start, body, more_body):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressor = COMPRESSORS[self.encoding][0]()
+            headers = [(name, value) for name, value in start["headers"] if name.lower() != b"content-length"]
+            headers += [(b"content-encoding", self.encoding.encode()), (b"vary", b"Accept-Encoding")]
+            if not more_body:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers.append((b"content-length", str(len(body)).encode()))
+                await self.send({**start, "headers": headers})
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send({**start, "headers": headers})
+        chunk = self.compressor.compress(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _should_compress(self, start, body: bytes, more_body: bool) -> bool:
+        if start["status"] in (204, 304) or start["status"] < 200:
+            return False
+        headers = {name.lower(): value for name, value in start["headers"]}
+        if b"content-encoding" in headers:
+            return False
+        if headers.get(b"content-type", b"").decode("latin-1").startswith(SKIPPED_MEDIA_TYPES):
+            return False
+        # Taille connue d'avance (réponse complète) : sous le seuil, rien à gagner
+        return more_body or len(body) >= self.min_size
@@ -0,0 +1,88 @@
+import base64
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import List, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Curseur de pagination opaque : l'_id du dernier document renvoyé, encodé en base64 url-safe
+def encode_cursor(last_id) -> str:
+    return base64.urlsafe_b64encode(ObjectId(last_id).binary).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return ObjectId(base64.urlsafe_b64decode(padded.encode()))
+    except (InvalidId, ValueError, TypeError) as exc:
+        raise ValueError("Curseur invalide") from exc
+
+# Paramètre "fields" d'une requête : "name,email" → ["name", "email"]
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()]
+
+# En-têtes d'un export en flux (nom de fichier, encodage négocié)
+def export_headers(export_format: str, gzip: bool) -> dict:
+    headers = {
+        "Content-Disposition": f'attachment; filename="clients.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return headers
+
+# Valeurs non JSON (dates, ObjectId) pour json.dumps : dates ISO 8601 comme Pydantic et orjson
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+# Date d'écriture en UTC naïf, tronquée à la milliseconde (précision des dates BSON)
+def utc_now() -> datetime:
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+# Date UTC naïve (celle que renvoie pymongo) à partir d'une date éventuellement avec fuseau
+def to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+# ETag d'un client : sa version, incrémentée à chaque écriture (0 pour un document historique)
+def client_etag(document: dict) -> str:
+    return f'"{document.get("version") or 0}"'
+
+# ETag faible d'une réponse calculé sur son contenu (listes)
+def body_etag(body: bytes) -> str:
+    return f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+# En-têtes ETag / Last-Modified d'un client
+def conditional_headers(document: dict) -> dict:
+    headers = {"ETag": client_etag(document)}
+    updated_at = document.get("updated_at")
+    if isinstance(updated_at, str):  # document relu depuis un cache JSON
+        updated_at = datetime.fromisoformat(updated_at)
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+# If-None-Match : vrai si l'un des ETag listés correspond (comparaison faible, "*" compris)
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    current = etag.removeprefix("W/")
+    return any(tag.strip() == "*" or tag.strip().removeprefix("W/") == current for tag in header.split(","))
+
+# If-Match : versions acceptées, None pour "*" ; ValueError si aucun ETag fort n'est exploitable
+def parse_if_match(header: str) -> Optional[List[int]]:
+    versions = []
+    for tag in (tag.strip() for tag in header.split(",")):
+        if tag == "*":
+            return None
+        if len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit():
+            versions.append(int(tag[1:-1]))
+    if not versions:
+        raise ValueError("If-Match invalide")
+    return versions
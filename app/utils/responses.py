@@ -0,0 +1,48 @@
+"""Réponses JSON : sérialisation directe (sans response_model), encodage mesuré et GET conditionnels."""
+
+import json
+from typing import Any, Optional
+
+from starlette.responses import JSONResponse, Response
+
+from app.utils.helpers import body_etag, etag_matches, json_default
+from app.utils.timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson est optionnel
+    orjson = None
+
+
+class FastJSONResponse(Response):
+    """JSON encodé par orjson s'il est installé, sinon par le module json standard."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialization", "json"):
+            if orjson is not None:
+                return orjson.dumps(content)
+            return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse dont l'encodage est mesuré (réponses passant par response_model)."""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialization", "json"):
+            return super().render(content)
+
+
+def not_modified(headers: dict) -> Response:
+    """304 : seuls les en-têtes de validation sont renvoyés."""
+    return Response(status_code=304, headers=headers)
+
+
+def with_body_etag(response: Response, if_none_match: Optional[str]) -> Response:
+    """ETag faible calculé sur le corps déjà encodé ; 304 s'il correspond à If-None-Match."""
+    etag = body_etag(response.body)
+    if etag_matches(if_none_match, etag):
+        return not_modified({"ETag": etag})
+    response.headers["ETag"] = etag
+    return response
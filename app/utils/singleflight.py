@@ -0,0 +1,64 @@
+"""Regroupement des appels identiques simultanés (single-flight).
+
+Le premier appelant d'une clé exécute la fonction ; ceux qui arrivent pendant
+l'exécution attendent et reçoivent le même résultat (ou la même exception) au
+lieu de relancer la requête en base.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from prometheus_client import Counter
+
+DEDUPLICATED_REQUESTS = Counter(
+    "deduplicated_requests_total", "Requêtes servies sans nouvel accès à la base", ["kind"]
+)
+
+
+class SingleFlight:
+    """Version threads (handlers synchrones exécutés dans le threadpool)."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            DEDUPLICATED_REQUESTS.labels(self.kind).inc()
+            return future.result()
+        try:
+            result = function(*args)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Version asyncio (ASYNC_MODE) : l'appel partagé est une tâche de la boucle."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._calls = {}
+
+    async def do(self, key, function, *args):
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(function(*args))
+            task.add_done_callback(lambda _task: self._calls.pop(key, None))
+        else:
+            DEDUPLICATED_REQUESTS.labels(self.kind).inc()
+        # Un appelant annulé n'annule pas l'appel attendu par les autres
+        return await asyncio.shield(task)
@@ -0,0 +1,111 @@
+"""Mesure du temps passé par étape (db, broker, auth, serialization) dans chaque requête.
+
+Chaque mesure alimente l'histogramme ``app_stage_duration_seconds{stage,operation}``,
+ouvre un span OpenTelemetry si ``OTEL_SPANS`` est actif (paquet optionnel) et,
+avec ``SERVER_TIMING`` (débogage uniquement), est renvoyée au client dans
+l'en-tête ``Server-Timing`` de la réponse.
+"""
+
+import inspect
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import List, Optional, Tuple
+
+from prometheus_client import Histogram
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+STAGE_DURATION = Histogram(
+    "app_stage_duration_seconds", "Durée des étapes d'une requête", ["stage", "operation"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+# Mesures de la requête en cours, uniquement quand l'en-tête Server-Timing est demandé
+_request_timings: ContextVar[Optional[List[Tuple[str, str, float]]]] = ContextVar("request_timings", default=None)
+
+_tracer = None
+
+
+def _get_tracer():
+    global _tracer  # pylint: disable=global-statement
+    if _tracer is None:
+        try:
+            from opentelemetry import trace  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            logger.warning("OTEL_SPANS=true nécessite le paquet 'opentelemetry-api' : spans désactivés")
+            settings.OTEL_SPANS = False
+            return None
+        _tracer = trace.get_tracer("clients-api")
+    return _tracer
+
+
+@contextmanager
+def timed(stage: str, operation: str):
+    tracer = _get_tracer() if settings.OTEL_SPANS else None
+    span = tracer.start_as_current_span(f"{stage} {operation}") if tracer is not None else nullcontext()
+    start = time.perf_counter()
+    with span:
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            STAGE_DURATION.labels(stage, operation).observe(duration)
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.append((stage, operation, duration))
+
+
+def timed_stage(stage: str, operation: Optional[str] = None):
+    """Décorateur : mesure chaque appel de la fonction (synchrone ou coroutine)."""
+    def decorator(func):
+        name = operation or func.__name__
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(timings: List[Tuple[str, str, float]], total: float) -> str:
+    entries = [f'{stage};desc="{operation}";dur={duration * 1000:.3f}' for stage, operation, duration in timings]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """Ajoute l'en-tête Server-Timing (étapes mesurées avant l'envoi des en-têtes)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = server_timing_header(timings, time.perf_counter() - start)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
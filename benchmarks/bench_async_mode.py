@@ -0,0 +1,121 @@
+"""Benchmark : handlers synchrones (threadpool) vs ASYNC_MODE à forte concurrence.
+
+Les deux routers sont servis in-process (httpx + ASGITransport). Par défaut la base
+est MONGO_URI ; avec --simulated-latency-ms, mongomock est utilisé et chaque appel
+Mongo subit la latence indiquée (bloquante côté sync, awaitée côté async).
+
+Usage :
+    python -m benchmarks.bench_async_mode --requests 2000 --concurrency 200 --simulated-latency-ms 5
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.routes import clients as sync_routes, clients_async as async_routes
+from app.security.auth import create_access_token
+from app.services import async_client_service, client_service
+
+SEED = {"_id": ObjectId(), "name": "Bench", "email": "bench@example.com", "is_active": True}
+
+
+class SlowCollection:
+    """Délègue à une collection en ajoutant une latence par appel."""
+
+    def __init__(self, collection, latency, is_async):
+        self._collection = collection
+        self._latency = latency
+        self._is_async = is_async
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+        if name == "find" or not callable(method):
+            return method
+        if self._is_async:
+            async def slow_async(*args, **kwargs):
+                await asyncio.sleep(self._latency)
+                return await method(*args, **kwargs)
+            return slow_async
+
+        def slow(*args, **kwargs):
+            time.sleep(self._latency)
+            return method(*args, **kwargs)
+        return slow
+
+
+def build_app(router) -> FastAPI:
+    app = FastAPI()
+    app.include_router(router, prefix="/clients")
+    return app
+
+
+async def run_load(app, client_id, requests, concurrency):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench', 'role': 'admin'})}"}
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(f"/clients/{client_id}", headers=headers)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--simulated-latency-ms", type=float, default=None)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with ExitStack() as stack:
+        if args.simulated_latency_ms is not None:
+            # pylint: disable=import-outside-toplevel
+            import mongomock
+            from mongomock_motor import AsyncMongoMockClient
+            latency = args.simulated_latency_ms / 1000
+            sync_db = mongomock.MongoClient()["bench"]
+            async_db = AsyncMongoMockClient()["bench"]
+            # Données de test identiques dans les deux bases simulées
+            asyncio.run(async_db["clients"].insert_one(dict(SEED)))
+            sync_db["clients"].insert_one(dict(SEED))
+            stack.enter_context(patch.object(
+                client_service, "clients_collection", SlowCollection(sync_db["clients"], latency, False)))
+            stack.enter_context(patch.object(
+                async_client_service, "clients_collection", SlowCollection(async_db["clients"], latency, True)))
+
+        else:
+            client_service.clients_collection.insert_one(dict(SEED))
+        client_id = str(SEED["_id"])
+        try:
+            for label, router in (("sync", sync_routes.router), ("async", async_routes.router)):
+                result = asyncio.run(run_load(build_app(router), client_id, args.requests, args.concurrency))
+                print(f"{label:6s} {result['rps']:9.1f} req/s  p50 {result['p50_ms']:7.2f} ms  "
+                      f"p99 {result['p99_ms']:7.2f} ms")
+        finally:
+            client_service.clients_collection.delete_one({"_id": SEED["_id"]})
+
+
+if __name__ == "__main__":
+    main()
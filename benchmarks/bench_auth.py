@@ -0,0 +1,52 @@
+"""Benchmark : coût de l'authentification par requête, décodage JWT vs cache des jetons.
+
+Usage :
+    python -m benchmarks.bench_auth --requests 20000
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+
+from app.security import auth
+from app.security.dependencies import get_current_user, role_required
+
+
+def authenticate(token: str):
+    # Chaîne exécutée pour une route admin : get_current_user puis contrôle du rôle
+    return role_required("admin")(get_current_user(token))
+
+
+def bench(requests: int, token: str) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        authenticate(token)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = auth.create_access_token({"sub": "bench", "role": "admin"})
+    uncached = auth.TokenCache(max_size=0)
+    results = []
+    with patch.object(auth, "token_cache", uncached):
+        results.append(("python-jose, sans cache", bench(args.requests, token)))
+        try:
+            decoder = auth._make_decoder("pyjwt")  # pylint: disable=protected-access
+        except RuntimeError:
+            decoder = None
+        if decoder is not None:
+            with patch.object(auth, "_decode", decoder[0]), patch.object(auth, "_DECODE_ERRORS", decoder[1]):
+                results.append(("PyJWT, sans cache", bench(args.requests, token)))
+    auth.token_cache.clear()
+    results.append(("cache des jetons vérifiés", bench(args.requests, token)))
+
+    for label, micros in results:
+        print(f"{label:<28} {micros:8.2f} µs/requête")
+
+
+if __name__ == "__main__":
+    main()
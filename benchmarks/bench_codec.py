@@ -0,0 +1,65 @@
+"""Benchmark : coût d'encodage / décodage et taille des messages d'événements par codec.
+
+Chaque codec est mesuré sans compression puis avec compression zlib (seuil 0),
+sur des messages client_updated représentatifs. msgpack est ignoré s'il n'est
+pas installé.
+
+Usage :
+    python -m benchmarks.bench_codec --messages 20000
+"""
+
+import argparse
+import time
+
+from app.messaging.codec import CODECS, decode_event, encode_event
+from app.messaging.schemas import ClientUpdatedMessage
+
+
+def build_messages(count: int):
+    return [
+        ClientUpdatedMessage(
+            _id=f"{i:024x}",
+            name=f"Client {i}",
+            email=f"client{i}@example.com",
+            company=f"Company {i % 50}",
+            phone="+33100000000",
+            is_active=i % 7 != 0,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(messages, codec: str, compress: bool):
+    threshold = 1 if compress else 0
+    start = time.perf_counter()
+    encoded = [encode_event(message, codec=codec, compress_min_size=threshold) for message in messages]
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for message in encoded:
+        decode_event(message.body, message.content_type, message.content_encoding)
+    decode_time = time.perf_counter() - start
+    size = sum(len(message.body) for message in encoded) / len(encoded)
+    return encode_time / len(messages) * 1e6, decode_time / len(messages) * 1e6, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+    messages = build_messages(args.messages)
+
+    print(f"{'codec':<20} {'encodage':>12} {'décodage':>12} {'taille':>10}")
+    for codec in CODECS:
+        try:
+            encode_event(messages[0], codec=codec)
+        except RuntimeError as exc:
+            print(f"{codec:<20} ignoré : {exc}")
+            continue
+        for compress in (False, True):
+            encode_us, decode_us, size = measure(messages, codec, compress)
+            label = f"{codec}{' + zlib' if compress else ''}"
+            print(f"{label:<20} {encode_us:9.2f} µs {decode_us:9.2f} µs {size:7.1f} o")
+
+
+if __name__ == "__main__":
+    main()
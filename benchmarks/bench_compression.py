@@ -0,0 +1,80 @@
+"""Benchmark : taille et latence de GET /clients selon la vue et l'encodage négocié.
+
+L'application complète (middleware de compression compris) est servie in-process
+(httpx + ASGITransport) sur les remplaçants de ``benchmarks.stand_ins``. Pour
+chaque taille de page, vue (``full`` / ``summary``) et ``Accept-Encoding`` : octets
+transférés, latence médiane côté serveur et, avec ``--mbps``, temps de transfert
+modélisé sur un lien de ce débit (latence + octets / débit).
+
+Les encodages ``zstd`` et ``br`` ne sont mesurés que si leurs paquets sont installés.
+
+Usage :
+    python -m benchmarks.bench_compression --limits 100,1000 --mbps 10
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+
+from app.config import settings
+from app.security.auth import create_access_token
+from app.utils.compression import available_encodings
+from benchmarks import stand_ins
+
+
+async def measure(app, path: str, accept_encoding: str, runs: int):
+    """(octets reçus, encodage de la réponse, latence médiane en ms)."""
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench', 'role': 'admin'})}",
+               "Accept-Encoding": accept_encoding}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        timings, size, encoding = [], 0, "identity"
+        for _ in range(runs):
+            start = time.perf_counter()
+            async with client.stream("GET", path, headers=headers) as response:
+                response.raise_for_status()
+                size = 0
+                async for chunk in response.aiter_raw():
+                    size += len(chunk)
+                encoding = response.headers.get("content-encoding", "identity")
+            timings.append((time.perf_counter() - start) * 1000)
+    return size, encoding, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--limits", default="100,1000", help="Tailles de page, séparées par des virgules")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--mbps", type=float, default=None, help="Débit du lien modélisé (Mbit/s)")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stand_ins.install(args.clients)
+    settings.LIST_MAX_LIMIT = max(settings.LIST_MAX_LIMIT, *(int(limit) for limit in args.limits.split(",")))
+    # pylint: disable=import-outside-toplevel
+    from app.main import create_app
+    app = create_app()
+    encodings = ["identity", *available_encodings(settings.COMPRESSION_ENCODINGS)]
+
+    header = f"{'limit':>6} {'vue':<8} {'encodage':<9} {'octets':>10} {'ratio':>6} {'serveur ms':>11}"
+    print(header + (f" {'total ms':>9}" if args.mbps else ""))
+    for limit in (int(limit) for limit in args.limits.split(",")):
+        baseline = None
+        for view in ("full", "summary"):
+            for accept_encoding in encodings:
+                path = f"/clients/?limit={limit}&view={view}"
+                size, encoding, latency = asyncio.run(measure(app, path, accept_encoding, args.runs))
+                baseline = baseline or size
+                line = f"{limit:>6} {view:<8} {encoding:<9} {size:>10} {size / baseline:>6.2f} {latency:>11.2f}"
+                if args.mbps:
+                    line += f" {latency + size * 8 / (args.mbps * 1000):>9.2f}"
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark : débit du consommateur, message par message vs lots, sur un broker en mémoire.
+
+Le mode « unitaire » reproduit consume_client_created : prefetch 1, un handler
+par message, un ack par message. Le handler simule un aller-retour vers une
+base (``--handler-ms``) dont le coût est payé une fois par appel.
+
+Usage :
+    python -m benchmarks.bench_consumer --messages 5000 --handler-ms 1
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from app.messaging.consumer import BatchConsumer
+from app.messaging.publisher import QUEUES
+
+
+class FakeBroker:
+    """Queues en mémoire partagées par les connexions simulées."""
+
+    def __init__(self):
+        self.queues = {}
+        self.acked = 0
+        self.published = []
+        self.lock = threading.Lock()
+
+    def queue(self, name):
+        return self.queues.setdefault(name, deque())
+
+    def put(self, queue, body, headers=None, content_type=None, content_encoding=None):
+        properties = SimpleNamespace(headers=headers or {}, message_id=None,
+                                     content_type=content_type, content_encoding=content_encoding)
+        with self.lock:
+            self.queue(queue).append((body, properties))
+
+
+class FakeChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.is_open = True
+        self.prefetch = 0
+        self.consumers = {}
+        self.unacked = deque()
+        self.next_tag = 1
+
+    def exchange_declare(self, **_kwargs):
+        pass
+
+    def queue_declare(self, queue, **_kwargs):
+        self.broker.queue(queue)
+
+    def queue_bind(self, **_kwargs):
+        pass
+
+    def basic_qos(self, prefetch_count):
+        self.prefetch = prefetch_count
+
+    def basic_consume(self, queue, on_message_callback):
+        tag = f"ctag-{queue}"
+        self.consumers[tag] = (queue, on_message_callback)
+        return tag
+
+    def basic_cancel(self, consumer_tag):
+        self.consumers.pop(consumer_tag, None)
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.broker.put(routing_key, body, properties.headers, properties.content_type, properties.content_encoding)
+        self.broker.published.append((exchange, routing_key, properties.headers))
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        while self.unacked and (self.unacked[0] <= delivery_tag if multiple else self.unacked[0] == delivery_tag):
+            self.unacked.popleft()
+            self.broker.acked += 1
+            if not multiple:
+                break
+
+    def deliver(self) -> bool:
+        delivered = False
+        for queue, callback in list(self.consumers.values()):
+            pending = self.broker.queue(queue)
+            while pending and (not self.prefetch or len(self.unacked) < self.prefetch):
+                with self.broker.lock:
+                    body, properties = pending.popleft()
+                tag, self.next_tag = self.next_tag, self.next_tag + 1
+                self.unacked.append(tag)
+                callback(self, SimpleNamespace(delivery_tag=tag), properties, body)
+                delivered = True
+        return delivered
+
+    def close(self):
+        self.is_open = False
+        # Messages non acquittés : rendus au broker comme le ferait RabbitMQ
+        self.unacked.clear()
+
+
+class FakeConnection:
+    """Connexion simulée : les callbacks des workers sont exécutés par process_data_events."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+        self.channels = []
+        self._callbacks = deque()
+        self._wakeup = threading.Condition()
+
+    def channel(self):
+        channel = FakeChannel(self)
+        self.channels.append(channel)
+        return channel
+
+    def add_callback_threadsafe(self, callback):
+        with self._wakeup:
+            self._callbacks.append(callback)
+            self._wakeup.notify()
+
+    def process_data_events(self, time_limit=0):
+        ran = False
+        while self._callbacks:
+            self._callbacks.popleft()()
+            ran = True
+        for channel in self.channels:
+            ran = channel.deliver() or ran
+        if not ran:
+            with self._wakeup:
+                if not self._callbacks:
+                    self._wakeup.wait(time_limit)
+
+    def close(self):
+        self.is_open = False
+
+
+def run(broker, total, **consumer_options) -> float:
+    stop_event = threading.Event()
+    consumer = BatchConsumer(connection_factory=lambda: FakeConnection(broker), **consumer_options)
+    start = time.perf_counter()
+    thread = threading.Thread(target=consumer.run, args=(stop_event,))
+    thread.start()
+    while broker.acked < total:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    thread.join()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--handler-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    def handler(messages):
+        time.sleep(args.handler_ms / 1000)  # un aller-retour par appel, quel que soit le lot
+
+    handlers = {queue: handler for queue in QUEUES}
+    body = json.dumps({"_id": "0" * 24, "name": "Bench", "email": "bench@example.com"})
+    modes = [
+        ("unitaire (prefetch 1)", {"prefetch": 1, "batch_size": 1, "workers": 1}),
+        ("lots de 100, 4 workers", {"prefetch": 400, "batch_size": 100, "workers": 4}),
+    ]
+    for label, options in modes:
+        broker = FakeBroker()
+        for i in range(args.messages):
+            broker.put(QUEUES[i % len(QUEUES)], body)
+        rate = run(broker, args.messages, handlers=handlers, batch_timeout_ms=20, **options)
+        print(f"{label:<24} {rate:10.0f} messages/s")
+
+
+if __name__ == "__main__":
+    main()
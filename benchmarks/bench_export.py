@@ -0,0 +1,125 @@
+"""Benchmark : export en flux vs liste complète matérialisée (mémoire et TTFB).
+
+L'application est appelée directement en ASGI pour mesurer l'instant du premier
+bloc envoyé (TTFB) ; la mémoire est le pic tracemalloc pendant la requête.
+Par défaut les données sont générées dans mongomock ; --use-mongo utilise MONGO_URI.
+
+Usage :
+    python -m benchmarks.bench_export --clients 50000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import tracemalloc
+from typing import List
+from unittest.mock import patch
+
+from fastapi import FastAPI
+
+from app.models.client import ClientModel
+from app.routes import clients as client_routes
+from app.security.auth import create_access_token
+from app.services import client_service
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    # Comportement historique de GET /clients : toute la collection en une réponse
+    @app.get("/legacy/clients", response_model=List[ClientModel])
+    def legacy_list():
+        return client_service.list_clients()
+
+    app.include_router(client_routes.router, prefix="/clients")
+    return app
+
+
+async def call(app, path, query="", accept_encoding="identity"):
+    token = create_access_token({"sub": "bench", "role": "admin"})
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [
+            (b"authorization", f"Bearer {token}".encode()),
+            (b"accept-encoding", accept_encoding.encode()),
+        ],
+    }
+    stats = {"bytes": 0, "ttfb": None}
+    start = time.perf_counter()
+
+    received = asyncio.Event()
+
+    async def receive():
+        if received.is_set():
+            # Pas de déconnexion du client pendant la mesure
+            await asyncio.Event().wait()
+        received.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            if stats["ttfb"] is None:
+                stats["ttfb"] = time.perf_counter() - start
+            stats["bytes"] += len(message["body"])
+
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    await app(scope, receive, send)
+    stats["total"] = time.perf_counter() - start
+    stats["peak_mb"] = (tracemalloc.get_traced_memory()[1] - base) / 1e6
+    return stats
+
+
+def seed(collection, count):
+    batch = []
+    for i in range(count):
+        batch.append({
+            "name": f"Client {i}", "email": f"client{i}@example.com",
+            "company": f"Company {i % 500}", "phone": f"+33{i:09d}", "is_active": i % 7 != 0,
+        })
+        if len(batch) == 5000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--use-mongo", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    scenarios = [
+        ("liste complète (historique)", "/legacy/clients", "", "identity"),
+        ("export ndjson", "/clients/export", "format=ndjson", "identity"),
+        ("export csv", "/clients/export", "format=csv", "identity"),
+        ("export ndjson gzip", "/clients/export", "format=ndjson", "gzip"),
+    ]
+
+    collection = client_service.clients_collection
+    if not args.use_mongo:
+        import mongomock  # pylint: disable=import-outside-toplevel
+        collection = mongomock.MongoClient()["bench"]["clients"]
+    with patch.object(client_service, "clients_collection", collection):
+        seed(collection, args.clients)
+        app = build_app()
+        tracemalloc.start()
+        try:
+            print(f"{args.clients} clients")
+            for label, path, query, encoding in scenarios:
+                stats = asyncio.run(call(app, path, query, encoding))
+                print(f"{label:30s} TTFB {stats['ttfb'] * 1000:9.1f} ms  total {stats['total']:6.2f} s  "
+                      f"pic mémoire {stats['peak_mb']:8.1f} Mo  {stats['bytes'] / 1e6:7.1f} Mo envoyés")
+        finally:
+            tracemalloc.stop()
+            if args.use_mongo:
+                collection.delete_many({"email": {"$regex": r"^client\d+@example\.com$"}})
+
+
+if __name__ == "__main__":
+    main()
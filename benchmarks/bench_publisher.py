@@ -0,0 +1,106 @@
+"""Benchmark : débit de publication RabbitMQ, connexion par appel vs publisher partagé.
+
+Usage :
+    python -m benchmarks.bench_publisher --messages 500             # broker réel (RABBITMQ_URL)
+    python -m benchmarks.bench_publisher --messages 500 --fake-rtt-ms 2
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+
+from app.messaging import rabbitmq
+from app.messaging.publisher import RabbitMQPublisher
+
+SAMPLE_CLIENT = {
+    "name": "Bench Client",
+    "email": "bench@example.com",
+    "company": "BenchCorp",
+    "phone": "+33100000000",
+    "is_active": True,
+}
+
+
+class FakeChannel:
+    """Canal simulé : chaque opération synchrone coûte un aller-retour réseau."""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.is_open = True
+
+    def exchange_declare(self, **_kwargs):
+        time.sleep(self.rtt)
+
+    def queue_declare(self, **_kwargs):
+        time.sleep(self.rtt)
+
+    def queue_bind(self, **_kwargs):
+        time.sleep(self.rtt)
+
+    def basic_publish(self, **_kwargs):
+        # basic_publish n'attend pas de réponse du broker
+        pass
+
+    def close(self):
+        time.sleep(self.rtt)
+        self.is_open = False
+
+
+class FakeConnection:
+    """Connexion simulée : handshake AMQP (~3 RTT) puis ouverture de canal (1 RTT)."""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.is_open = True
+        time.sleep(3 * rtt)
+
+    def channel(self):
+        time.sleep(self.rtt)
+        return FakeChannel(self.rtt)
+
+    def close(self):
+        self.is_open = False
+
+
+def bench_per_call(messages: int) -> float:
+    start = time.perf_counter()
+    for _ in range(messages):
+        rabbitmq.publish_client_created(SAMPLE_CLIENT, channel=rabbitmq.get_channel())
+    return time.perf_counter() - start
+
+
+def bench_shared(messages: int, publisher: RabbitMQPublisher) -> float:
+    publisher.start()
+    start = time.perf_counter()
+    with patch("app.messaging.rabbitmq.get_publisher", return_value=publisher):
+        for _ in range(messages):
+            rabbitmq.publish_client_created(SAMPLE_CLIENT)
+    elapsed = time.perf_counter() - start
+    publisher.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--fake-rtt-ms", type=float, default=None,
+                        help="Simule le broker avec ce RTT au lieu d'utiliser RABBITMQ_URL")
+    args = parser.parse_args()
+
+    rabbitmq.logger.disabled = True
+    if args.fake_rtt_ms is not None:
+        rtt = args.fake_rtt_ms / 1000
+        with patch("pika.BlockingConnection", lambda _params: FakeConnection(rtt)):
+            per_call = bench_per_call(args.messages)
+        shared = bench_shared(args.messages, RabbitMQPublisher(connection_factory=lambda: FakeConnection(rtt)))
+    else:
+        per_call = bench_per_call(args.messages)
+        shared = bench_shared(args.messages, RabbitMQPublisher())
+
+    for label, elapsed in (("connexion par appel", per_call), ("publisher partagé", shared)):
+        print(f"{label:22s} {args.messages / elapsed:10.1f} msg/s  ({elapsed:.3f}s)")
+    print(f"{'gain':22s} {per_call / shared:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
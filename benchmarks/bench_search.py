@@ -0,0 +1,99 @@
+"""Benchmark : latence de la recherche de clients sur un grand volume généré (1M par défaut).
+
+Deux cibles :
+  * ``--backend memory`` (par défaut) : index de préfixes en mémoire, construit
+    directement sur les documents générés ;
+  * ``--backend mongo`` : MongoDB réel (MONGO_URI), base ``<DATABASE_NAME>_bench`` ;
+    les clients y sont insérés une fois (``--reuse`` pour garder un jeu existant),
+    puis les index de recherche sont créés.
+
+Les requêtes (préfixes de 1 à 4 caractères, mode texte en mongo) sont mesurées en
+p50/p95/p99 ; le script sort en erreur si le p95 dépasse ``--target-p95-ms``.
+
+Usage :
+    python -m benchmarks.bench_search --clients 1000000
+    python -m benchmarks.bench_search --backend mongo --clients 1000000 --target-p95-ms 20
+"""
+
+import argparse
+import random
+import sys
+import time
+from itertools import islice
+from unittest.mock import patch
+
+from app.config import settings
+from app.services.search import MemorySearchIndex
+from benchmarks.datagen import COMPANY_WORDS, FIRST_NAMES, LAST_NAMES, generate_clients
+from benchmarks.load_test import percentile
+
+
+def build_queries(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    words = FIRST_NAMES + LAST_NAMES + COMPANY_WORDS
+    return [rng.choice(words)[:rng.randint(1, 4)] for _ in range(count)]
+
+
+def measure(label: str, search, queries) -> float:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50, p95, p99 = (percentile(latencies, pct) * 1000 for pct in (50, 95, 99))
+    print(f"{label:<28} p50 {p50:8.2f}  p95 {p95:8.2f}  p99 {p99:8.2f} ms")
+    return p95
+
+
+def run_memory(args, queries):
+    index = MemorySearchIndex(ttl=float("inf"))
+    start = time.perf_counter()
+    index.build(generate_clients(args.clients))
+    print(f"Index mémoire construit en {time.perf_counter() - start:.1f} s ({args.clients} clients)")
+    return [measure("prefix (memory)", lambda q: list(islice(index.search(q), args.limit + 1)), queries)]
+
+
+def run_mongo(args, queries):
+    # pylint: disable=import-outside-toplevel
+    from pymongo import MongoClient
+    from app.services import client_service
+    collection = MongoClient(settings.MONGO_URI)[f"{settings.DATABASE_NAME}_bench"]["clients"]
+    if not args.reuse or collection.estimated_document_count() < args.clients:
+        collection.drop()
+        batch = []
+        for document in generate_clients(args.clients):
+            batch.append(document)
+            if len(batch) == 10000:
+                collection.insert_many(batch, ordered=False)
+                batch = []
+        if batch:
+            collection.insert_many(batch, ordered=False)
+    with patch.object(client_service, "clients_collection", collection):
+        client_service.ensure_indexes()
+        return [
+            measure(f"{mode} ({field})", lambda q, m=mode, f=field: client_service.search_clients(
+                q, m, f, args.limit, fields=["name", "email"]), queries)
+            for mode, field in (("prefix", "all"), ("prefix", "name"), ("text", "all"))
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("memory", "mongo"), default="memory")
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--reuse", action="store_true", help="Garde le jeu de données mongo existant")
+    parser.add_argument("--target-p95-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    queries = build_queries(args.queries)
+    p95s = run_mongo(args, queries) if args.backend == "mongo" else run_memory(args, queries)
+    if max(p95s) > args.target_p95_ms:
+        print(f"Objectif non atteint : p95 > {args.target_p95_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark : coût par document des lectures, validation complète vs chemin rapide.
+
+Le chemin validé reproduit la route historique : ClientModel(**doc) dans le service
+puis validation et sérialisation par response_model. Le chemin rapide construit le
+document sans validation et l'encode directement (FastJSONResponse).
+
+Usage :
+    python -m benchmarks.bench_serialization --documents 5000
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+
+import mongomock
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.models.client import ClientModel
+from app.services import client_service
+from app.services.cache import NullCache, set_client_cache
+from app.utils.responses import FastJSONResponse
+
+
+def seed(collection, documents: int):
+    collection.insert_many([
+        {
+            "_id": ObjectId(),
+            "name": f"Client {i}",
+            "email": f"client{i}@example.com",
+            "company": "BenchCorp",
+            "phone": "+33100000000",
+            "is_active": True,
+        }
+        for i in range(documents)
+    ])
+
+
+def render_validated(model: ClientModel) -> bytes:
+    # Ce que fait FastAPI avec response_model=ClientModel
+    checked = ClientModel.model_validate(model.model_dump(mode="json", by_alias=True))
+    return FastJSONResponse(jsonable_encoder(checked, by_alias=True)).body
+
+
+def timed(label: str, fn, count: int):
+    start = time.perf_counter()
+    fn()
+    micros = (time.perf_counter() - start) / count * 1e6
+    print(f"{label:<36} {micros:8.2f} µs/document")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=5000)
+    args = parser.parse_args()
+
+    collection = mongomock.MongoClient().db.clients
+    seed(collection, args.documents)
+    by_id = {doc["_id"]: doc for doc in collection.find()}
+    ids = [str(client_id) for client_id in by_id]
+    set_client_cache(NullCache())  # mesure la sérialisation, pas le cache
+
+    # find_one de mongomock parcourt toute la collection : remplacé par une lecture par clé
+    with patch.object(client_service, "clients_collection", collection), \
+         patch.object(collection, "find_one", lambda query: dict(by_id[query["_id"]])):
+        for fast in (False, True):
+            mode = "rapide" if fast else "validé"
+            with patch("app.config.settings.READ_FAST_PATH", fast):
+                if fast:
+                    timed(f"list_clients ({mode})", lambda: FastJSONResponse(
+                        [client_service.client_document(doc) for doc in collection.find()]
+                    ), args.documents)
+                    timed(f"get_client ({mode})", lambda: [
+                        FastJSONResponse(client_service.get_client_document(client_id)) for client_id in ids
+                    ], args.documents)
+                else:
+                    timed(f"list_clients ({mode})", lambda: [
+                        render_validated(model) for model in client_service.list_clients()
+                    ], args.documents)
+                    timed(f"get_client ({mode})", lambda: [
+                        render_validated(client_service.get_client(client_id)) for client_id in ids
+                    ], args.documents)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark : démarrage à froid de l'API (imports et délai jusqu'à la première requête réussie).
+
+Deux mesures, chacune dans des processus Python neufs :
+  * ``python -X importtime`` sur ``import app.main`` puis sur la construction de
+    l'application : durée totale et modules les plus coûteux ;
+  * ``python -m app.server`` (un worker) : délai entre le lancement du processus
+    et la première réponse 200 sur ``GET /`` (MongoDB / RabbitMQ absents : le
+    lifespan les attend au plus ``MONGO_SERVER_SELECTION_TIMEOUT_MS``).
+
+Le script sort en erreur si la médiane dépasse ``--max-import-ms`` ou ``--max-ready-s``.
+
+Usage :
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --max-import-ms 900 --max-ready-s 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+TARGETS = {
+    "import": "import app.main",
+    "app": "import app.main; app.main.app",
+}
+
+
+def import_profile(statement: str):
+    """(durée totale en ms, [(ms cumulées, module)] des imports des deux premiers niveaux)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            capture_output=True, text=True, check=True)
+    total, modules = 0.0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        ms = int(cumulative) / 1000
+        if depth == 0:
+            total += ms
+        if depth <= 1:
+            modules.append((ms, "  " * depth + name.strip()))
+    return total, sorted(modules, reverse=True)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(timeout: float) -> float:
+    port = free_port()
+    env = {**os.environ, "SERVER_WORKERS": "1", "SERVER_HOST": "127.0.0.1", "SERVER_PORT": str(port),
+           "MONGO_SERVER_SELECTION_TIMEOUT_MS": os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "500"),
+           "RABBITMQ_RECONNECT_ATTEMPTS": os.environ.get("RABBITMQ_RECONNECT_ATTEMPTS", "1")}
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "app.server"], env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"Aucune réponse après {timeout} s")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Modules les plus coûteux affichés")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-ready-s", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for label, statement in TARGETS.items():
+        profiles = [import_profile(statement) for _ in range(args.runs)]
+        median = statistics.median(total for total, _ in profiles)
+        print(f"{label:<8} médiane {median:8.1f} ms  ({statement})")
+        for ms, name in profiles[-1][1][:args.top]:
+            print(f"    {ms:8.1f} ms  {name}")
+        if label == "app" and args.max_import_ms is not None and median > args.max_import_ms:
+            print(f"Objectif non atteint : imports > {args.max_import_ms} ms")
+            failed = True
+
+    ready = statistics.median(time_to_first_request(args.timeout) for _ in range(args.runs))
+    print(f"première requête  médiane {ready:6.2f} s")
+    if args.max_ready_s is not None and ready > args.max_ready_s:
+        print(f"Objectif non atteint : première requête > {args.max_ready_s} s")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Générateur reproductible de clients synthétiques, chargés en masse dans MongoDB ou mongomock.
+
+Les documents ont la forme de ceux écrits par l'API (champs de ``ClientModel``,
+``version``, ``updated_at`` et clés de recherche) : noms, emails uniques,
+sociétés, téléphones français. Pour une graine donnée, le i-ème client est
+toujours le même, ``_id`` compris (``client_id(i)``), et les ``_id`` croissent
+avec i : la pagination par clé suit l'ordre de génération.
+
+Usage :
+    python -m benchmarks.datagen --clients 1000000
+    python -m benchmarks.datagen --clients 100000 --database clients_db_bench --drop --indexes
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from app.config import settings
+from app.services.search import search_keys
+
+FIRST_NAMES = ["Jean", "Marie", "Pierre", "Lucie", "Paul", "Sophie", "Louis", "Emma", "Hugo", "Chloé",
+               "Martin", "Julie", "Nicolas", "Camille", "Thomas", "Léa", "Antoine", "Manon", "Arthur", "Inès"]
+LAST_NAMES = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy",
+              "Moreau", "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux"]
+COMPANY_WORDS = ["Café", "Kawa", "Torréfaction", "Grains", "Arabica", "Moka", "Express", "Barista", "Roast"]
+EMAIL_DOMAINS = ["example.com", "example.fr", "example.net", "example.org"]
+
+# Horodatage des _id générés : fixe, pour des identifiants reproductibles
+_EPOCH = datetime(2024, 1, 1)
+_BLOCK = 1000
+_ASCII = str.maketrans("éèêëàâîïôöûüç", "eeeeaaiioouuc")
+
+
+# _id du i-ème client d'une graine : horodatage, graine, rang (24 caractères hexadécimaux)
+def client_id(index: int, seed: int = 42) -> ObjectId:
+    timestamp = int(_EPOCH.timestamp()) + index // 100_000
+    return ObjectId(f"{timestamp:08x}{seed & 0xFFFFFFFF:08x}{index:08x}")
+
+
+def _client(rng: random.Random, index: int, seed: int) -> dict:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    document = {
+        "_id": client_id(index, seed),
+        "name": f"{first} {last}",
+        "email": f"{first.lower().translate(_ASCII)}.{last.lower()}{index}@{rng.choice(EMAIL_DOMAINS)}",
+        "company": f"{rng.choice(COMPANY_WORDS)} {rng.choice(LAST_NAMES)} {index % 5000}",
+        "phone": f"+33{rng.choice('12345679')}{rng.randrange(10 ** 7, 10 ** 8)}",
+        "is_active": rng.random() > 0.1,
+        "version": rng.randint(1, 5),
+        "updated_at": _EPOCH + timedelta(seconds=rng.randrange(730 * 86400)),
+    }
+    document.update(search_keys(document))
+    return document
+
+
+def generate_clients(count: int, seed: int = 42, start: int = 0):
+    """Clients ``start`` à ``start + count - 1`` de la graine ``seed``, au fil de l'eau."""
+    # Un générateur aléatoire par bloc : un client ne dépend que des précédents de son bloc,
+    # un chargement peut reprendre (ou être réparti) à n'importe quel rang
+    rng = None
+    for index in range(start - start % _BLOCK, start + count):
+        if rng is None or index % _BLOCK == 0:
+            rng = random.Random(seed * 1_000_003 + index // _BLOCK)
+        document = _client(rng, index, seed)
+        if index >= start:
+            yield document
+
+
+def load_clients(collection, count: int, seed: int = 42, batch_size: int = 10_000) -> int:
+    """Insère ``count`` clients générés par lots (insert_many non ordonné) ; retourne le nombre inséré."""
+    documents = generate_clients(count, seed)
+    inserted = 0
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            return inserted
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--uri", default=settings.MONGO_URI)
+    parser.add_argument("--database", default=f"{settings.DATABASE_NAME}_bench")
+    parser.add_argument("--collection", default="clients")
+    parser.add_argument("--drop", action="store_true", help="Vide la collection avant le chargement")
+    parser.add_argument("--indexes", action="store_true", help="Crée ensuite les index déclarés de l'API")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    collection = client[args.database][args.collection]
+    if args.drop:
+        collection.drop()
+    start = time.perf_counter()
+    inserted = load_clients(collection, args.clients, args.seed, args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"{inserted} clients chargés dans {args.database}.{args.collection} en {elapsed:.1f} s "
+          f"({inserted / elapsed:,.0f}/s)")
+    if args.indexes:
+        from app.services.client_service import CLIENT_INDEXES  # pylint: disable=import-outside-toplevel
+        start = time.perf_counter()
+        collection.create_indexes(CLIENT_INDEXES)
+        print(f"Index créés en {time.perf_counter() - start:.1f} s")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Test de charge de l'API Clients : latence p50/p95/p99 et débit par route et par concurrence.
+
+Deux cibles :
+  * en processus (par défaut) : l'app de app/main.py via httpx.ASGITransport,
+    avec mongomock et un broker en mémoire (benchmarks/stand_ins.py) ;
+  * serveur lancé à part : ``--url http://127.0.0.1:8000`` (par exemple
+    ``python -m benchmarks.serve``, ou un déploiement réel).
+
+Les résultats sont écrits en JSON ; ``--compare`` les confronte à un run précédent
+et sort en erreur si une route régresse au-delà de ``--tolerance``.
+
+Usage :
+    python -m benchmarks.load_test --concurrency 1,10,50 --requests 200
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --compare benchmarks/results/base.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple
+
+import httpx
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class Scenario(NamedTuple):
+    name: str
+    # build(i) -> (méthode, chemin, arguments httpx) de la i-ème requête
+    build: Callable[[int], tuple]
+    # Clients à créer avant le scénario (DELETE consomme des identifiants)
+    needs_fresh_ids: bool = False
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentile par rang le plus proche sur une liste triée."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def summarize(route: str, concurrency: int, latencies: List[float], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "route": route,
+        "concurrency": concurrency,
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def compare(previous: dict, current: dict, tolerance: float) -> List[str]:
+    """Régressions de débit ou de p95 au-delà de ``tolerance`` (0.1 = 10 %)."""
+    before = {(r["route"], r["concurrency"]): r for r in previous["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get((result["route"], result["concurrency"]))
+        if old is None:
+            continue
+        if old["rps"] and result["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result['route']} c={result['concurrency']} : {old['rps']} → {result['rps']} req/s"
+            )
+        if old["p95_ms"] and result["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{result['route']} c={result['concurrency']} : p95 {old['p95_ms']} → {result['p95_ms']} ms"
+            )
+    return regressions
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, total: int) -> dict:
+    latencies, errors = [], 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            if i >= total:
+                return
+            method, path, kwargs = scenario.build(i)
+            start = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(scenario.name, concurrency, latencies, errors, time.perf_counter() - start)
+
+
+async def create_clients(client: httpx.AsyncClient, headers: dict, prefix: str, count: int) -> List[str]:
+    ids = []
+    for offset in range(0, count, 1000):
+        operations = [
+            {"op": "create", "data": {"name": f"Load {i}", "email": f"{prefix}{i}@example.com"}}
+            for i in range(offset, min(offset + 1000, count))
+        ]
+        response = await client.post("/clients/bulk", json={"operations": operations}, headers=headers)
+        response.raise_for_status()
+        ids.extend(item["id"] for item in response.json()["results"] if item["status"] == "ok")
+    return ids
+
+
+def build_scenarios(headers: dict, existing: List[dict], run_id: str, fresh_ids: Dict[str, List[str]]):
+    def pick(i):
+        return existing[i % len(existing)]
+
+    return [
+        Scenario("POST /token", lambda i: ("POST", "/token", {"data": {"username": "admin", "password": "x"}})),
+        Scenario("POST /clients/", lambda i: ("POST", "/clients/", {
+            "json": {"name": f"Load {i}", "email": f"post-{run_id}-{time.monotonic_ns()}-{i}@example.com"},
+            "headers": headers,
+        })),
+        Scenario("POST /clients/bulk", lambda i: ("POST", "/clients/bulk", {
+            "json": {"operations": [
+                {"op": "create", "data": {"name": f"Bulk {i}-{j}",
+                                          "email": f"bulk-{run_id}-{time.monotonic_ns()}-{i}-{j}@example.com"}}
+                for j in range(10)
+            ]},
+            "headers": headers,
+        })),
+        Scenario("GET /clients/", lambda i: ("GET", "/clients/", {"params": {"limit": 50}, "headers": headers})),
+        Scenario("GET /clients/export", lambda i: ("GET", "/clients/export", {
+            "params": {"format": "ndjson", "company": "Company 1"}, "headers": headers,
+        })),
+        Scenario("GET /clients/{id}", lambda i: ("GET", f"/clients/{pick(i)['_id']}", {"headers": headers})),
+        Scenario("PUT /clients/{id}", lambda i: ("PUT", f"/clients/{pick(i)['_id']}", {
+            "json": {"name": f"Updated {i}", "email": pick(i)["email"]}, "headers": headers,
+        })),
+        Scenario("DELETE /clients/{id}", lambda i: ("DELETE", f"/clients/{fresh_ids['ids'][i]}", {"headers": headers}),
+                 needs_fresh_ids=True),
+    ]
+
+
+async def run(client: httpx.AsyncClient, levels: List[int], total: int, only: List[str]) -> List[dict]:
+    token = (await client.post("/token", data={"username": "admin", "password": "x"})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    existing = (await client.get("/clients/", params={"limit": 1000, "fields": "email"}, headers=headers)).json()["items"]
+    if not existing:
+        await create_clients(client, headers, f"seed-{os.getpid()}-", 100)
+        existing = (await client.get("/clients/", params={"limit": 1000, "fields": "email"}, headers=headers)).json()["items"]
+    run_id = f"{os.getpid()}-{int(time.time())}"
+    fresh_ids: Dict[str, List[str]] = {"ids": []}
+    results = []
+    for scenario in build_scenarios(headers, existing, run_id, fresh_ids):
+        if only and scenario.name not in only:
+            continue
+        for concurrency in levels:
+            if scenario.needs_fresh_ids:
+                fresh_ids["ids"] = await create_clients(client, headers, f"del-{run_id}-{concurrency}-", total)
+            result = await run_scenario(client, scenario, concurrency, total)
+            results.append(result)
+            print(f"{result['route']:<24} c={concurrency:<4} {result['rps']:9.1f} req/s  "
+                  f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms"
+                  f"  erreurs {result['errors']}")
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main_async(args) -> dict:
+    levels = [int(level) for level in args.concurrency.split(",")]
+    only = [name.strip() for name in args.routes.split(";")] if args.routes else []
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            results = await run(client, levels, args.requests, only)
+        target = args.url
+    else:
+        from benchmarks.stand_ins import install  # pylint: disable=import-outside-toplevel
+        install(args.clients)
+        from app.main import app  # pylint: disable=import-outside-toplevel
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            results = await run(client, levels, args.requests, only)
+        target = "asgi (mongomock, broker en mémoire)"
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "target": target,
+            "python": platform.python_version(),
+            "requests_per_level": args.requests,
+            "concurrency": levels,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Serveur à tester ; par défaut l'app en processus")
+    parser.add_argument("--concurrency", default="1,10,50", help="Niveaux de concurrence, séparés par des virgules")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes par route et par niveau")
+    parser.add_argument("--clients", type=int, default=1000, help="Clients créés dans mongomock (en processus)")
+    parser.add_argument("--routes", help='Routes à tester, séparées par ";" (ex. "GET /clients/{id}")')
+    parser.add_argument("--output", help="Fichier JSON des résultats (défaut : benchmarks/results/)")
+    parser.add_argument("--compare", help="Résultats JSON d'un run précédent")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Régression tolérée (0.1 = 10 %%)")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    # Avertissements de sérialisation Pydantic (ObjectId) : un par requête, illisible en charge
+    warnings.filterwarnings("ignore", category=UserWarning, module="pydantic")
+
+    report = asyncio.run(main_async(args))
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"Résultats : {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(json.load(file), report, args.tolerance)
+        for line in regressions:
+            print(f"RÉGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
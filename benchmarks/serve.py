@@ -0,0 +1,26 @@
+"""Lance l'API sous uvicorn avec les remplaçants locaux, cible de ``load_test --url``.
+
+Usage :
+    python -m benchmarks.serve --port 8000 --clients 1000
+"""
+
+import argparse
+
+import uvicorn
+
+from benchmarks.stand_ins import install
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--clients", type=int, default=1000)
+    args = parser.parse_args()
+    install(args.clients)
+    from app.main import app  # pylint: disable=import-outside-toplevel
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Remplaçants locaux de MongoDB (mongomock) et RabbitMQ (broker en mémoire) pour les benchmarks.
+
+``install()`` branche les remplaçants sur les clients partagés de l'application
+(client Mongo paresseux, publisher RabbitMQ) avant toute requête.
+"""
+
+import mongomock
+
+from app.config import settings
+from app.db import mongo
+from app.messaging import publisher
+from benchmarks.bench_consumer import FakeBroker, FakeConnection
+
+
+class DiscardingBroker(FakeBroker):
+    """Broker en mémoire qui ne garde que le nombre de messages publiés."""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def put(self, queue, body, headers=None, content_type=None, content_encoding=None):
+        self.count += 1
+
+
+def seed(collection, count: int):
+    documents = [
+        {
+            "name": f"Client {i}", "email": f"seed{i}@example.com",
+            "company": f"Company {i % 50}", "phone": f"+33{i:09d}", "is_active": i % 7 != 0,
+        }
+        for i in range(count)
+    ]
+    if documents:
+        collection.insert_many(documents)
+    return [document["_id"] for document in documents]
+
+
+def install(clients: int = 1000):
+    """Installe les remplaçants et crée ``clients`` documents ; retourne (collection, broker)."""
+    mongo.close_client()
+    mongo._client = mongomock.MongoClient()  # pylint: disable=protected-access
+    broker = DiscardingBroker()
+    publisher.shutdown_publisher()
+    publisher._publisher = publisher.RabbitMQPublisher(  # pylint: disable=protected-access
+        connection_factory=lambda: FakeConnection(broker), reconnect_backoff=0,
+    )
+    # Pas d'écoute des invalidations (elle ouvrirait une vraie connexion RabbitMQ)
+    settings.CLIENT_CACHE_INVALIDATION_LISTENER = False
+    settings.EVENTS_MODE = "inline"
+    # Un seul utilisateur envoie toute la charge : pas de limitation de débit
+    settings.RATE_LIMIT_ENABLED = False
+    settings.ASYNC_MODE = False
+    collection = mongo.clients_collection
+    seed(collection, clients)
+    return collection, broker
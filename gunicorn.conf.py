@@ -0,0 +1,30 @@
+"""Configuration gunicorn (paquet optionnel) : ``gunicorn -c gunicorn.conf.py app.main:app``.
+
+L'application est préchargée dans le maître (``preload_app``) ; chaque worker
+uvicorn recrée ensuite ses clients MongoDB / RabbitMQ après le fork.
+"""
+
+from app.config import settings
+from app.server import mark_worker_dead, prepare_metrics_dir, reset_process_clients, worker_count
+
+workers = worker_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+backlog = settings.SERVER_BACKLOG
+keepalive = settings.SERVER_KEEPALIVE
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS // 10
+forwarded_allow_ips = settings.SERVER_FORWARDED_ALLOW_IPS
+preload_app = True
+
+# Avant le préchargement de l'app : prometheus_client lit la variable à l'import
+prepare_metrics_dir(workers)
+
+
+def post_fork(_server, _worker):
+    reset_process_clients()
+
+
+def child_exit(_server, worker):
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,14 @@
+from unittest.mock import patch
+import pytest
+from mongomock.collection import BulkOperationBuilder
+
+_add_update = BulkOperationBuilder.add_update
+
+# pymongo >= 4.10 passe l'option "sort" des UpdateOne en bulk, que mongomock ne connaît pas
+def _add_update_without_sort(self, *args, sort=None, **kwargs):
+    return _add_update(self, *args, **kwargs)
+
+@pytest.fixture(autouse=True)
+def mongomock_bulk_update_one():
+    with patch.object(BulkOperationBuilder, "add_update", _add_update_without_sort):
+        yield
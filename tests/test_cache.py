@@ -0,0 +1,108 @@
+from unittest.mock import MagicMock, patch
+import threading
+import json
+import mongomock
+import pytest
+from bson import ObjectId
+from prometheus_client import REGISTRY
+from app.messaging.cache_invalidation import CacheInvalidationListener, handle_message
+from app.models.client import BulkOperation, ClientModel
+from app.services.cache import LRUCache, set_client_cache
+from app.services import client_service
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def cache_events(result):
+    return REGISTRY.get_sample_value("client_cache_events_total", {"backend": "memory", "result": result}) or 0
+
+@pytest.fixture
+def cache():
+    cache = LRUCache(max_size=100, ttl=60)
+    set_client_cache(cache)
+    yield cache
+    set_client_cache(None)
+
+@pytest.fixture
+def clients(cache):
+    collection = mongomock.MongoClient().db.clients
+    with patch("app.services.client_service.clients_collection", collection):
+        yield collection
+
+def test_lru_expires_entries_after_ttl():
+    clock = FakeClock()
+    lru = LRUCache(max_size=10, ttl=5, clock=clock)
+    lru.set("a", {"name": "A"})
+    assert lru.get("a") == {"name": "A"}
+    clock.now = 6
+    assert lru.get("a") is None
+    assert len(lru) == 0
+
+def test_lru_evicts_least_recently_used():
+    lru = LRUCache(max_size=2, ttl=60)
+    evictions = cache_events("eviction")
+    lru.set("a", {})
+    lru.set("b", {})
+    lru.get("a")
+    lru.set("c", {})
+    assert lru.get("b") is None
+    assert lru.get("a") == {} and lru.get("c") == {}
+    assert cache_events("eviction") == evictions + 1
+
+def test_lru_returns_copies():
+    lru = LRUCache(max_size=2, ttl=60)
+    lru.set("a", {"name": "A"})
+    lru.get("a")["name"] = "changed"
+    assert lru.get("a") == {"name": "A"}
+
+def test_get_client_reads_through_cache(clients, cache):
+    client_id = clients.insert_one({"name": "Cached", "email": "cached@example.com"}).inserted_id
+    hits = cache_events("hit")
+    assert client_service.get_client(str(client_id)).name == "Cached"
+    with patch.object(clients, "find_one", side_effect=AssertionError("lecture Mongo inattendue")):
+        assert client_service.get_client(str(client_id)).name == "Cached"
+    assert cache_events("hit") == hits + 1
+
+def test_writes_invalidate_cached_client(clients, cache):
+    client_id = str(clients.insert_one({"name": "Before", "email": "before@example.com"}).inserted_id)
+    client_service.get_client(client_id)
+    client_service.update_client(client_id, ClientModel(name="After", email="before@example.com"))
+    assert client_service.get_client(client_id).name == "After"
+    client_service.delete_client(client_id)
+    assert client_service.get_client(client_id) is None
+
+def test_bulk_writes_invalidate_cached_clients(clients, cache):
+    client_id = str(clients.insert_one({"name": "Before", "email": "b@example.com"}).inserted_id)
+    client_service.get_client(client_id)
+    client_service.bulk_write_clients([BulkOperation(op="update", id=client_id, data={"name": "Bulk", "email": "b@example.com"})])
+    assert client_service.get_client(client_id).name == "Bulk"
+
+def test_event_from_another_replica_invalidates_cache(cache):
+    client_id = str(ObjectId())
+    cache.set(client_id, {"_id": client_id, "name": "Stale"})
+    assert handle_message(json.dumps({"_id": client_id}).encode())
+    assert cache.get(client_id) is None
+    assert not handle_message(b"not json")
+
+def test_listener_binds_exclusive_queue_and_consumes(cache):
+    client_id = str(ObjectId())
+    cache.set(client_id, {"_id": client_id})
+    stop_event = threading.Event()
+    channel = MagicMock()
+    channel.queue_declare.return_value.method.queue = "amq.gen-1"
+    channel.consume.return_value = iter([
+        (MagicMock(), None, json.dumps({"_id": client_id}).encode()),
+        (None, None, None),
+    ])
+    connection = MagicMock()
+    connection.channel.return_value = channel
+
+    CacheInvalidationListener(connection_factory=lambda: connection).consume(connection, stop_event)
+
+    channel.queue_declare.assert_called_once_with(queue="", exclusive=True, auto_delete=True)
+    assert [c.kwargs["routing_key"] for c in channel.queue_bind.call_args_list] == ["client_updated", "client_deleted"]
+    assert cache.get(client_id) is None
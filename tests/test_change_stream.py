@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import mongomock
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.messaging.change_stream import (
+    ChangeEvent, ChangeFeed, ChangeStreamTailer, MemoryTokenStore, ResumeTokenStore, format_sse, stream_changes,
+    to_event,
+)
+from app.security.auth import create_access_token
+
+
+class ReplicaSetStandIn:
+    """Collection mongomock qui journalise ses écritures comme le ferait l'oplog d'un replica set."""
+
+    def __init__(self):
+        self.collection = mongomock.MongoClient().db.clients
+        self.oplog = []
+
+    def _log(self, operation, client_id):
+        self.oplog.append({
+            "_id": {"_data": f"{len(self.oplog) + 1:08d}"},
+            "operationType": operation,
+            "documentKey": {"_id": client_id},
+        })
+
+    def insert_one(self, document):
+        client_id = self.collection.insert_one(document).inserted_id
+        self._log("insert", client_id)
+        return client_id
+
+    def update_one(self, client_id, changes):
+        self.collection.update_one({"_id": client_id}, {"$set": changes})
+        self._log("update", client_id)
+
+    def delete_one(self, client_id):
+        self.collection.delete_one({"_id": client_id})
+        self._log("delete", client_id)
+
+    def watch(self, full_document=None, resume_after=None, max_await_time_ms=None):
+        start = int(resume_after["_data"]) if resume_after else len(self.oplog)
+        return StandInStream(self, start)
+
+
+class StandInStream:
+    """Curseur de change stream : full_document="updateLookup" relit le document à la lecture."""
+
+    def __init__(self, replica_set, position):
+        self.replica_set = replica_set
+        self.position = position
+        self.resume_token = None
+        self.alive = True
+
+    def try_next(self):
+        if self.position >= len(self.replica_set.oplog):
+            return None
+        change = dict(self.replica_set.oplog[self.position])
+        self.position += 1
+        if change["operationType"] != "delete":
+            change["fullDocument"] = self.replica_set.collection.find_one({"_id": change["documentKey"]["_id"]})
+        self.resume_token = change["_id"]
+        return change
+
+    def close(self):
+        self.alive = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@pytest.fixture
+def replica_set():
+    return ReplicaSetStandIn()
+
+
+def make_tailer(replica_set, sink, token_store=None):
+    return ChangeStreamTailer(collection=replica_set, token_store=token_store or MemoryTokenStore(),
+                              sinks=[sink], batch_size=10, max_await_ms=1)
+
+
+def test_to_event_maps_operations():
+    client_id = ObjectId()
+    document = {"_id": client_id, "name": "A", "email": "a@example.com"}
+    assert to_event({"operationType": "insert", "fullDocument": document})[0] == "client_created"
+    queue, payload = to_event({"operationType": "replace", "fullDocument": document})
+    assert queue == "client_updated" and payload["_id"] == str(client_id) and payload["is_active"] is True
+    assert to_event({"operationType": "delete", "documentKey": {"_id": client_id}}) == (
+        "client_deleted", {"_id": str(client_id)}
+    )
+    assert to_event({"operationType": "update", "fullDocument": None}) is None
+    assert to_event({"operationType": "drop"}) is None
+
+
+def test_tailer_publishes_batches_and_resumes_after_last_token(replica_set):
+    batches = []
+    store = ResumeTokenStore(mongomock.MongoClient().db.change_stream_tokens)
+    tailer = make_tailer(replica_set, batches.append, store)
+    with tailer.watch() as stream:
+        first = replica_set.insert_one({"name": "Script", "email": "script@example.com"})
+        replica_set.update_one(first, {"company": "Ops"})
+        replica_set.insert_one({"name": "Bad", "email": "not-an-email"})  # écrit hors de l'API
+        assert tailer.run_once(stream) == 2
+    assert [event.queue for event in batches[0]] == ["client_created", "client_updated"]
+    assert batches[0][1].payload["company"] == "Ops"
+
+    # Redémarrage : le nouveau tailer reprend après le dernier lot enregistré
+    replica_set.delete_one(first)
+    restarted = make_tailer(replica_set, batches.append, ResumeTokenStore(store.collection))
+    with restarted.watch() as stream:
+        assert restarted.run_once(stream) == 1
+    assert batches[1] == [ChangeEvent("00000004", "client_deleted", {"_id": str(first)})]
+
+
+def test_tailer_replays_batch_when_publishing_fails(replica_set):
+    published = []
+
+    def flaky_sink(events):
+        if not published:
+            published.append(None)
+            raise ConnectionError("broker indisponible")
+        published.append(events)
+
+    store = MemoryTokenStore()
+    tailer = make_tailer(replica_set, flaky_sink, store)
+    replica_set.insert_one({"name": "Before", "email": "before@example.com"})
+    with tailer.watch() as stream:
+        replica_set.insert_one({"name": "Lost?", "email": "lost@example.com"})
+        with pytest.raises(ConnectionError):
+            tailer.run_once(stream)
+    assert store.load() is None
+    store.save(replica_set.oplog[0]["_id"])
+    with tailer.watch() as stream:
+        assert tailer.run_once(stream) == 1
+    assert published[1][0].payload["email"] == "lost@example.com"
+
+
+def test_tailer_run_forever_stops(replica_set):
+    received = []
+    tailer = make_tailer(replica_set, received.extend)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=tailer.run_forever, args=(stop_event,), daemon=True)
+    thread.start()
+    stop_event.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def event(i):
+    return ChangeEvent(f"{i:08d}", "client_deleted", {"_id": str(i)})
+
+
+def test_change_feed_replays_after_last_event_id_and_drops_slow_subscribers():
+    async def scenario():
+        feed = ChangeFeed(history=10, queue_size=2)
+        feed.attach()
+        feed.publish([event(1), event(2), event(3)])
+        replay = feed.subscribe("00000001")
+        assert [replay.get_nowait().id for _ in range(2)] == ["00000002", "00000003"]
+
+        slow = feed.subscribe()
+        await asyncio.to_thread(feed.publish, [event(4), event(5), event(6)])
+        await asyncio.sleep(0)
+        assert slow.get_nowait() is None  # déconnecté : reprise via Last-Event-ID
+        assert slow not in feed._subscribers  # pylint: disable=protected-access
+
+    asyncio.run(scenario())
+
+
+def test_stream_changes_formats_sse():
+    async def scenario():
+        feed = ChangeFeed(history=10, queue_size=10)
+        feed.attach()
+        feed.publish([event(1), event(2)])
+        stream = stream_changes(feed, "00000001", heartbeat=0.01)
+        chunks = [await stream.__anext__() for _ in range(3)]
+        await stream.aclose()
+        assert chunks[1] == format_sse(event(2))
+        assert chunks[2] == ": keep-alive\n\n"
+        assert not feed._subscribers  # pylint: disable=protected-access
+
+    asyncio.run(scenario())
+    assert format_sse(event(2)) == 'id: 00000002\nevent: client_deleted\ndata: {"_id":"2"}\n\n'
+
+
+def test_changes_endpoint_requires_admin_and_feature_flag():
+    client = TestClient(app)
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': 'a', 'role': 'admin'})}"}
+    user = {"Authorization": f"Bearer {create_access_token({'sub': 'u', 'role': 'user'})}"}
+    assert client.get("/clients/changes", headers=admin).status_code == 404
+    with patch("app.config.settings.CHANGE_FEED_ENABLED", True):
+        assert client.get("/clients/changes", headers=user).status_code == 403
+
+
+@pytest.mark.integration
+def test_tailer_against_replica_set():
+    # Nécessite MONGO_URI vers un replica set (ex. mongod --replSet rs0, rs.initiate())
+    from app.db.mongo import get_db
+    collection = get_db()["change_stream_it"]
+    received = []
+    tailer = ChangeStreamTailer(collection=collection, token_store=MemoryTokenStore(), sinks=[received.extend])
+    with tailer.watch() as stream:
+        client_id = collection.insert_one({"name": "RS", "email": "rs@example.com"}).inserted_id
+        collection.delete_one({"_id": client_id})
+        while len(received) < 2:
+            tailer.run_once(stream)
+    assert [e.queue for e in received] == ["client_created", "client_deleted"]
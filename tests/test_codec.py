@@ -0,0 +1,64 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+import pytest
+from benchmarks.bench_consumer import FakeBroker, FakeConnection
+from app.messaging.codec import DEFLATE, JSON, MSGPACK, decode_event, encode_event
+from app.messaging.consumer import BatchConsumer
+from app.messaging.rabbitmq import publish_events
+from app.messaging.schemas import ClientUpdatedMessage
+
+MESSAGE = ClientUpdatedMessage(_id="abc", name="Codec", email="codec@example.com", company="C" * 300, is_active=True)
+
+@pytest.mark.parametrize("codec, content_type", [("json", JSON), ("msgpack", MSGPACK)])
+def test_round_trip_per_codec(codec, content_type):
+    pytest.importorskip(codec)
+    encoded = encode_event(MESSAGE, codec=codec, compress_min_size=0)
+    assert encoded.content_type == content_type and encoded.content_encoding is None
+    assert decode_event(encoded.body, encoded.content_type) == MESSAGE.model_dump(mode="json", by_alias=True)
+
+def test_compression_above_threshold_only():
+    small = ClientUpdatedMessage(_id="abc", name="S", email="s@example.com", is_active=True)
+    assert encode_event(small, codec="json", compress_min_size=200).content_encoding is None
+    compressed = encode_event(MESSAGE, codec="json", compress_min_size=200)
+    assert compressed.content_encoding == DEFLATE
+    assert len(compressed.body) < len(MESSAGE.model_dump_json(by_alias=True))
+    assert decode_event(compressed.body, compressed.content_type, compressed.content_encoding)["_id"] == "abc"
+
+def test_decode_defaults_to_json_and_rejects_unknown_formats():
+    assert decode_event(b'{"_id": "1"}') == {"_id": "1"}
+    assert decode_event(b'{"_id": "1"}', "application/json; charset=utf-8") == {"_id": "1"}
+    for body, content_type, encoding in ((b"{}", "text/xml", None), (b"{}", JSON, "br"), (b"nope", JSON, DEFLATE)):
+        with pytest.raises(ValueError):
+            decode_event(body, content_type, encoding)
+
+def test_publish_announces_codec_in_message_properties():
+    pytest.importorskip("msgpack")
+    channel = MagicMock()
+    with patch("app.config.settings.EVENT_CODEC", "msgpack"):
+        publish_events([("client_deleted", {"_id": "42"})], channel=channel)
+    properties = channel.basic_publish.call_args.kwargs["properties"]
+    assert properties.content_type == MSGPACK
+    body = channel.basic_publish.call_args.kwargs["body"]
+    assert decode_event(body, properties.content_type) == {"_id": "42"}
+
+def test_consumer_negotiates_codec_per_message():
+    pytest.importorskip("msgpack")
+    broker = FakeBroker()
+    packed = encode_event(MESSAGE, codec="msgpack", compress_min_size=100)
+    broker.put("client_updated", packed.body, content_type=packed.content_type,
+               content_encoding=packed.content_encoding)
+    broker.put("client_updated", json.dumps({"_id": "legacy"}))
+    received = []
+    stop_event = threading.Event()
+    consumer = BatchConsumer(connection_factory=lambda: FakeConnection(broker),
+                             handlers={"client_updated": received.extend}, batch_timeout_ms=5)
+    thread = threading.Thread(target=consumer.run, args=(stop_event,))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while broker.acked < 2 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    stop_event.set()
+    thread.join(5)
+    assert sorted(message["_id"] for message in received) == ["abc", "legacy"]
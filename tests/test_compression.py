@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+import zlib
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from app.main import app
+from app.security.auth import create_access_token
+from app.utils.compression import CompressionMiddleware, available_encodings, negotiate, prefers_gzip, route_min_size
+
+client = TestClient(app)
+
+def auth():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'compress-admin', 'role': 'admin'})}"}
+
+def make_app():
+    application = FastAPI()
+
+    @application.get("/big")
+    def big():
+        return PlainTextResponse("x" * 5000)
+
+    @application.get("/small")
+    def small():
+        return PlainTextResponse("petit")
+
+    @application.get("/already")
+    def already():
+        return Response(gzip.compress(b"y" * 5000), media_type="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @application.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: 1\n\n"] * 300), media_type="text/event-stream")
+
+    application.add_middleware(CompressionMiddleware, encodings=["gzip"])
+    return application
+
+def test_negotiate_follows_server_preference_and_quality():
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("br;q=0, gzip;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("*", ["zstd", "gzip"]) == "zstd"
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate("", ["gzip"]) is None
+
+def test_available_encodings_skips_missing_packages():
+    with patch.dict("sys.modules", {"brotli": None, "zstandard": None}):
+        assert available_encodings("zstd,br,gzip,unknown") == ["gzip"]
+
+def test_export_gzip_follows_negotiation():
+    with patch("app.config.settings.COMPRESSION_ENCODINGS", "gzip"):
+        assert prefers_gzip("gzip, deflate")
+        assert not prefers_gzip("gzip;q=0, br")
+    with patch.dict("sys.modules", {"brotli": MagicMock()}), \
+            patch("app.config.settings.COMPRESSION_ENCODINGS", "br,gzip"):
+        # Le middleware choisirait br : l'export le laisse faire
+        assert not prefers_gzip("gzip, br")
+    with patch("app.config.settings.COMPRESSION_ENABLED", False):
+        assert prefers_gzip("gzip") and not prefers_gzip("identity")
+
+def test_route_thresholds():
+    with patch("app.config.settings.COMPRESSION_ROUTES", {"/token": -1, "/clients/export": 0}):
+        assert route_min_size("/token") == -1
+        assert route_min_size("/clients/export") == 0
+        assert route_min_size("/clients/") == 1024
+
+def test_large_response_is_compressed_small_one_is_not():
+    test_client = TestClient(make_app())
+    response = test_client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < 5000
+    assert response.text == "x" * 5000
+    small = test_client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers and small.text == "petit"
+    plain = test_client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+def test_encoded_and_event_stream_responses_are_left_alone():
+    test_client = TestClient(make_app())
+    already = test_client.get("/already", headers={"Accept-Encoding": "gzip"})
+    assert already.text == "y" * 5000
+    events = test_client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in events.headers
+
+def test_stream_is_compressed_chunk_by_chunk():
+    chunks = [f"ligne {index}\n".encode() for index in range(3)]
+    sent = []
+
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/stream", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(streaming_app, encodings=["gzip"])(scope, None, send))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip" and b"content-length" not in headers
+    # Chaque morceau est décodable dès son envoi, sans attendre la fin du flux
+    decompressor = zlib.decompressobj(31)
+    for chunk, message in zip(chunks, sent[1:]):
+        assert message["more_body"] is True
+        assert decompressor.decompress(message["body"]) == chunk
+    assert sent[-1]["more_body"] is False
+    decompressor.decompress(sent[-1]["body"])
+    assert decompressor.eof
+
+def test_token_route_is_never_compressed():
+    with patch("app.config.settings.COMPRESSION_MIN_SIZE", 0):
+        response = client.post("/token", data={"username": "admin", "password": "admin"},
+                               headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+@patch("app.routes.clients.publish_client_created")
+def test_summary_view_returns_summary_fields(_mock_publish):
+    payload = {"name": "Vue", "email": "vue@example.com", "company": "Kawa", "phone": "+33100000000",
+               "is_active": True}
+    assert client.post("/clients/", json=payload, headers=auth()).status_code == 201
+    response = client.get("/clients/?view=summary&limit=500", headers={**auth(), "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    item = next(item for item in response.json()["items"] if item["email"] == "vue@example.com")
+    assert set(item) == {"_id", "name", "email", "company", "is_active"}
+    assert client.get("/clients/?view=other", headers=auth()).status_code == 422
@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from benchmarks.bench_consumer import FakeBroker, FakeConnection
+from app.messaging.consumer import AckTracker, BatchConsumer, RETRY_HEADER, dead_letter_queue
+
+def run_until(broker, condition, timeout=5, **options):
+    stop_event = threading.Event()
+    consumer = BatchConsumer(connection_factory=lambda: FakeConnection(broker), **options)
+    thread = threading.Thread(target=consumer.run, args=(stop_event,))
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    stop_event.set()
+    thread.join(timeout)
+    assert not thread.is_alive()
+
+def test_ack_tracker_only_acks_contiguous_tags():
+    tracker = AckTracker()
+    for tag in range(1, 7):
+        tracker.delivered(tag)
+    assert tracker.settle([4, 5, 6]) is None
+    assert tracker.settle([1, 2]) == 2
+    assert tracker.settle([3]) == 6
+    assert len(tracker) == 0
+
+def test_messages_are_delivered_in_batches_and_multi_acked():
+    broker = FakeBroker()
+    for i in range(250):
+        broker.put("client_created", json.dumps({"n": i}))
+    batches = []
+    run_until(broker, lambda: broker.acked == 250,
+              handlers={"client_created": lambda messages: batches.append(len(messages))},
+              prefetch=300, batch_size=100, batch_timeout_ms=10, workers=2)
+    assert sorted(batches, reverse=True)[:2] == [100, 100]
+    assert sum(batches) == 250
+
+def test_poison_message_is_retried_then_dead_lettered():
+    broker = FakeBroker()
+    for i in range(5):
+        broker.put("client_updated", json.dumps({"n": i, "bad": i == 3}))
+    seen = []
+
+    def handler(messages):
+        if any(message["bad"] for message in messages):
+            raise ValueError("message empoisonné")
+        seen.extend(message["n"] for message in messages)
+
+    dead = broker.queue(dead_letter_queue("client_updated"))
+    run_until(broker, lambda: len(dead) == 1, handlers={"client_updated": handler},
+              prefetch=10, batch_size=5, batch_timeout_ms=5, max_retries=2)
+    assert sorted(set(seen)) == [0, 1, 2, 4]
+    _body, properties = dead[0]
+    assert properties.headers[RETRY_HEADER] == 3
+    retries = [headers[RETRY_HEADER] for _, key, headers in broker.published if key == "client_updated"]
+    assert retries == [1, 2]
+
+def test_invalid_json_goes_straight_to_dead_letter_queue():
+    broker = FakeBroker()
+    broker.put("client_deleted", b"not json")
+    dead = broker.queue(dead_letter_queue("client_deleted"))
+    run_until(broker, lambda: len(dead) == 1, handlers={"client_deleted": lambda messages: None},
+              batch_timeout_ms=5)
+    assert broker.acked == 1
+
+def test_stop_drains_buffered_messages():
+    broker = FakeBroker()
+    for i in range(3):
+        broker.put("client_created", json.dumps({"n": i}))
+    handled = []
+    run_until(broker, lambda: not broker.queue("client_created"),
+              handlers={"client_created": handled.extend},
+              batch_size=100, batch_timeout_ms=60000)
+    assert [message["n"] for message in handled] == [0, 1, 2]
+    assert broker.acked == 3
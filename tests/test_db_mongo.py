@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import mongomock
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from pymongo.errors import DuplicateKeyError
+from app.db import mongo
+from app.db.monitoring import CommandMetrics, PoolMetrics
+from app.main import app
+from app.security.auth import create_access_token
+from app.services import client_service
+
+def test_client_is_created_on_first_use_with_settings():
+    factory = MagicMock()
+    mongo.close_client()
+    with patch.object(mongo, "MongoClient", factory), \
+         patch("app.config.settings.MONGO_WRITE_CONCERN", "1"), \
+         patch("app.config.settings.MONGO_COMPRESSORS", "zlib"):
+        collection = mongo.LazyCollection("clients", mongo.get_db)
+        factory.assert_not_called()
+        collection.find_one({})
+        collection.count_documents({})
+        factory.assert_called_once()
+        options = factory.call_args.kwargs
+        mongo.close_client()
+    assert options["w"] == 1 and options["compressors"] == "zlib"
+    assert options["maxPoolSize"] == 100 and options["readPreference"] == "primary"
+    assert len(options["event_listeners"]) == 2
+    factory.return_value.close.assert_called_once()
+
+def test_ensure_indexes_replaces_non_unique_email_index():
+    collection = mongomock.MongoClient().db.clients
+    collection.create_index([("email", 1)])
+    with patch.object(client_service, "clients_collection", collection):
+        client_service.ensure_indexes()
+    indexes = collection.index_information()
+    assert indexes["email_1"].get("unique") is True
+    assert {"is_active_1__id_1", "company_1__id_1"} <= set(indexes)
+
+def test_command_and_pool_listeners_export_metrics():
+    def sample(name, labels=None):
+        return REGISTRY.get_sample_value(name, labels or {}) or 0
+    before = sample("mongo_command_duration_seconds_count", {"command": "find"})
+    failures = sample("mongo_command_failures_total", {"command": "insert"})
+    checked_out = sample("mongo_pool_checked_out")
+    commands = CommandMetrics()
+    commands.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+    commands.failed(SimpleNamespace(command_name="insert", duration_micros=800))
+    pool = PoolMetrics()
+    pool.connection_checked_out(SimpleNamespace(duration=0.002))
+    assert sample("mongo_command_duration_seconds_count", {"command": "find"}) == before + 1
+    assert sample("mongo_command_failures_total", {"command": "insert"}) == failures + 1
+    assert sample("mongo_pool_checked_out") == checked_out + 1
+    pool.connection_checked_in(SimpleNamespace())
+
+def test_duplicate_email_returns_409():
+    token = create_access_token({"sub": "admin", "role": "admin"})
+    with patch("app.routes.clients.create_client", side_effect=DuplicateKeyError("email_1")):
+        response = TestClient(app).post(
+            "/clients/", json={"name": "Twin", "email": "twin@example.com"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    assert response.status_code == 409
+
+def test_duplicate_emails_keep_other_indexes_and_are_named():
+    collection = mongomock.MongoClient().db.clients
+    collection.create_index([("email", 1)])
+    collection.insert_many([{"name": "A", "email": "dup@example.com"}, {"name": "B", "email": "dup@example.com"},
+                            {"name": "C", "email": "seul@example.com"}])
+    with patch.object(client_service, "clients_collection", collection):
+        with pytest.raises(client_service.DuplicateEmailsError, match="dup@example.com") as error:
+            client_service.ensure_indexes()
+    assert error.value.emails == ["dup@example.com"]
+    indexes = collection.index_information()
+    # Ancien index email conservé, les autres créés, clés de recherche calculées
+    assert not indexes["email_1"].get("unique")
+    assert {"is_active_1__id_1", "company_1__id_1", "updated_at_1"} <= set(indexes)
+    assert collection.count_documents({"name_lc": {"$exists": False}}) == 0
@@ -0,0 +1,18 @@
+import gzip
+import json
+from app.services.export import CsvEncoder, NdjsonEncoder, stream_export
+
+ITEMS = [{"_id": str(i), "name": f"N{i}", "email": f"n{i}@example.com"} for i in range(5)]
+
+def batches(size):
+    return (ITEMS[i:i + size] for i in range(0, len(ITEMS), size))
+
+def test_ndjson_stream_yields_one_chunk_per_batch():
+    chunks = [chunk for chunk in stream_export(batches(2), NdjsonEncoder()) if chunk]
+    assert len(chunks) == 3
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == ITEMS
+
+def test_csv_stream_with_gzip():
+    body = b"".join(stream_export(batches(2), CsvEncoder(["_id", "name"]), gzip=True))
+    lines = gzip.decompress(body).decode().splitlines()
+    assert lines == ["_id,name"] + [f"{i},N{i}" for i in range(5)]
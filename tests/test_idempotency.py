@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch
+import mongomock
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.main import app
+from app.security.auth import create_access_token
+from app.services import client_service
+from app.services.cache import get_client_cache
+from app.services.idempotency import PENDING, REPLAYED_HEADER
+from app.utils.singleflight import AsyncSingleFlight, SingleFlight
+
+client = TestClient(app)
+
+def auth(sub="idem-admin"):
+    return {"Authorization": f"Bearer {create_access_token({'sub': sub, 'role': 'admin'})}"}
+
+def deduplicated(kind):
+    return REGISTRY.get_sample_value("deduplicated_requests_total", {"kind": kind}) or 0
+
+# Collections propres au test : les clés et emails fixes ne retrouvent pas les réponses
+# enregistrées par une exécution précédente sur une base persistante
+@pytest.fixture
+def collections():
+    db = mongomock.MongoClient().db
+    with patch("app.db.mongo.idempotency_collection", db.idempotency_keys), \
+            patch("app.services.client_service.clients_collection", db.clients):
+        yield db
+
+def payload(email):
+    return {"name": "Idem", "email": email, "company": "Kawa", "phone": "+33100000000", "is_active": True}
+
+@patch("app.routes.clients.publish_client_created")
+def test_create_retry_is_replayed_once(mock_publish, collections):
+    headers = {**auth(), "Idempotency-Key": "create-1"}
+    before = deduplicated("idempotency")
+    first = client.post("/clients/", json=payload("idem1@example.com"), headers=headers)
+    second = client.post("/clients/", json=payload("idem1@example.com"), headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers[REPLAYED_HEADER] == "true" and REPLAYED_HEADER not in first.headers
+    assert mock_publish.call_count == 1
+    assert deduplicated("idempotency") == before + 1
+    # Clé propre à l'utilisateur
+    other = client.post("/clients/", json=payload("idem1b@example.com"),
+                        headers={**auth("someone-else"), "Idempotency-Key": "create-1"})
+    assert other.status_code == 201 and REPLAYED_HEADER not in other.headers
+
+@patch("app.routes.clients.publish_client_created")
+def test_key_reused_with_other_payload_is_rejected(_mock_publish, collections):
+    headers = {**auth(), "Idempotency-Key": "create-2"}
+    assert client.post("/clients/", json=payload("idem2@example.com"), headers=headers).status_code == 201
+    assert client.post("/clients/", json=payload("idem3@example.com"), headers=headers).status_code == 422
+
+@patch("app.routes.clients.publish_client_created")
+def test_failed_request_releases_key(_mock_publish, collections):
+    headers = {**auth(), "Idempotency-Key": "create-3"}
+    failing = TestClient(app, raise_server_exceptions=False)
+    with patch("app.routes.clients.create_client", side_effect=RuntimeError("panne")):
+        assert failing.post("/clients/", json=payload("idem4@example.com"), headers=headers).status_code == 500
+    response = client.post("/clients/", json=payload("idem4@example.com"), headers=headers)
+    assert response.status_code == 201 and REPLAYED_HEADER not in response.headers
+
+def test_key_in_progress_returns_409():
+    collection = mongomock.MongoClient().db.idempotency_keys
+    with patch("app.db.mongo.idempotency_collection", collection):
+        from app.services.idempotency import request_fingerprint  # pylint: disable=import-outside-toplevel
+        now = client_service.utc_now()
+        collection.insert_one({"_id": "idem-admin:busy", "status": PENDING, "created_at": now,
+                               "locked_until": now + timedelta(seconds=60),
+                               "fingerprint": request_fingerprint(f"DELETE /clients/{'0' * 24}")})
+        response = client.delete(f"/clients/{'0' * 24}", headers={**auth(), "Idempotency-Key": "busy"})
+    assert response.status_code == 409
+
+@patch("app.routes.clients.publish_client_deleted")
+def test_expired_lease_is_taken_over(mock_deleted):
+    idempotency = mongomock.MongoClient().db.idempotency_keys
+    clients = mongomock.MongoClient().db.clients
+    client_id = clients.insert_one({"name": "Lease", "email": "lease@example.com"}).inserted_id
+    with patch("app.db.mongo.idempotency_collection", idempotency), \
+            patch("app.services.client_service.clients_collection", clients):
+        from app.services.idempotency import request_fingerprint  # pylint: disable=import-outside-toplevel
+        # Processus arrêté avant d'enregistrer sa réponse : réservation restée en cours, bail échu
+        now = client_service.utc_now()
+        idempotency.insert_one({"_id": "idem-admin:crashed", "status": PENDING, "created_at": now, "lease": "old",
+                                "locked_until": now - timedelta(seconds=1),
+                                "fingerprint": request_fingerprint(f"DELETE /clients/{client_id}")})
+        headers = {**auth(), "Idempotency-Key": "crashed"}
+        assert client.delete(f"/clients/{client_id}", headers=headers).status_code == 204
+        replay = client.delete(f"/clients/{client_id}", headers=headers)
+    assert replay.status_code == 204 and replay.headers[REPLAYED_HEADER] == "true"
+    assert mock_deleted.call_count == 1
+    assert idempotency.find_one({"_id": "idem-admin:crashed"})["lease"] != "old"
+
+@patch("app.routes.clients.publish_client_deleted")
+@patch("app.routes.clients.publish_client_updated")
+@patch("app.routes.clients.publish_client_created")
+def test_update_and_delete_replay(_created, mock_updated, mock_deleted, collections):
+    client_id = client.post("/clients/", json=payload("idem5@example.com"), headers=auth()).json()["_id"]
+    headers = {**auth(), "Idempotency-Key": "update-1"}
+    changed = {**payload("idem5@example.com"), "name": "Idem bis"}
+    first = client.put(f"/clients/{client_id}", json=changed, headers=headers)
+    second = client.put(f"/clients/{client_id}", json=changed, headers=headers)
+    assert second.json() == first.json() and second.headers["ETag"] == first.headers["ETag"]
+    assert mock_updated.call_count == 1
+    headers = {**auth(), "Idempotency-Key": "delete-1"}
+    assert client.delete(f"/clients/{client_id}", headers=headers).status_code == 204
+    replay = client.delete(f"/clients/{client_id}", headers=headers)
+    assert replay.status_code == 204 and replay.headers[REPLAYED_HEADER] == "true"
+    assert mock_deleted.call_count == 1
+
+def test_concurrent_lookups_share_one_query():
+    client_id = str(ObjectId())
+    get_client_cache().clear()
+    calls = []
+
+    def slow_find_one(query):
+        calls.append(query)
+        time.sleep(0.1)
+        return {"_id": query["_id"], "name": "Solo", "email": "solo@example.com", "company": "Kawa",
+                "phone": "+33100000000", "is_active": True}
+
+    before = deduplicated("get_client")
+    with patch("app.services.client_service.clients_collection.find_one", side_effect=slow_find_one):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client_service.get_client_document(client_id)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(calls) == 1
+    assert [document["name"] for document in results] == ["Solo"] * 5
+    assert deduplicated("get_client") == before + 4
+
+def test_single_flight_shares_exceptions_and_forgets_key():
+    flight = SingleFlight("test")
+    try:
+        flight.do("k", lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+    assert flight.do("k", lambda: 2) == 2
+
+def test_async_single_flight():
+    flight = AsyncSingleFlight("test")
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return {"key": key}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("a", load, "a") for _ in range(3)), flight.do("b", load, "b"))
+
+    results = asyncio.run(scenario())
+    assert calls == ["a", "b"]
+    assert results == [{"key": "a"}] * 3 + [{"key": "b"}]
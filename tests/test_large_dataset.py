@@ -0,0 +1,174 @@
+import os
+import time
+import tracemalloc
+from contextlib import ExitStack
+from unittest.mock import patch
+import mongomock
+import pytest
+from fastapi.testclient import TestClient
+from pymongo import MongoClient
+from app.config import settings
+from app.main import app
+from app.messaging import publisher
+from app.messaging.rabbitmq import publish_client_updated
+from app.security.auth import create_access_token
+from app.services.cache import LRUCache, set_client_cache
+from app.services.client_service import CLIENT_INDEXES
+from app.utils.helpers import encode_cursor
+from benchmarks.bench_consumer import FakeConnection
+from benchmarks.datagen import client_id, generate_clients, load_clients
+from benchmarks.load_test import percentile
+from benchmarks.stand_ins import DiscardingBroker
+
+# Budgets de temps et de mémoire sur un grand jeu de clients générés (benchmarks.datagen).
+# Hors CI : pytest -m largedata. LARGE_DATASET_SIZES choisit les tailles ;
+# LARGE_DATASET_MONGO_URI vise un mongod local (indexé), sinon mongomock.
+pytestmark = pytest.mark.largedata
+
+SIZES = [int(size) for size in os.environ.get("LARGE_DATASET_SIZES", "10000,100000,1000000").split(",")]
+MONGO_URI = os.environ.get("LARGE_DATASET_MONGO_URI")
+# mongomock n'a pas d'index : chaque requête parcourt la collection
+MOCK_MAX_SIZE = 100_000
+REPEATS = 20
+
+# p95 en ms : (part fixe, part par tranche de 10k clients sous mongomock)
+TIME_BUDGETS = {
+    "list": (50, 400),
+    "lookup": (10, 60),
+    "cached_lookup": (5, 0),
+    "update": (25, 150),
+    "publish": (5, 0),
+}
+# Pic mémoire d'une page de liste, en Mo (mêmes parts)
+MEMORY_BUDGET = (8, 6)
+
+def budget(parts, size):
+    fixed, per_10k = parts
+    return fixed if MONGO_URI else fixed + per_10k * size / 10_000
+
+def p95(call, runs=REPEATS):
+    call(0)
+    latencies = []
+    for run in range(1, runs + 1):
+        start = time.perf_counter()
+        call(run)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentile(sorted(latencies), 95)
+
+def auth():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'largedata-admin', 'role': 'admin'})}"}
+
+def open_collection(size):
+    if MONGO_URI:
+        mongo_client = MongoClient(MONGO_URI)
+        collection = mongo_client[f"{settings.DATABASE_NAME}_largedata"]["clients"]
+        # Jeu reproductible : gardé d'une exécution à l'autre s'il a déjà la bonne taille
+        if collection.estimated_document_count() != size:
+            collection.drop()
+            load_clients(collection, size)
+            collection.create_indexes(CLIENT_INDEXES)
+        return mongo_client, collection
+    if size > MOCK_MAX_SIZE:
+        pytest.skip(f"{size} clients : trop lent sous mongomock, définir LARGE_DATASET_MONGO_URI")
+    mongo_client = mongomock.MongoClient()
+    collection = mongo_client["largedata"]["clients"]
+    load_clients(collection, size)
+    return mongo_client, collection
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size // 1000}k")
+def dataset(request):
+    size = request.param
+    mongo_client, collection = open_collection(size)
+    broker = DiscardingBroker()
+    fake_publisher = publisher.RabbitMQPublisher(
+        connection_factory=lambda: FakeConnection(broker), reconnect_backoff=0
+    )
+    with ExitStack() as stack:
+        stack.enter_context(patch("app.services.client_service.clients_collection", collection))
+        stack.enter_context(patch.object(publisher, "_publisher", fake_publisher))
+        stack.enter_context(patch.object(settings, "RATE_LIMIT_ENABLED", False))
+        stack.enter_context(patch.object(settings, "EVENTS_MODE", "inline"))
+        yield size, broker
+    fake_publisher.close()
+    if not MONGO_URI:
+        collection.drop()
+    mongo_client.close()
+
+@pytest.fixture
+def client():
+    set_client_cache(LRUCache(max_size=10_000, ttl=60))
+    yield TestClient(app)
+    set_client_cache(None)
+
+def test_list_first_and_deep_pages(dataset, client):
+    size, _broker = dataset
+    headers = auth()
+
+    def first_page(_run):
+        response = client.get("/clients/?limit=100", headers=headers)
+        assert response.status_code == 200 and len(response.json()["items"]) == 100
+
+    # Curseur placé avant les 200 derniers clients : la fin de la pagination
+    deep_cursor = encode_cursor(client_id(size - 200))
+
+    def deep_page(_run):
+        response = client.get(f"/clients/?limit=100&cursor={deep_cursor}", headers=headers)
+        assert response.json()["items"][0]["_id"] == str(client_id(size - 199))
+
+    assert p95(first_page) < budget(TIME_BUDGETS["list"], size)
+    assert p95(deep_page) < budget(TIME_BUDGETS["list"], size)
+
+def test_list_page_memory(dataset, client):
+    size, _broker = dataset
+    headers = auth()
+    client.get("/clients/?limit=100", headers=headers)
+    tracemalloc.start()
+    try:
+        assert client.get("/clients/?limit=100", headers=headers).status_code == 200
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak / 2 ** 20 < budget(MEMORY_BUDGET, size)
+
+def test_lookup_by_id(dataset, client):
+    size, _broker = dataset
+    headers = auth()
+    step = size // (REPEATS + 1)
+
+    # Un client différent à chaque appel : lecture en base
+    def miss(run):
+        assert client.get(f"/clients/{client_id(run * step)}", headers=headers).status_code == 200
+
+    def hit(_run):
+        assert client.get(f"/clients/{client_id(size - 1)}", headers=headers).status_code == 200
+
+    assert p95(miss) < budget(TIME_BUDGETS["lookup"], size)
+    assert p95(hit) < budget(TIME_BUDGETS["cached_lookup"], size)
+
+def test_update_publishes_event(dataset, client):
+    size, broker = dataset
+    headers = auth()
+    step = size // (REPEATS + 1)
+    published = broker.count
+
+    def update(run):
+        index = run * step + 1
+        document = next(generate_clients(1, start=index))
+        payload = {name: document[name] for name in ("email", "company", "phone", "is_active")}
+        payload["name"] = f"{document['name']} ({run})"
+        assert client.put(f"/clients/{client_id(index)}", json=payload, headers=headers).status_code == 200
+
+    assert p95(update) < budget(TIME_BUDGETS["update"], size)
+    assert broker.count - published == REPEATS + 1
+
+def test_publish_client_updated(dataset):
+    size, broker = dataset
+    documents = list(generate_clients(REPEATS + 1, start=size // 2))
+    published = broker.count
+
+    def publish(run):
+        fields = ("name", "email", "company", "phone", "is_active")
+        publish_client_updated({"_id": str(documents[run]["_id"]), **{name: documents[run][name] for name in fields}})
+
+    assert p95(publish) < budget(TIME_BUDGETS["publish"], size)
+    assert broker.count - published == REPEATS + 1
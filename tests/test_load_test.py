@@ -0,0 +1,19 @@
+from benchmarks.load_test import compare, percentile, summarize
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+def test_summary_reports_latency_in_ms_and_rps():
+    result = summarize("GET /clients/", 10, [0.001, 0.002, 0.003, 0.004], errors=1, elapsed=0.5)
+    assert result["rps"] == 8.0
+    assert result["p50_ms"] == 2.0 and result["p99_ms"] == 4.0
+    assert result["errors"] == 1
+
+def test_compare_flags_regressions_beyond_tolerance():
+    previous = {"results": [{"route": "GET /clients/", "concurrency": 10, "rps": 100.0, "p95_ms": 10.0}]}
+    slower = {"results": [{"route": "GET /clients/", "concurrency": 10, "rps": 80.0, "p95_ms": 10.5}]}
+    assert len(compare(previous, slower, 0.1)) == 1
+    assert compare(previous, slower, 0.25) == []
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock, patch
+import json
+import mongomock
+import pytest
+from pika.exceptions import NackError, StreamLostError
+from app.config import settings
+from app.messaging.outbox import OutboxDispatcher, enqueue_event, DEAD, PENDING, SENT
+from app.models.client import ClientModel
+
+class FakeChannel:
+    def __init__(self, fail_on=()):
+        self.is_open = True
+        self.published = []
+        self.fail_on = dict(fail_on)
+        self.confirms = False
+
+    def exchange_declare(self, **_kwargs):
+        pass
+
+    def queue_declare(self, **_kwargs):
+        pass
+
+    def queue_bind(self, **_kwargs):
+        pass
+
+    def confirm_delivery(self):
+        self.confirms = True
+
+    def basic_publish(self, exchange, routing_key, body, properties, mandatory):
+        error = self.fail_on.get(len(self.published))
+        if error is not None:
+            self.fail_on.pop(len(self.published))
+            raise error
+        self.published.append((routing_key, json.loads(body), properties.message_id))
+
+    def close(self):
+        self.is_open = False
+
+def make_dispatcher(collection, channel, **kwargs):
+    connection = MagicMock(is_open=True)
+    connection.channel.return_value = channel
+    kwargs.setdefault("retry_backoff", 0)
+    return OutboxDispatcher(collection=collection, connection_factory=lambda: connection, **kwargs)
+
+@pytest.fixture
+def outbox():
+    return mongomock.MongoClient().db.outbox
+
+def test_dispatch_publishes_batch_with_confirms(outbox):
+    for i in range(5):
+        enqueue_event("client_created", {"name": f"C{i}", "email": f"c{i}@example.com", "is_active": True}, collection=outbox)
+    channel = FakeChannel()
+    dispatcher = make_dispatcher(outbox, channel, batch_size=3)
+
+    assert dispatcher.dispatch_once() == 3
+    assert dispatcher.dispatch_once() == 2
+    assert dispatcher.dispatch_once() == 0
+
+    assert channel.confirms
+    assert [body["name"] for _, body, _ in channel.published] == ["C0", "C1", "C2", "C3", "C4"]
+    assert outbox.count_documents({"status": SENT}) == 5
+    assert dispatcher.refresh_metrics() == (0, 0)
+
+def test_nacked_event_is_retried_then_dead_lettered(outbox):
+    enqueue_event("client_deleted", {"_id": "abc"}, collection=outbox)
+    channel = FakeChannel(fail_on={0: NackError([])})
+    dispatcher = make_dispatcher(outbox, channel, max_attempts=2)
+
+    assert dispatcher.dispatch_once() == 0
+    event = outbox.find_one()
+    assert event["status"] == PENDING and event["attempts"] == 1
+
+    assert dispatcher.dispatch_once() == 1
+    assert channel.published[0][1] == {"_id": "abc"}
+
+    enqueue_event("client_deleted", {"_id": "def"}, collection=outbox)
+    channel.fail_on = {1: NackError([])}
+    dispatcher.max_attempts = 1
+    dispatcher.dispatch_once()
+    assert outbox.find_one({"status": DEAD}) is not None
+
+def test_connection_loss_requeues_remaining_events(outbox):
+    for i in range(3):
+        enqueue_event("client_deleted", {"_id": str(i)}, collection=outbox)
+    channel = FakeChannel(fail_on={1: StreamLostError("lost")})
+    dispatcher = make_dispatcher(outbox, channel)
+
+    assert dispatcher.dispatch_once() == 1
+    assert outbox.count_documents({"status": PENDING}) == 2
+    backlog, _ = dispatcher.refresh_metrics()
+    assert backlog == 2
+
+def test_expired_lease_is_reclaimed(outbox):
+    enqueue_event("client_deleted", {"_id": "x"}, collection=outbox)
+    dispatcher = make_dispatcher(outbox, FakeChannel(), lease_seconds=-1)
+    assert len(dispatcher.claim_batch()) == 1
+    # Le dispatcher précédent s'est arrêté sans confirmer : le bail expiré libère l'événement
+    assert len(dispatcher.claim_batch()) == 1
+
+def test_service_writes_outbox_event_in_outbox_mode(outbox):
+    clients = mongomock.MongoClient().db.clients
+    with patch.object(settings, "EVENTS_MODE", "outbox"), \
+            patch("app.services.client_service.clients_collection", clients), \
+            patch("app.messaging.outbox.outbox_collection", outbox):
+        from app.services.client_service import create_client, delete_client
+        created = create_client(ClientModel(name="Outbox", email="outbox@example.com"))
+        delete_client(str(created.id))
+
+    events = list(outbox.find(sort=[("_id", 1)]))
+    assert [e["queue"] for e in events] == ["client_created", "client_deleted"]
+    assert json.loads(events[1]["body"]) == {"_id": str(created.id)}
@@ -0,0 +1,103 @@
+from unittest.mock import MagicMock
+import threading
+import pytest
+from pika.exceptions import AMQPConnectionError, StreamLostError
+from app.messaging.publisher import RabbitMQPublisher, QUEUES
+
+def make_connection():
+    connection = MagicMock()
+    connection.is_open = True
+    connection.channel.side_effect = lambda: MagicMock(is_open=True)
+    return connection
+
+def make_publisher(factory, **kwargs):
+    kwargs.setdefault("reconnect_attempts", 3)
+    kwargs.setdefault("reconnect_backoff", 0)
+    return RabbitMQPublisher(url="amqp://test", connection_factory=factory, **kwargs)
+
+def test_start_declares_queues_once():
+    connection = make_connection()
+    factory = MagicMock(return_value=connection)
+    publisher = make_publisher(factory)
+    publisher.start()
+    for _ in range(5):
+        publisher.publish("client_created", "{}")
+
+    factory.assert_called_once()
+    first_channel = publisher._channel
+    assert [c.kwargs["queue"] for c in first_channel.queue_declare.call_args_list] == list(QUEUES)
+    assert first_channel.basic_publish.call_count == 5
+
+def test_channel_is_shared_and_held_by_one_thread_at_a_time():
+    connection = make_connection()
+    publisher = make_publisher(MagicMock(return_value=connection))
+    acquired = threading.Event()
+
+    def borrow():
+        with publisher.channel():
+            acquired.set()
+
+    with publisher.channel() as first:
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        assert not acquired.wait(0.05)
+    thread.join()
+    assert acquired.is_set()
+    with publisher.channel() as again:
+        assert again is first
+    assert connection.channel.call_count == 1
+
+def test_publish_reconnects_after_lost_connection():
+    broken = make_connection()
+    healthy = make_connection()
+    factory = MagicMock(side_effect=[broken, healthy])
+    publisher = make_publisher(factory)
+    publisher.start()
+    publisher._channel.basic_publish.side_effect = StreamLostError("lost")
+
+    publisher.publish("client_updated", "{}")
+
+    assert factory.call_count == 2
+    broken.close.assert_called_once()
+    publisher._channel.basic_publish.assert_called_once()
+
+def test_connect_retries_with_backoff_then_fails():
+    factory = MagicMock(side_effect=AMQPConnectionError("down"))
+    publisher = make_publisher(factory, reconnect_attempts=3)
+    with pytest.raises(AMQPConnectionError):
+        publisher.start()
+    assert factory.call_count == 3
+
+def test_close_releases_connection():
+    connection = make_connection()
+    publisher = make_publisher(MagicMock(return_value=connection))
+    publisher.start()
+    publisher.close()
+    connection.close.assert_called_once()
+    assert not publisher.is_connected
+    with pytest.raises(RuntimeError):
+        publisher.publish("client_deleted", "{}")
+
+def test_publish_from_several_threads_shares_one_connection():
+    connection = make_connection()
+    factory = MagicMock(return_value=connection)
+    publisher = make_publisher(factory)
+    threads = [
+        threading.Thread(target=lambda: [publisher.publish("client_created", "{}") for _ in range(20)])
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    factory.assert_called_once()
+    assert connection.channel.call_count == 1
+    assert publisher._channel.basic_publish.call_count == 160
+
+def test_publish_many_uses_a_single_channel():
+    connection = make_connection()
+    publisher = make_publisher(MagicMock(return_value=connection))
+    publisher.publish_many([("client_created", str(i)) for i in range(10)])
+    channel = publisher._channel
+    assert channel.basic_publish.call_count == 10
+    assert connection.channel.call_count == 1
@@ -38,11 +38,8 @@ def test_consume_client_created_callback_wrapper():
         mock_callback.assert_called_once_with({"name": "CallbackTest"})
         mock_channel.basic_ack.assert_called_once_with(delivery_tag="abc123")
 
-@patch("app.messaging.rabbitmq.get_channel")
-def test_publish_client_updated(mock_get_channel):
-    mock_channel = MagicMock()
-    mock_get_channel.return_value = mock_channel
-
+@patch("app.messaging.rabbitmq.get_publisher")
+def test_publish_client_updated(mock_get_publisher):
     from app.messaging.rabbitmq import publish_client_updated
     data = {
         "_id": "abc123",
@@ -54,19 +51,16 @@ def test_publish_client_updated(mock_get_channel):
     }
     publish_client_updated(data)
 
-    mock_channel.basic_publish.assert_called_once()
-    mock_channel.close.assert_called_once()
-
-@patch("app.messaging.rabbitmq.get_channel")
-def test_publish_client_deleted(mock_get_channel):
-    mock_channel = MagicMock()
-    mock_get_channel.return_value = mock_channel
+    mock_get_publisher.return_value.publish.assert_called_once()
+    assert mock_get_publisher.return_value.publish.call_args.args[0] == "client_updated"
 
+@patch("app.messaging.rabbitmq.get_publisher")
+def test_publish_client_deleted(mock_get_publisher):
     from app.messaging.rabbitmq import publish_client_deleted
     publish_client_deleted("some-client-id")
 
-    mock_channel.basic_publish.assert_called_once()
-    mock_channel.close.assert_called_once()
+    mock_get_publisher.return_value.publish.assert_called_once()
+    assert mock_get_publisher.return_value.publish.call_args.args[0] == "client_deleted"
 
 @patch("pika.BlockingConnection")
 def test_get_channel(mock_connection):
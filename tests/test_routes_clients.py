@@ -1,4 +1,7 @@
 from fastapi.testclient import TestClient
+import json
+from datetime import datetime, timedelta
+from bson import ObjectId
 from unittest.mock import patch
 from app.main import app
 from app.security.auth import create_access_token
@@ -80,3 +83,158 @@ def test_update_client_no_change(mock_updated, mock_created):
 
     response = client.put(f"/clients/{client_id}", json=payload, headers=get_auth_headers())
     assert response.status_code == 200
+
+@patch("app.routes.clients.publish_client_created")
+def test_list_clients_paginates_with_cursor(mock_created):
+    company = f"PageCorp-{ObjectId()}"
+    for i in range(5):
+        payload = {"name": f"Page {i}", "email": f"page{i}@example.com", "company": company, "is_active": i != 2}
+        client.post("/clients/", json=payload, headers=get_auth_headers())
+
+    names, cursor = [], None
+    while True:
+        params = {"company": company, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/clients/", params=params, headers=get_auth_headers()).json()
+        names += [item["name"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert names == [f"Page {i}" for i in range(5)]
+
+    inactive = client.get("/clients/", params={"company": company, "is_active": False}, headers=get_auth_headers()).json()
+    assert [item["name"] for item in inactive["items"]] == ["Page 2"]
+
+    prefixed = client.get("/clients/", params={"company": company, "email_prefix": "page4"}, headers=get_auth_headers()).json()
+    assert [item["name"] for item in prefixed["items"]] == ["Page 4"]
+
+def test_list_clients_projection_and_invalid_params():
+    projected = client.get("/clients/", params={"fields": "name", "limit": 1}, headers=get_auth_headers())
+    assert projected.status_code == 200
+    for item in projected.json()["items"]:
+        assert set(item) == {"_id", "name"}
+
+    assert client.get("/clients/", params={"fields": "password"}, headers=get_auth_headers()).status_code == 400
+    assert client.get("/clients/", params={"cursor": "not-a-cursor"}, headers=get_auth_headers()).status_code == 400
+
+@patch("app.routes.clients.publish_client_created")
+def test_export_streams_ndjson_and_csv(mock_created):
+    company = f"ExportCorp-{ObjectId()}"
+    for i in range(3):
+        payload = {"name": f"Export {i}", "email": f"export{i}@example.com", "company": company}
+        client.post("/clients/", json=payload, headers=get_auth_headers())
+
+    ndjson = client.get("/clients/export", params={"company": company},
+                        headers={**get_auth_headers(), "Accept-Encoding": "identity"})
+    assert ndjson.status_code == 200
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert "content-encoding" not in ndjson.headers
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [line["name"] for line in lines] == ["Export 0", "Export 1", "Export 2"]
+
+    csv_resp = client.get("/clients/export", params={"company": company, "format": "csv", "fields": "name,email"},
+                          headers={**get_auth_headers(), "Accept-Encoding": "gzip"})
+    assert csv_resp.headers["content-encoding"] == "gzip"
+    rows = csv_resp.text.splitlines()
+    assert rows[0] == "_id,name,email"
+    assert rows[1].endswith(",Export 0,export0@example.com")
+
+def test_export_requires_admin_and_valid_params():
+    assert client.get("/clients/export", headers=get_auth_headers("user")).status_code == 403
+    assert client.get("/clients/export", params={"format": "xml"}, headers=get_auth_headers()).status_code == 422
+    assert client.get("/clients/export", params={"fields": "secret"}, headers=get_auth_headers()).status_code == 400
+
+@patch("app.routes.clients.publish_events")
+def test_bulk_endpoint_publishes_events_once(mock_publish_events):
+    operations = [
+        {"op": "create", "data": {"name": f"Bulk Route {i}", "email": f"bulkroute{i}@example.com"}}
+        for i in range(3)
+    ] + [{"op": "delete", "id": "bad-id"}]
+    response = client.post("/clients/bulk", json={"operations": operations}, headers=get_auth_headers())
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 3 and body["errors"] == 1
+    mock_publish_events.assert_called_once()
+    assert len(mock_publish_events.call_args.args[0]) == 3
+
+def test_bulk_endpoint_limits():
+    too_many = {"operations": [{"op": "delete", "id": str(ObjectId())}] * 1001}
+    assert client.post("/clients/bulk", json=too_many, headers=get_auth_headers()).status_code == 413
+    assert client.post("/clients/bulk", json={"operations": []}, headers=get_auth_headers("user")).status_code == 403
+
+@patch("app.routes.clients.publish_client_created")
+def test_fast_read_path_matches_validated_response(mock_publish):
+    payload = {"name": "Fast Path", "email": "fast@example.com", "company": "FastCorp"}
+    client_id = client.post("/clients/", json=payload, headers=get_auth_headers()).json()["_id"]
+    list_params = {"company": "FastCorp"}
+
+    with patch("app.config.settings.READ_FAST_PATH", True):
+        fast = client.get(f"/clients/{client_id}", headers=get_auth_headers())
+        fast_page = client.get("/clients/", params=list_params, headers=get_auth_headers())
+    with patch("app.config.settings.READ_FAST_PATH", False):
+        validated = client.get(f"/clients/{client_id}", headers=get_auth_headers())
+        validated_page = client.get("/clients/", params=list_params, headers=get_auth_headers())
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.json() == validated.json()
+    assert fast_page.json() == validated_page.json()
+    assert fast.headers["content-type"] == "application/json"
+
+@patch("app.routes.clients.publish_client_updated")
+@patch("app.routes.clients.publish_client_created")
+def test_conditional_get_and_if_match(mock_created, mock_updated):
+    payload = {"name": "Etag", "email": "etag@example.com"}
+    created = client.post("/clients/", json=payload, headers=get_auth_headers()).json()
+    assert created["version"] == 1
+    client_id = created["_id"]
+
+    first = client.get(f"/clients/{client_id}", headers=get_auth_headers())
+    assert first.headers["etag"] == '"1"'
+    assert "last-modified" in first.headers
+    cached = client.get(f"/clients/{client_id}", headers={**get_auth_headers(), "If-None-Match": '"1"'})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    stale = client.put(f"/clients/{client_id}", json={**payload, "name": "Stale"},
+                       headers={**get_auth_headers(), "If-Match": '"7"'})
+    assert stale.status_code == 412
+    updated = client.put(f"/clients/{client_id}", json={**payload, "name": "Fresh", "version": 42},
+                         headers={**get_auth_headers(), "If-Match": '"1"'})
+    assert updated.status_code == 200
+    assert updated.json()["version"] == 2
+    assert updated.headers["etag"] == '"2"'
+    refreshed = client.get(f"/clients/{client_id}", headers={**get_auth_headers(), "If-None-Match": '"1"'})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["name"] == "Fresh"
+
+    missing = client.put(f"/clients/{ObjectId()}", json=payload, headers={**get_auth_headers(), "If-Match": '"1"'})
+    assert missing.status_code == 404
+
+@patch("app.routes.clients.publish_client_updated")
+@patch("app.routes.clients.publish_client_created")
+def test_list_updated_since_and_etag(mock_created, mock_updated):
+    company = f"DeltaCorp-{ObjectId()}"
+    ids = [
+        client.post("/clients/", json={"name": f"Delta {i}", "email": f"delta{i}@example.com", "company": company},
+                    headers=get_auth_headers()).json()["_id"]
+        for i in range(2)
+    ]
+    page = client.get("/clients/", params={"company": company}, headers=get_auth_headers())
+    etag = page.headers["etag"]
+    assert etag.startswith('W/"')
+    assert client.get("/clients/", params={"company": company},
+                      headers={**get_auth_headers(), "If-None-Match": etag}).status_code == 304
+
+    since = max(item["updated_at"] for item in page.json()["items"])
+    assert client.get("/clients/", params={"company": company, "updated_since": since},
+                      headers=get_auth_headers()).json()["items"] == []
+    with patch("app.services.client_service.utc_now",
+               return_value=datetime.fromisoformat(since) + timedelta(seconds=1)):
+        client.put(f"/clients/{ids[1]}", json={"name": "Delta moved", "email": "delta1@example.com"},
+                   headers=get_auth_headers())
+    delta = client.get("/clients/", params={"company": company, "updated_since": since},
+                       headers=get_auth_headers()).json()["items"]
+    assert [item["_id"] for item in delta] == [ids[1]]
+    assert client.get("/clients/", params={"company": company},
+                      headers={**get_auth_headers(), "If-None-Match": etag}).status_code == 200
@@ -0,0 +1,110 @@
+from unittest.mock import MagicMock, patch
+import mongomock
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.client import ClientModel
+from app.security.auth import create_access_token
+from app.services import client_service
+from app.services.search import MemorySearchIndex, TEXT_INDEX, search_index
+
+CLIENTS = [
+    ("Martin Dupont", "Acme", "martin@acme.fr"),
+    ("Marie Curie", "Radium", "marie@radium.fr"),
+    ("Jean Valjean", "Martinez SA", "jean@martinez.fr"),
+    ("Paul Martin", "Acme", "martini@acme.fr"),
+    ("Zoé Martel", None, "zoe@ex.fr"),
+]
+
+@pytest.fixture
+def clients():
+    collection = mongomock.MongoClient().db.clients
+    with patch("app.services.client_service.clients_collection", collection):
+        for name, company, email in CLIENTS:
+            client_service.create_client(ClientModel(name=name, company=company, email=email))
+        yield collection
+
+def names(page):
+    return [item["name"] for item in page.items]
+
+def test_prefix_search_ranks_by_field_then_value_without_duplicates(clients):
+    page = client_service.search_clients("MART")
+    # nom d'abord (par ordre alphabétique), puis société, puis email
+    assert names(page) == ["Martin Dupont", "Jean Valjean", "Paul Martin"]
+    assert page.next_cursor is None
+    assert "name_lc" not in page.items[0]
+    assert names(client_service.search_clients("mar", field="name")) == ["Marie Curie", "Martin Dupont"]
+
+def test_prefix_search_paginates_with_cursor_and_projection(clients):
+    seen, cursor = [], None
+    while True:
+        page = client_service.search_clients("m", limit=2, cursor=cursor, fields=["email"])
+        assert all(set(item) == {"_id", "email"} for item in page.items)
+        seen.extend(item["email"] for item in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == ["marie@radium.fr", "martin@acme.fr", "jean@martinez.fr", "martini@acme.fr"]
+
+def test_search_rejects_bad_input(clients):
+    for kwargs in ({"q": "  "}, {"q": "a", "cursor": "%%%"}, {"q": "a", "fields": ["password"]}):
+        with pytest.raises(ValueError):
+            client_service.search_clients(**kwargs)
+
+def test_update_and_backfill_keep_lowercase_copies(clients):
+    created = client_service.create_client(ClientModel(name="Olga", email="olga@ex.fr"))
+    client_service.update_client(str(created.id), ClientModel(name="Ophélie", email="olga@ex.fr"))
+    legacy = clients.insert_one({"name": "Legacy Ltd", "email": "Legacy@Ex.fr"}).inserted_id
+    client_service.ensure_indexes()
+    assert clients.find_one({"_id": legacy})["email_lc"] == "legacy@ex.fr"
+    assert names(client_service.search_clients("oph")) == ["Ophélie"]
+    assert names(client_service.search_clients("LEG")) == ["Legacy Ltd"]
+    assert TEXT_INDEX in clients.index_information()
+
+def test_text_mode_sorts_by_score_with_offset_cursor():
+    collection = MagicMock()
+    collection.find.return_value = [{"_id": ObjectId(), "name": f"T{i}", "email": f"t{i}@ex.fr"} for i in range(3)]
+    with patch("app.services.client_service.clients_collection", collection):
+        page = client_service.search_clients("dupont acme", mode="text", limit=2)
+    query, projection = collection.find.call_args.args
+    assert query == {"$text": {"$search": "dupont acme"}}
+    assert projection == {"score": {"$meta": "textScore"}}
+    assert collection.find.call_args.kwargs["sort"][0] == ("score", {"$meta": "textScore"})
+    assert names(page) == ["T0", "T1"] and page.next_cursor
+
+def test_memory_index_ranks_exact_and_word_matches(clients):
+    index = MemorySearchIndex(ttl=60)
+    index.build(clients.find())
+    assert not index.stale()
+    # mot exact dans le nom, puis préfixe de la société
+    assert [doc["name"] for doc in index.search("martin")] == ["Martin Dupont", "Paul Martin", "Jean Valjean"]
+    index.invalidate()
+    assert index.stale()
+
+def test_memory_backend_sees_new_writes(clients):
+    with patch("app.config.settings.SEARCH_BACKEND", "memory"):
+        assert names(client_service.search_clients("acme", limit=1)) == ["Martin Dupont"]
+        client_service.create_client(ClientModel(name="Aaron Acme", email="aaron@ex.fr"))
+        assert names(client_service.search_clients("acme", field="name")) == ["Aaron Acme"]
+    search_index.invalidate()
+
+def test_search_route():
+    client = TestClient(app)
+    user = {"Authorization": f"Bearer {create_access_token({'sub': 'u', 'role': 'user'})}"}
+    # Documents complets, paginés : réservé aux admins comme la liste
+    assert client.get("/clients/search", params={"q": "a"}, headers=user).status_code == 403
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'u', 'role': 'admin'})}"}
+    assert client.get("/clients/search", params={"q": "zz-none"}, headers=headers).json()["items"] == []
+    assert client.get("/clients/search", params={"q": "a", "mode": "fuzzy"}, headers=headers).status_code == 422
+    assert client.get("/clients/search", params={"q": "a", "cursor": "%%"}, headers=headers).status_code == 400
+
+def test_text_search_without_text_index_returns_503():
+    collection = MagicMock()
+    collection.find.side_effect = OperationFailure("text index required for $text query", code=27)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'u', 'role': 'admin'})}"}
+    with patch("app.services.client_service.clients_collection", collection):
+        response = client.get("/clients/search", params={"q": "martin", "mode": "text"}, headers=headers)
+    assert response.status_code == 503 and "mode=prefix" in response.json()["detail"]
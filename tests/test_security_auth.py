@@ -9,3 +9,43 @@ def test_verify_token_valid():
 
 def test_verify_token_invalid():
     assert verify_token("invalid.token.here") is None
+
+def test_verified_token_is_cached():
+    from unittest.mock import patch
+    from app.security import auth
+    token = auth.create_access_token({"sub": "cached", "role": "user"})
+    auth.token_cache.clear()
+    with patch("app.security.auth._decode", wraps=auth._decode) as decode:
+        assert verify_token(token)["sub"] == "cached"
+        assert verify_token(token)["sub"] == "cached"
+    assert decode.call_count == 1
+
+def test_token_cache_honours_exp():
+    from app.security.auth import TokenCache
+    now = [1000.0]
+    cache = TokenCache(max_size=10, ttl=300, clock=lambda: now[0])
+    cache.set("token", {"sub": "a", "exp": 1010})
+    assert cache.get("token")["sub"] == "a"
+    now[0] = 1010
+    assert cache.get("token") is None
+
+def test_token_cache_is_bounded():
+    from app.security.auth import TokenCache
+    cache = TokenCache(max_size=2, ttl=300)
+    for name in ("a", "b", "c"):
+        cache.set(name, {"sub": name})
+    assert cache.get("a") is None
+    assert cache.get("c")["sub"] == "c"
+
+def test_invalid_token_is_not_cached():
+    from app.security import auth
+    auth.token_cache.clear()
+    assert verify_token("invalid.token.here") is None
+    assert auth.token_cache.get("invalid.token.here") is None
+
+def test_pyjwt_backend_accepts_issued_tokens():
+    import pytest
+    pytest.importorskip("jwt")
+    from app.security.auth import _make_decoder, create_access_token
+    decode, _errors = _make_decoder("pyjwt")
+    assert decode(create_access_token({"sub": "fast", "role": "admin"}))["role"] == "admin"
@@ -23,3 +23,18 @@ def test_role_required_invalid():
     with pytest.raises(HTTPException) as exc:
         checker({"sub": "user", "role": "user"})
     assert exc.value.status_code == 403
+
+def test_role_required_returns_same_dependency():
+    assert role_required("admin") is role_required("admin")
+
+def test_token_decoded_once_per_request():
+    from unittest.mock import patch
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.security import auth
+    token = auth.create_access_token({"sub": "admin", "role": "admin"})
+    auth.token_cache.clear()
+    with patch("app.security.auth._decode", wraps=auth._decode) as decode, \
+         patch("app.security.auth.token_cache.get", return_value=None):
+        TestClient(app).get("/clients/", headers={"Authorization": f"Bearer {token}"})
+    assert decode.call_count == 1
@@ -0,0 +1,86 @@
+import os
+from unittest.mock import MagicMock, mock_open, patch
+import pytest
+from anyio import to_thread
+from fastapi.testclient import TestClient
+from app import server
+from app.config import settings
+
+def test_worker_count_defaults_to_available_cpus():
+    with patch.object(settings, "SERVER_WORKERS", 0), \
+            patch("app.server.os.sched_getaffinity", return_value=set(range(64))):
+        with patch("app.server.cgroup_cpu_quota", return_value=None):
+            assert server.worker_count() == 64
+        # Conteneur limité à 1,5 CPU sur un hôte de 64 cœurs
+        with patch("app.server.cgroup_cpu_quota", return_value=1.5):
+            assert server.worker_count() == 2
+    with patch.object(settings, "SERVER_WORKERS", 3):
+        assert server.worker_count() == 3
+
+def test_cgroup_cpu_quota_reads_cpu_max():
+    with patch("builtins.open", mock_open(read_data="200000 100000\n")):
+        assert server.cgroup_cpu_quota() == 2
+    with patch("builtins.open", mock_open(read_data="max 100000\n")):
+        assert server.cgroup_cpu_quota() is None
+    with patch("builtins.open", side_effect=OSError):
+        assert server.cgroup_cpu_quota() is None
+
+def test_server_options_map_settings():
+    with patch.object(settings, "SERVER_LOOP", "uvloop"), patch.object(settings, "SERVER_KEEPALIVE", 75), \
+            patch.object(settings, "SERVER_MAX_REQUESTS", 0):
+        options = server.server_options(4)
+    assert options["workers"] == 4
+    assert options["loop"] == "uvloop"
+    assert options["timeout_keep_alive"] == 75
+    assert options["limit_max_requests"] is None
+
+def test_check_implementations_requires_explicit_packages():
+    with patch.object(settings, "SERVER_LOOP", "uvloop"), \
+            patch("app.server.importlib.util.find_spec", return_value=None):
+        with pytest.raises(RuntimeError, match="uvloop"):
+            server.check_implementations()
+    with patch.object(settings, "SERVER_LOOP", "auto"), patch.object(settings, "SERVER_HTTP", "auto"), \
+            patch("app.server.importlib.util.find_spec", return_value=None):
+        server.check_implementations()
+
+def test_prepare_metrics_dir_only_with_several_workers(tmp_path):
+    path = tmp_path / "metrics"
+    with patch.dict(os.environ, {}, clear=False), patch.object(settings, "PROMETHEUS_MULTIPROC_DIR", str(path)):
+        os.environ.pop(server.METRICS_DIR_ENV, None)
+        assert server.prepare_metrics_dir(1) is None
+        assert server.METRICS_DIR_ENV not in os.environ
+        (path / "stale.db").parent.mkdir(parents=True)
+        (path / "stale.db").write_text("x")
+        assert server.prepare_metrics_dir(4) == str(path)
+        assert os.environ[server.METRICS_DIR_ENV] == str(path)
+        assert not any(path.iterdir())
+
+def test_main_runs_uvicorn_with_workers():
+    fake_uvicorn = MagicMock()
+    with patch.dict("sys.modules", {"uvicorn": fake_uvicorn}), patch.object(settings, "SERVER_WORKERS", 2), \
+            patch("app.server.prepare_metrics_dir") as prepare:
+        server.main()
+    prepare.assert_called_once_with(2)
+    args, kwargs = fake_uvicorn.run.call_args
+    assert args == ("app.main:app",) and kwargs["workers"] == 2
+
+def test_reset_process_clients_closes_inherited_clients():
+    with patch("app.db.mongo.close_client") as close_mongo, \
+            patch("app.messaging.publisher.shutdown_publisher") as shutdown:
+        server.reset_process_clients()
+    close_mongo.assert_called_once()
+    shutdown.assert_called_once()
+
+def test_lifespan_sizes_threadpool():
+    from app.main import app  # pylint: disable=import-outside-toplevel
+    limiter = MagicMock()
+    with patch.object(settings, "SERVER_THREADPOOL_SIZE", 64), \
+            patch.object(to_thread, "current_default_thread_limiter", return_value=limiter), \
+            patch("app.main._ensure_indexes", new=MagicMock(side_effect=_noop)), \
+            patch("app.messaging.publisher.get_publisher"), \
+            patch("app.messaging.cache_invalidation.start_listener_thread", return_value=None):
+        with TestClient(app):
+            assert limiter.total_tokens == 64
+
+async def _noop():
+    return None
@@ -0,0 +1,76 @@
+import os
+import time
+from unittest.mock import patch
+import mongomock
+import pytest
+from bson import ObjectId
+from app.models.client import BulkOperation
+from app.services.client_service import bulk_write_clients
+
+# Débit minimal visé (opérations/s), ajustable selon la machine
+BULK_MIN_OPS_PER_SECOND = float(os.environ.get("BULK_MIN_OPS_PER_SECOND", "2000"))
+
+@pytest.fixture
+def clients():
+    collection = mongomock.MongoClient().db.clients
+    with patch("app.services.client_service.clients_collection", collection):
+        yield collection
+
+def create_op(i):
+    return BulkOperation(op="create", data={"name": f"Bulk {i}", "email": f"bulk{i}@example.com"})
+
+def test_bulk_mixed_operations_report_per_item_results(clients):
+    existing = clients.insert_one({"name": "Old", "email": "old@example.com"}).inserted_id
+    doomed = clients.insert_one({"name": "Doomed", "email": "doomed@example.com"}).inserted_id
+    operations = [
+        create_op(0),
+        BulkOperation(op="create", data={"name": "Bad", "email": "not-an-email"}),
+        BulkOperation(op="update", id=str(existing), data={"name": "New", "email": "old@example.com"}),
+        BulkOperation(op="update", id=str(ObjectId()), data={"name": "Ghost", "email": "g@example.com"}),
+        BulkOperation(op="delete", id=str(doomed)),
+        BulkOperation(op="delete", id="not-an-id"),
+    ]
+
+    result, events = bulk_write_clients(operations)
+
+    assert (result.created, result.updated, result.deleted, result.errors) == (1, 1, 1, 3)
+    assert [item.status for item in result.results] == ["ok", "error", "ok", "error", "ok", "error"]
+    assert result.results[3].error == "Client non trouvé"
+    assert clients.find_one({"_id": existing})["name"] == "New"
+    assert clients.find_one({"_id": doomed}) is None
+    assert [queue for queue, _ in events] == ["client_created", "client_updated", "client_deleted"]
+    assert events[1][1]["name"] == "New"
+
+def test_bulk_duplicate_key_is_reported_per_item(clients):
+    clients.create_index("email", unique=True)
+    result, events = bulk_write_clients([create_op(1), create_op(1)])
+    assert result.created == 1 and result.errors == 1
+    assert len(events) == 1
+
+def test_bulk_create_batch(clients):
+    result, events = bulk_write_clients([create_op(i) for i in range(1000)])
+    assert result.created == 1000 and len(events) == 1000
+    assert clients.count_documents({}) == 1000
+
+# Objectif de débit des opérations groupées, mesuré sur mongomock (hors CI : pytest -m largedata)
+@pytest.mark.largedata
+def test_bulk_create_throughput(clients):
+    operations = [create_op(i) for i in range(1000)]
+    start = time.perf_counter()
+    result, _events = bulk_write_clients(operations)
+    elapsed = time.perf_counter() - start
+    assert result.created == 1000
+    assert 1000 / elapsed >= BULK_MIN_OPS_PER_SECOND, f"{1000 / elapsed:.0f} ops/s"
+
+def test_bulk_writes_maintain_version(clients):
+    legacy = clients.insert_one({"name": "Legacy", "email": "legacy@example.com"}).inserted_id
+    result, _ = bulk_write_clients([
+        create_op(0),
+        BulkOperation(op="update", id=str(legacy), data={"name": "Legacy 2", "email": "legacy@example.com",
+                                                          "version": 99}),
+    ])
+    assert result.errors == 0
+    created = clients.find_one({"_id": ObjectId(result.results[0].id)})
+    updated = clients.find_one({"_id": legacy})
+    assert created["version"] == 1 and created["updated_at"] is not None
+    assert updated["version"] == 1 and updated["updated_at"] is not None
@@ -22,3 +22,30 @@ def test_delete_client_not_found():
 
 def test_delete_client_invalid_id():
     assert delete_client("not-a-valid-id") is False
+
+def test_fast_read_path_skips_validation():
+    from unittest.mock import patch
+    from app.models.client import client_document
+    document = client_document({"_id": ObjectId(), "name": "Legacy", "email": "not-an-email", "extra": 1})
+    assert document["is_active"] is True and "extra" not in document
+    with patch("app.services.client_service.clients_collection.find_one", return_value={**document}), \
+         patch("app.config.settings.READ_FAST_PATH", True):
+        assert get_client(document["_id"]).email == "not-an-email"
+
+def test_fast_read_path_tolerates_missing_required_fields():
+    import json
+    from app.models.client import client_document
+    from app.utils.responses import FastJSONResponse
+    document = client_document({"_id": ObjectId(), "name": "Sans email"})
+    assert document["email"] is None and document["is_active"] is True
+    assert json.loads(FastJSONResponse(document).body)["email"] is None
+
+def test_update_client_if_match_conflict():
+    import pytest
+    from app.services.client_service import VersionConflictError
+    created = create_client(ClientModel(name="Versioned", email="versioned@example.com"))
+    with pytest.raises(VersionConflictError):
+        update_client(str(created.id), ClientModel(name="V", email="versioned@example.com"), expected_versions=[3])
+    updated = update_client(str(created.id), ClientModel(name="V", email="versioned@example.com"),
+                            expected_versions=[1])
+    assert updated.version == 2
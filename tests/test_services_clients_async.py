@@ -0,0 +1,110 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+from app.config import settings
+from app.models.client import ClientModel
+from app.routes import clients_async
+from app.security.auth import create_access_token
+from app.services import async_client_service as service
+
+@pytest.fixture
+def collections():
+    db = AsyncMongoMockClient()["clients_db"]
+    with patch.object(service, "clients_collection", db["clients"]), \
+            patch.object(service, "outbox_collection", db["outbox"]):
+        yield db
+
+def test_async_crud_roundtrip(collections):
+    async def scenario():
+        created = await service.create_client(ClientModel(name="Async", email="async@example.com"))
+        client_id = str(created.id)
+        assert (await service.get_client(client_id)).name == "Async"
+        updated = await service.update_client(client_id, ClientModel(name="Async 2", email="async@example.com"))
+        assert updated.name == "Async 2"
+        assert [c.name for c in await service.list_clients()] == ["Async 2"]
+        assert await service.delete_client(client_id) is True
+        assert await service.get_client(client_id) is None
+
+    asyncio.run(scenario())
+
+def test_async_invalid_and_missing_ids(collections):
+    async def scenario():
+        assert await service.get_client("not-an-id") is None
+        assert await service.update_client(str(ObjectId()), ClientModel(name="X", email="x@y.com")) is None
+        assert await service.delete_client("not-an-id") is False
+        assert await service.delete_client(str(ObjectId())) is False
+
+    asyncio.run(scenario())
+
+def test_async_outbox_mode_records_events(collections):
+    async def scenario():
+        created = await service.create_client(ClientModel(name="Outbox", email="outbox@example.com"))
+        await service.delete_client(str(created.id))
+        return [doc["queue"] async for doc in collections["outbox"].find()]
+
+    with patch.object(settings, "EVENTS_MODE", "outbox"):
+        assert asyncio.run(scenario()) == ["client_created", "client_deleted"]
+
+@patch("app.routes.clients_async.publish_client_created")
+def test_async_routes_create_and_get(mock_publish, collections):
+    app = FastAPI()
+    app.include_router(clients_async.router, prefix="/clients")
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'test', 'role': 'admin'})}"}
+
+    response = client.post("/clients/", json={"name": "Route", "email": "route@example.com"}, headers=headers)
+    assert response.status_code == 201
+    mock_publish.assert_awaited_once()
+
+    client_id = response.json()["_id"]
+    assert client.get(f"/clients/{client_id}", headers=headers).json()["name"] == "Route"
+    assert client.get(f"/clients/{ObjectId()}", headers=headers).status_code == 404
+
+def test_async_list_clients_page(collections):
+    async def scenario():
+        for i in range(3):
+            await service.create_client(ClientModel(name=f"P{i}", email=f"p{i}@example.com"))
+        first = await service.list_clients_page(limit=2, fields=["name"])
+        second = await service.list_clients_page(limit=2, cursor=first.next_cursor)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert [item["name"] for item in first.items] == ["P0", "P1"]
+    assert set(first.items[0]) == {"_id", "name"}
+    assert [item["name"] for item in second.items] == ["P2"]
+    assert second.next_cursor is None
+
+def test_async_export_route(collections):
+    async def seed():
+        for i in range(3):
+            await service.create_client(ClientModel(name=f"E{i}", email=f"e{i}@example.com"))
+
+    asyncio.run(seed())
+    app = FastAPI()
+    app.include_router(clients_async.router, prefix="/clients")
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'test', 'role': 'admin'})}"}
+    response = TestClient(app).get("/clients/export", params={"format": "csv", "fields": "name"}, headers=headers)
+    assert response.status_code == 200
+    rows = response.text.splitlines()
+    assert rows[0] == "_id,name"
+    assert [row.split(",")[1] for row in rows[1:]] == ["E0", "E1", "E2"]
+    assert response.headers["content-encoding"] == "gzip"
+
+def test_async_bulk_write(collections):
+    from app.models.client import BulkOperation
+
+    async def scenario():
+        created = await service.create_client(ClientModel(name="Before", email="before@example.com"))
+        return await service.bulk_write_clients([
+            BulkOperation(op="create", data={"name": "B1", "email": "b1@example.com"}),
+            BulkOperation(op="update", id=str(created.id), data={"name": "After", "email": "before@example.com"}),
+            BulkOperation(op="delete", id=str(ObjectId())),
+        ])
+
+    result, events = asyncio.run(scenario())
+    assert (result.created, result.updated, result.errors) == (1, 1, 1)
+    assert [queue for queue, _ in events] == ["client_created", "client_updated"]
@@ -0,0 +1,33 @@
+import logging
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import create_app
+
+def test_importing_main_defers_app_and_messaging():
+    code = ("import sys, app.main; "
+            "print(sorted(m for m in ('pika', 'prometheus_fastapi_instrumentator', 'app.routes.clients', "
+            "'app.messaging.change_stream') if m in sys.modules)); "
+            "app.main.app; print('app.routes.clients' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.split("\n")[:2] == ["[]", "True"]
+
+def test_create_app_without_metrics():
+    with patch.object(settings, "METRICS_ENABLED", False):
+        client = TestClient(create_app())
+    assert client.get("/metrics").status_code == 404
+    assert client.get("/").json() == {"msg": "Bienvenue sur l'API Clients"}
+
+def test_outbox_mode_requires_transactions():
+    with patch.object(settings, "EVENTS_MODE", "outbox"), patch.object(settings, "MONGO_TRANSACTIONS", False):
+        with pytest.raises(RuntimeError, match="MONGO_TRANSACTIONS"):
+            create_app()
+
+def test_create_app_configures_application_logging():
+    root = logging.getLogger()
+    with patch.object(root, "handlers", []), patch.object(root, "level", logging.WARNING):
+        create_app()
+        assert root.handlers and root.level == logging.INFO
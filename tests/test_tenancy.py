@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+import zlib
+import pytest
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from benchmarks.bench_consumer import FakeBroker, FakeConnection
+from app.config import settings
+from app.db import mongo
+from app.db.tenancy import current_tenant, partitions_match, prepared_tenants, tenant_context, tenant_of_namespace
+from app.main import app, create_app
+from app.messaging.change_stream import ChangeStreamTailer, publish_to_broker
+from app.messaging.consumer import BatchConsumer, consumed_queues
+from app.messaging.outbox import build_event
+from app.messaging.publisher import TENANT_HEADER, partition_queues, routing_key
+from app.messaging.rabbitmq import publish_client_deleted
+from app.security.auth import create_access_token
+from app.services.cache import cache_key
+
+client = TestClient(app)
+
+def auth(tenant=None, sub="tenant-admin"):
+    claims = {"sub": sub, "role": "admin"}
+    if tenant is not None:
+        claims["tenant"] = tenant
+    return {"Authorization": f"Bearer {create_access_token(claims)}"}
+
+def payload(email):
+    return {"name": "Tenant", "email": email, "company": "Kawa", "phone": "+33100000000", "is_active": True}
+
+def test_collection_is_resolved_in_the_tenant_partition():
+    with patch.object(settings, "TENANT_STORAGE", "database"):
+        with tenant_context("acme"):
+            collection = mongo.clients_collection.resolve()
+        assert (collection.database.name, collection.name) == (f"{settings.DATABASE_NAME}_acme", "clients")
+        assert mongo.clients_collection.resolve().database.name == settings.DATABASE_NAME
+        # Collections partagées : jamais partitionnées
+        with tenant_context("acme"):
+            assert mongo.outbox_collection.resolve().database.name == settings.DATABASE_NAME
+    with patch.object(settings, "TENANT_STORAGE", "collection"), tenant_context("acme"):
+        collection = mongo.clients_collection.resolve()
+        assert (collection.database.name, collection.name) == (settings.DATABASE_NAME, "clients_acme")
+
+def test_tenant_with_own_uri_uses_its_own_client():
+    uris = {"emea": "mongodb://shard-emea:27017"}
+    with patch.object(settings, "TENANT_MONGO_URIS", uris), patch.dict(mongo._tenant_clients):
+        assert mongo.get_client("emea") is mongo.get_client("emea")
+        assert mongo.get_client("emea") is not mongo.get_client()
+        assert mongo.get_client("apac") is mongo.get_client()
+        with tenant_context("emea"):
+            mongo.clients_collection.insert_one({"email": "emea@example.com"})
+        with tenant_context("apac"):
+            assert mongo.clients_collection.find_one({"email": "emea@example.com"}) is None
+
+@patch("app.routes.clients.publish_client_created")
+def test_requests_only_see_their_tenant(_mock_publish):
+    with patch.object(settings, "TENANT_CLAIM", "tenant"):
+        created = client.post("/clients/", json=payload("shared@example.com"), headers=auth("acme"))
+        assert created.status_code == 201
+        client_id = created.json()["_id"]
+        # Même email chez un autre tenant : l'unicité est propre à la partition
+        assert client.post("/clients/", json=payload("shared@example.com"), headers=auth("globex")).status_code == 201
+        assert client.post("/clients/", json=payload("shared@example.com"), headers=auth("acme")).status_code == 409
+        assert client.get(f"/clients/{client_id}", headers=auth("acme")).status_code == 200
+        assert client.get(f"/clients/{client_id}", headers=auth("globex")).status_code == 404
+        emails = [item["email"] for item in client.get("/clients/?limit=500", headers=auth("globex")).json()["items"]]
+        assert emails == ["shared@example.com"]
+        assert {"acme", "globex"} <= prepared_tenants
+    with tenant_context("acme"):
+        assert mongo.clients_collection.count_documents({}) == 1
+
+def test_missing_or_invalid_tenant_is_rejected():
+    with patch.object(settings, "TENANT_CLAIM", "tenant"):
+        assert client.get("/clients/", headers=auth()).status_code == 403
+        assert client.get("/clients/", headers=auth("../admin")).status_code == 403
+        with patch.object(settings, "TENANT_DEFAULT", "legacy"):
+            assert client.get("/clients/", headers=auth()).status_code == 200
+
+def test_cache_keys_are_scoped_by_tenant():
+    client_id = "65f000000000000000000001"
+    with tenant_context("acme"):
+        acme = cache_key(client_id)
+    with tenant_context("globex"):
+        globex = cache_key(client_id)
+    assert acme == f"acme:{client_id}" and globex != acme and cache_key(client_id) == client_id
+
+def test_events_are_routed_to_the_tenant_partition():
+    with patch.object(settings, "RABBITMQ_PARTITIONS", 4):
+        expected = f"client_deleted.{zlib.crc32(b'acme') % 4}"
+        assert routing_key("client_deleted", "acme") == expected
+        assert len(partition_queues()) == 12 and partition_queues([1]) == [
+            "client_created.1", "client_updated.1", "client_deleted.1"
+        ]
+        publisher = MagicMock()
+        with patch("app.messaging.rabbitmq.get_publisher", return_value=publisher), tenant_context("acme"):
+            publish_client_deleted("abc")
+            event = build_event("client_deleted", {"_id": "abc"})
+        key, _body, properties = publisher.publish.call_args.args
+        assert key == expected and properties.headers == {TENANT_HEADER: "acme"}
+        assert (event["routing_key"], event["tenant"]) == (expected, "acme")
+    assert routing_key("client_deleted", "acme") == "client_deleted"
+
+def test_consumer_reads_its_partitions_and_handles_per_tenant():
+    with patch.object(settings, "RABBITMQ_PARTITIONS", 2), patch.object(settings, "CONSUMER_PARTITIONS", "1"):
+        assert consumed_queues() == ["client_created.1", "client_updated.1", "client_deleted.1"]
+    broker = FakeBroker()
+    for index, tenant in enumerate(["acme", "acme", "globex"]):
+        broker.put("client_created.1", json.dumps({"n": index}), headers={TENANT_HEADER: tenant})
+    calls = []
+    stop_event = threading.Event()
+    consumer = BatchConsumer(
+        handlers={"client_created.1": lambda messages: calls.append((current_tenant(), len(messages)))},
+        connection_factory=lambda: FakeConnection(broker), batch_size=10, batch_timeout_ms=10,
+    )
+    thread = threading.Thread(target=consumer.run, args=(stop_event,))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while broker.acked < 3 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    stop_event.set()
+    thread.join(5)
+    assert calls == [("acme", 2), ("globex", 1)]
+
+def test_change_stream_follows_every_partition():
+    with patch.object(settings, "TENANT_CLAIM", "tenant"):
+        match = partitions_match("clients")
+        assert match["ns.coll"] == "clients"
+        assert tenant_of_namespace({"db": f"{settings.DATABASE_NAME}_acme", "coll": "clients"}, "clients") == "acme"
+        assert tenant_of_namespace({"db": settings.DATABASE_NAME, "coll": "clients"}, "clients") is None
+        mongo_client = MagicMock()
+        tailer = ChangeStreamTailer(token_store=MagicMock(load=MagicMock(return_value=None)))
+        with patch("app.messaging.change_stream.get_client", return_value=mongo_client):
+            tailer.watch()
+        assert mongo_client.watch.call_args.args[0] == [{"$match": match}]
+        with patch.object(settings, "TENANT_STORAGE", "collection"):
+            assert tenant_of_namespace({"db": settings.DATABASE_NAME, "coll": "clients_globex"}, "clients") == "globex"
+        changes = [
+            {"_id": {"_data": str(index)}, "operationType": "delete", "documentKey": {"_id": f"id{index}"},
+             "ns": {"db": f"{settings.DATABASE_NAME}_{tenant}", "coll": "clients"}}
+            for index, tenant in enumerate(["acme", "acme", "globex"])
+        ]
+        events = tailer.build_events(changes)
+    assert [event.tenant for event in events] == ["acme", "acme", "globex"]
+    publisher = MagicMock()
+    with patch.object(settings, "RABBITMQ_PARTITIONS", 4), \
+            patch("app.messaging.rabbitmq.get_publisher", return_value=publisher):
+        publish_to_broker(events)
+        expected = routing_key("client_deleted", "globex")
+    batches = [call.args[0] for call in publisher.publish_many.call_args_list]
+    assert [len(batch) for batch in batches] == [2, 1]
+    key, _body, properties = batches[1][0]
+    assert key == expected and properties.headers == {TENANT_HEADER: "globex"}
+
+def test_events_modes_on_other_clusters_are_refused():
+    with patch.object(settings, "TENANT_CLAIM", "tenant"), \
+            patch.object(settings, "TENANT_MONGO_URIS", {"emea": "mongodb://shard-emea:27017"}), \
+            patch.object(settings, "EVENTS_MODE", "changestream"):
+        with pytest.raises(RuntimeError, match="TENANT_MONGO_URIS"):
+            create_app()
@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.config import settings
+from app.main import app
+from app.security.auth import create_access_token
+from app.security.throttling import (
+    LoadShedder, MemoryBucketStore, check_rate_limit, set_bucket_store, shedder, throttle,
+)
+
+client = TestClient(app)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def headers(sub, role="admin"):
+    return {"Authorization": f"Bearer {create_access_token({'sub': sub, 'role': role})}"}
+
+def throttled(route, reason):
+    return REGISTRY.get_sample_value("throttled_requests_total", {"route": route, "reason": reason}) or 0
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    store = MemoryBucketStore(clock=clock)
+    assert store.take("a", 6, capacity=10, rate=2) == 0
+    assert store.take("a", 6, capacity=10, rate=2) == pytest.approx(1.0)
+    clock.now = 1.0
+    assert store.take("a", 6, capacity=10, rate=2) == 0
+    assert store.take("b", 6, capacity=10, rate=2) == 0
+
+def test_bucket_store_is_bounded():
+    store = MemoryBucketStore(max_keys=2)
+    for key in "abc":
+        store.take(key, 1, capacity=1, rate=1)
+    assert list(store._buckets) == ["b", "c"]
+
+def test_rate_limit_uses_route_cost_and_role_factor():
+    set_bucket_store(MemoryBucketStore(clock=FakeClock()))
+    try:
+        with patch.object(settings, "RATE_LIMIT_CAPACITY", 10), patch.object(settings, "RATE_LIMIT_REFILL_RATE", 1), \
+                patch.object(settings, "RATE_LIMIT_COSTS", {"list": 10, "get": 1}), \
+                patch.object(settings, "RATE_LIMIT_ROLE_FACTORS", {"admin": 2.0}):
+            user = {"sub": "alice", "role": "user"}
+            asyncio.run(check_rate_limit("list", user))
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(check_rate_limit("get", user))
+            assert exc.value.status_code == 429 and exc.value.headers["Retry-After"] == "1"
+            admin = {"sub": "alice", "role": "admin"}
+            asyncio.run(check_rate_limit("list", admin))
+            asyncio.run(check_rate_limit("list", admin))
+    finally:
+        set_bucket_store(None)
+
+def test_list_is_throttled_with_retry_after():
+    set_bucket_store(MemoryBucketStore(clock=FakeClock()))
+    before = throttled("list", "rate_limit")
+    try:
+        with patch.object(settings, "RATE_LIMIT_CAPACITY", 10), patch.object(settings, "RATE_LIMIT_REFILL_RATE", 0.5), \
+                patch.object(settings, "RATE_LIMIT_ROLE_FACTORS", {}):
+            assert client.get("/clients/", headers=headers("greedy")).status_code == 200
+            response = client.get("/clients/", headers=headers("greedy"))
+            assert response.status_code == 429
+            assert response.headers["Retry-After"] == "20"
+            assert client.get("/clients/", headers=headers("polite")).status_code == 200
+    finally:
+        set_bucket_store(None)
+    assert throttled("list", "rate_limit") == before + 1
+
+def test_load_shedding_returns_503_when_saturated():
+    before = throttled("get", "overload")
+    with patch.object(shedder, "max_in_flight", 1), patch.object(shedder, "in_flight", 1):
+        response = client.get(f"/clients/{'0' * 24}", headers=headers("shed"))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(int(settings.SHED_RETRY_AFTER))
+    assert throttled("get", "overload") == before + 1
+    assert shedder.in_flight == 0
+
+def test_shedder_releases_slot_after_request():
+    local = LoadShedder(max_in_flight=1)
+    assert local.try_acquire() and not local.try_acquire()
+    local.release()
+    assert local.try_acquire()
+    assert LoadShedder(max_in_flight=0).try_acquire()
+    client.get(f"/clients/{'0' * 24}", headers=headers("slot"))
+    assert shedder.in_flight == 0
+
+def test_throttle_dependency_is_cached_per_route():
+    assert throttle("get") is throttle("get")
+    assert throttle("get") is not throttle("list")
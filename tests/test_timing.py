@@ -0,0 +1,57 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.utils.timing import ServerTimingMiddleware, timed, timed_stage
+
+def stage_count(stage, operation):
+    return REGISTRY.get_sample_value(
+        "app_stage_duration_seconds_count", {"stage": stage, "operation": operation}
+    ) or 0
+
+def test_timed_stage_observes_sync_and_async_calls():
+    @timed_stage("db", "sync_op")
+    def sync_op():
+        return 1
+
+    @timed_stage("broker")
+    async def async_op():
+        return 2
+
+    before = stage_count("db", "sync_op"), stage_count("broker", "async_op")
+    assert sync_op() == 1
+    assert asyncio.run(async_op()) == 2
+    assert (stage_count("db", "sync_op"), stage_count("broker", "async_op")) == (before[0] + 1, before[1] + 1)
+
+def test_server_timing_header_lists_stages_of_the_request():
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/sync")
+    def sync_route():
+        with timed("db", "find"):
+            pass
+        return {}
+
+    @app.get("/async")
+    async def async_route():
+        with timed("auth", "verify_token"):
+            pass
+        return {}
+
+    client = TestClient(app)
+    header = client.get("/sync").headers["server-timing"]
+    assert header.startswith('db;desc="find";dur=') and "total;dur=" in header
+    assert 'auth;desc="verify_token"' in client.get("/async").headers["server-timing"]
+
+def test_no_server_timing_header_by_default():
+    from app.main import app
+    assert "server-timing" not in TestClient(app).get("/").headers
+
+def test_spans_are_opened_when_enabled():
+    tracer = MagicMock()
+    with patch("app.utils.timing._tracer", tracer), patch("app.config.settings.OTEL_SPANS", True):
+        with timed("serialization", "json"):
+            pass
+    tracer.start_as_current_span.assert_called_once_with("serialization json")